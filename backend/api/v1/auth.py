@@ -1,22 +1,24 @@
 
 from fastapi import APIRouter, HTTPException, status, Depends
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import logging
 from core.auth import (
-    LoginRequest, LoginResponse, RefreshRequest,
+    LoginRequest, LoginResponse, RefreshRequest, LogoutRequest,
     authenticate_user, create_access_token, create_refresh_token,
-    verify_token, get_current_user, TokenData,
+    verify_token, get_current_user, revoke_token, TokenData,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter(tags=["authentication"])
+logger = logging.getLogger(__name__)
 
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Login endpoint - returns JWT access and refresh tokens"""
     try:
-        print(f"🔐 Login attempt for user: {request.username}")
-        
         if not authenticate_user(request.username, request.password):
-            print(f"❌ Authentication failed for user: {request.username}")
+            logger.warning("Login failed for user %s", request.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -28,7 +30,7 @@ async def login(request: LoginRequest):
         access_token = create_access_token(token_data)
         refresh_token = create_refresh_token(token_data)
         
-        print(f"✅ Login successful for user: {request.username}")
+        logger.info("Login successful for user %s", request.username)
         
         return LoginResponse(
             access_token=access_token,
@@ -40,7 +42,7 @@ async def login(request: LoginRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Login error: {str(e)}")
+        logger.exception("Login error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Login failed: {str(e)}"
@@ -76,8 +78,22 @@ async def verify_current_token(current_user: TokenData = Depends(get_current_use
     }
 
 @router.post("/logout")
-async def logout(current_user: TokenData = Depends(get_current_user)):
-    """Logout endpoint - client should remove tokens"""
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Logout endpoint - revokes the access token, and the refresh token if one is sent"""
+    tokens = [current_user]
+    if request is not None and request.refresh_token:
+        tokens.append(verify_token(request.refresh_token, "refresh"))
+
+    for token_data in tokens:
+        try:
+            await run_in_threadpool(revoke_token, token_data)
+        except Exception as e:
+            # Still revoked on this worker; the others will keep accepting it until it expires
+            logger.error("Could not persist %s token revocation for %s: %s", token_data.token_type, token_data.username, e)
+
     return {
         "message": "Successfully logged out",
         "username": current_user.username
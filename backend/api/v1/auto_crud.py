@@ -11,6 +11,9 @@ def auto_discover_models() -> List[Tuple[Type, str, str]]:
     
     for mapper in Base.registry.mappers:
         model_class = mapper.class_
+        # Internal tables (e.g. revoked_tokens) opt out with __auto_crud__ = False
+        if not getattr(model_class, "__auto_crud__", True):
+            continue
         table_name = mapper.class_.__tablename__
         
         # Generate display name from table name
@@ -1,12 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from decimal import Decimal
-from core.database import get_db
+from core.database import get_async_read_db, wants_fresh_read
 from core.auth import get_current_user, TokenData
-from services.dashboard_service import DashboardService
-from models.models import User
+from services.dashboard_service import DashboardService, CHART_GRANULARITY
 from schemas.dashboard import (
     DashboardStatsResponse,
     ChartDataResponse,
@@ -18,31 +15,14 @@ router = APIRouter(tags=["dashboard"])
 
 @router.get("/stats", response_model=DashboardStatsResponse)
 async def get_dashboard_stats(
-    current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: TokenData = Depends(get_current_user)
 ):
     """Get comprehensive dashboard statistics"""
     try:
-        # Total Prime Users
-        total_prime_users = db.query(func.count(User.UserID)).filter(
-            User.IsDeleted == False,
-            User.prime_status == True
-        ).scalar() or 0
-
-        # Total LCR Money
-        from models.models import LcrMoney
-        total_lcr_money = db.query(func.sum(LcrMoney.amount)).filter(
-            LcrMoney.status == 1
-        ).scalar() or Decimal("0.00")
-
-        # Total LCR Rewards
-        from models.models import LcrRewards
-        total_lcr_rewards = db.query(func.sum(LcrRewards.amount)).filter(
-            LcrRewards.status == 1
-        ).scalar() or Decimal("0.00")
-
-        stats = DashboardService.get_dashboard_stats(db)
-        return DashboardStatsResponse(**stats)
+        # Served from the shared snapshot (stale while one worker refreshes it) unless X-Fresh-Read is sent
+        snapshot = await DashboardService.dashboard_stats_snapshot(fresh=wants_fresh_read(request))
+        return DashboardStatsResponse(**snapshot.data, as_of=snapshot.as_of, stale=snapshot.stale)
     except Exception as e:
         error_msg = str(e).lower()
         if 'database' in error_msg or 'connection' in error_msg or 'operational' in error_msg:
@@ -54,13 +34,19 @@ async def get_dashboard_stats(
 
 @router.get("/charts", response_model=ChartDataResponse)
 async def get_chart_data(
+    request: Request,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    days: int = Query(7, description="Window: 1 (hourly), 7 or 30 (daily), 90 or 365 (weekly)")
 ):
-    """Get chart data for daily volume and service distribution"""
+    """Get chart data for transaction volume and service distribution"""
+    if days not in CHART_GRANULARITY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"days must be one of {', '.join(map(str, CHART_GRANULARITY))}"
+        )
     try:
-        charts = DashboardService.get_chart_data(db)
-        return ChartDataResponse(**charts)
+        snapshot = await DashboardService.chart_data_snapshot(days, fresh=wants_fresh_read(request))
+        return ChartDataResponse(**snapshot.data, as_of=snapshot.as_of, stale=snapshot.stale)
     except Exception as e:
         error_msg = str(e).lower()
         if 'database' in error_msg or 'connection' in error_msg or 'operational' in error_msg:
@@ -74,11 +60,11 @@ async def get_chart_data(
 async def get_transactions(
     current_user: TokenData = Depends(get_current_user),
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get transactions"""
     try:
-        transactions = DashboardService.get_live_transactions(db, limit)
+        transactions = await db.run_sync(DashboardService.get_live_transactions, limit)
         return transactions
     except Exception as e:
         error_msg = str(e).lower()
@@ -93,11 +79,11 @@ async def get_transactions(
 async def get_recent_users(
     current_user: TokenData = Depends(get_current_user),
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get recently registered users"""
     try:
-        users = DashboardService.get_recent_users(db, limit)
+        users = await db.run_sync(DashboardService.get_recent_users, limit)
         return users
     except Exception as e:
         error_msg = str(e).lower()
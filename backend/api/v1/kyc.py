@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, Request
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from typing import Optional
+import logging
 import os
 
-from core.database import get_db
+from core.database import get_async_read_db
 from core.config import settings
 from core.auth import get_current_user, TokenData
 from models.models import User, OfflineKYC, PanOfflineKYC
 
 router = APIRouter(tags=["kyc"])
+logger = logging.getLogger(__name__)
 
 @router.get("/verification")
 async def get_kyc_verification(
@@ -17,22 +19,19 @@ async def get_kyc_verification(
     current_user: TokenData = Depends(get_current_user),
     kyc_status: Optional[str] = Query(None),
     limit: int = Query(500, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get ALL users with KYC verification status filter"""
     try:
         from models.models import Aadhar_User, User_Aadhar_Address
         
-        print(f"\n{'='*80}")
-        print(f"🔍 KYC Verification API called")
-        print(f"   Authenticated user: {current_user.username}")
-        print(f"   kyc_status filter: {kyc_status}")
-        print(f"   limit: {limit}")
-        print(f"   Request URL: {request.url}")
-        print(f"{'='*80}\n")
+        logger.debug(
+            "KYC verification requested by %s (kyc_status=%s, limit=%s)",
+            current_user.username, kyc_status, limit
+        )
         
         # Get ALL users with left outer joins
-        query = db.query(User, OfflineKYC, PanOfflineKYC, Aadhar_User, User_Aadhar_Address).outerjoin(
+        query = select(User, OfflineKYC, PanOfflineKYC, Aadhar_User, User_Aadhar_Address).outerjoin(
             OfflineKYC, User.UserID == OfflineKYC.user_id
         ).outerjoin(
             PanOfflineKYC, OfflineKYC.id == PanOfflineKYC.offline_kyc_id
@@ -40,32 +39,32 @@ async def get_kyc_verification(
             Aadhar_User, User.UserID == Aadhar_User.user_id
         ).outerjoin(
             User_Aadhar_Address, Aadhar_User.address_id == User_Aadhar_Address.id
-        ).filter(User.IsDeleted == False)
+        ).where(User.IsDeleted == False)
 
         # Apply KYC status filter if provided
         if kyc_status and kyc_status.lower() not in ['all', 'none', '']:
             if kyc_status.lower() == 'verified':
-                query = query.filter(
+                query = query.where(
                     User.aadhar_verification_status == True,
                     User.pan_verification_status == True
                 )
             elif kyc_status.lower() == 'partially verified':
                 from sqlalchemy import or_, and_
-                query = query.filter(
+                query = query.where(
                     or_(
                         and_(User.aadhar_verification_status == True, User.pan_verification_status == False),
                         and_(User.aadhar_verification_status == False, User.pan_verification_status == True)
                     )
                 )
             elif kyc_status.lower() == 'not verified':
-                query = query.filter(
+                query = query.where(
                     User.aadhar_verification_status == False,
                     User.pan_verification_status == False
                 )
 
-        results = query.order_by(desc(User.CreatedAt)).limit(limit).all()
+        results = (await db.execute(query.order_by(desc(User.CreatedAt)).limit(limit))).all()
         
-        print(f"✅ Found {len(results)} KYC records")
+        logger.debug("Found %d KYC records", len(results))
 
         kyc_data = []
         for user, kyc, pan_data, aadhaar, address in results:
@@ -135,17 +134,7 @@ async def get_kyc_verification(
             
             kyc_data.append(kyc_record)
 
-        print(f"\n{'='*80}")
-        print(f"📊 Final Response Summary:")
-        print(f"   Total records: {len(kyc_data)}")
-        if len(kyc_data) > 0:
-            print(f"   Sample record keys: {list(kyc_data[0].keys())}")
-            print(f"   First record ID: {kyc_data[0]['id']}")
-        print(f"{'='*80}\n")
-        
         return kyc_data
     except Exception as e:
-        print(f"❌ KYC API Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("KYC API error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
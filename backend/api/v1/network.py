@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from core.auth import get_current_user, TokenData
+from services.referral_graph import ELITE_MIN_DOWNLINE, ReferralGraph, referral_graph
+
+router = APIRouter(tags=["network"])
+
+
+async def _graph() -> ReferralGraph:
+    # Only the first request of a process waits, for the initial load
+    return await run_in_threadpool(referral_graph.current)
+
+
+@router.get("/summary")
+async def get_network_summary(current_user: TokenData = Depends(get_current_user)):
+    """Network totals: members, prime members, roots, orphans, depth and the Elite/Advanced/Growing split
+
+    ``status`` uses the UI thresholds on each member's whole downline. ``loadedAt``/``refreshedAt``
+    and the watermarks tell how current the in-memory graph is.
+    """
+    try:
+        graph = await _graph()
+        return {**graph.summary(), **graph.freshness()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/levels")
+async def get_network_levels(current_user: TokenData = Depends(get_current_user)):
+    """Depth histogram of the whole network with the prime density of each level (level 0 = roots and orphans)"""
+    try:
+        graph = await _graph()
+        return {"levels": graph.levels()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/top")
+async def get_network_top(
+    by: str = Query("downline", pattern="^(downline|prime)$", description="Rank by downline size or prime downline"),
+    limit: int = Query(20, ge=1, le=1000, description="Members returned"),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Members with the largest downline (or prime downline), all levels counted"""
+    try:
+        graph = await _graph()
+        return {"by": by, "members": graph.top(by, limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/eligibility")
+async def get_network_eligibility(
+    min_downline: int = Query(ELITE_MIN_DOWNLINE, ge=0, description="Members required below the user, all levels"),
+    min_prime: int = Query(0, ge=0, description="Prime members required below the user"),
+    limit: int = Query(100, ge=0, le=1000, description="Members returned; count covers all of them"),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Members meeting a downline threshold, e.g. for royalty qualification; largest downline first"""
+    try:
+        graph = await _graph()
+        count, members = graph.eligible(min_downline, min_prime, limit)
+        return {"minDownline": min_downline, "minPrime": min_prime, "count": count, "members": members}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/orphans")
+async def get_network_orphans(
+    limit: int = Query(100, ge=1, le=1000, description="Orphans returned"),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Users whose introducer_id matches no member_id"""
+    try:
+        graph = await _graph()
+        return {"count": len(graph.orphans), "orphans": graph.orphan_list(limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/members/{user_id}")
+async def get_network_member(
+    user_id: int,
+    max_depth: Optional[int] = Query(None, ge=1, description="Deepest downline level listed"),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """A member's place in the network: depth, direct referrals, downline, prime downline, status and levels"""
+    try:
+        graph = await _graph()
+        node = graph.node_of(user_id)
+        if node is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return {**graph.member(node), "levels": graph.downline_levels(node, max_depth)[1:]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,10 @@
 
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from typing import Optional
 
-from core.database import get_db
+from core.database import get_async_read_db
 from models.payment_gateway import Payment_Gateway
 
 router = APIRouter(tags=["payment-gateway"])
@@ -15,22 +15,22 @@ async def get_all_payment_gateway_transactions(
     limit: int = Query(500, le=2000),
     status: str = Query(None),
     payment_mode: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all payment gateway transactions with optional filters"""
     try:
         # Base query with optimized loading
-        query = db.query(Payment_Gateway)
+        query = select(Payment_Gateway)
         
         # Apply filters if provided
         if status and status != 'all':
-            query = query.filter(Payment_Gateway.status == status.upper())
+            query = query.where(Payment_Gateway.status == status.upper())
         
         if payment_mode and payment_mode != 'all':
-            query = query.filter(Payment_Gateway.payment_mode == payment_mode)
+            query = query.where(Payment_Gateway.payment_mode == payment_mode)
         
         # Order by latest first and limit results
-        transactions = query.order_by(desc(Payment_Gateway.created_at)).limit(limit).all()
+        transactions = (await db.scalars(query.order_by(desc(Payment_Gateway.created_at)).limit(limit))).all()
 
         result = []
         for txn in transactions:
@@ -67,20 +67,20 @@ async def get_all_payment_gateway_transactions(
 
 
 @router.get("/statuses")
-async def get_payment_statuses(db: Session = Depends(get_db)):
+async def get_payment_statuses(db: AsyncSession = Depends(get_async_read_db)):
     """Get all unique payment statuses"""
     try:
-        statuses = db.query(Payment_Gateway.status).distinct().all()
+        statuses = (await db.execute(select(Payment_Gateway.status).distinct())).all()
         return [s[0] for s in statuses if s[0]]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/payment-modes")
-async def get_payment_modes(db: Session = Depends(get_db)):
+async def get_payment_modes(db: AsyncSession = Depends(get_async_read_db)):
     """Get all unique payment modes"""
     try:
-        modes = db.query(Payment_Gateway.payment_mode).distinct().all()
+        modes = (await db.execute(select(Payment_Gateway.payment_mode).distinct())).all()
         return [m[0] for m in modes if m[0]]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
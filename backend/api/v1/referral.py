@@ -1,88 +1,147 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-
-from core.database import get_db
+from core.database import get_async_read_db
 from core.auth import get_current_user, TokenData
-from models.models import User
+from services.referral_service import (
+    MAX_TREE_DEPTH,
+    build_referral_tree,
+    downline_levels_query,
+    downline_prime_query,
+    referral_level_page,
+    referral_tree_query,
+    tree_totals,
+    upline_query,
+)
 
 router = APIRouter(tags=["referral"])
 
-def build_referral_tree(user: User, db: Session, current_level: int = 0, max_depth: int = 10) -> Dict[str, Any]:
-    """Recursively build referral tree"""
-    if current_level >= max_depth:
-        return None
-    
-    # Get all users referred by this user
-    referred_users = db.query(User).filter(
-        User.introducer_id == user.member_id,
-        User.IsDeleted == False
-    ).all()
-    
-    user_data = {
-        "UserID": user.UserID,
-        "fullname": user.fullname or f"User {user.UserID}",
-        "member_id": user.member_id,
-        "MobileNumber": user.MobileNumber,
-        "Email": user.Email,
-        "prime_status": user.prime_status,
-        "referred_count": len(referred_users),
-        "level": current_level,
-        "referred_users": []
-    }
-    
-    # Recursively build tree for referred users
-    for ref_user in referred_users:
-        child_tree = build_referral_tree(ref_user, db, current_level + 1, max_depth)
-        if child_tree:
-            user_data["referred_users"].append(child_tree)
-    
-    return user_data
-
 @router.get("/{user_id}/referral-chain")
 async def get_referral_chain(
     user_id: int,
+    max_depth: int = Query(MAX_TREE_DEPTH, ge=1, le=MAX_TREE_DEPTH, description="Levels walked below the user"),
+    depth: Optional[int] = Query(None, ge=1, le=MAX_TREE_DEPTH, description="Return one page of this level instead of the nested tree"),
+    after: Optional[int] = Query(None, description="With depth: UserID of the last node of the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="With depth: nodes per page"),
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get complete referral chain for a user"""
+    """Get the referral chain (downline) of a user, fetched with a single recursive query
+
+    Without ``depth`` the tree is returned nested under ``chain``. With ``?depth=N`` only level N is
+    returned, flat under ``nodes``, ordered by UserID and paged with ``after``/``nextAfter``; a node
+    is expanded on demand with ``/{its UserID}/referral-chain?depth=1``. ``totalReferrals`` and
+    ``maxDepth`` always cover the whole tree up to ``max_depth``.
+    """
     try:
-        user = db.query(User).filter(
-            User.UserID == user_id,
-            User.IsDeleted == False
-        ).first()
-        
-        if not user:
+        query = referral_tree_query(
+            user_id, max_depth, depth=depth, after=after, limit=limit if depth is not None else None
+        )
+        rows = (await db.execute(query)).all()
+
+        if not rows:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        # Build the referral tree
-        referral_tree = build_referral_tree(user, db)
-        
-        # Calculate total referrals recursively
-        def count_referrals(node: Dict) -> int:
-            count = len(node.get("referred_users", []))
-            for child in node.get("referred_users", []):
-                count += count_referrals(child)
-            return count
-        
-        # Calculate max depth
-        def get_max_depth(node: Dict, current_depth: int = 0) -> int:
-            if not node.get("referred_users"):
-                return current_depth
-            return max(get_max_depth(child, current_depth + 1) for child in node["referred_users"])
-        
-        total_referrals = count_referrals(referral_tree)
-        max_depth = get_max_depth(referral_tree)
-        
-        return {
-            "userName": user.fullname or f"User {user.UserID}",
-            "totalReferrals": total_referrals,
-            "maxDepth": max_depth,
-            "chain": [referral_tree]
+
+        root = rows[0]
+        response = {
+            "userName": root.fullname or f"User {root.UserID}",
+            **tree_totals(rows),
         }
+        if depth is None:
+            response["chain"] = [build_referral_tree(rows)]
+        else:
+            response["depth"] = depth
+            response.update(referral_level_page(rows, limit))
+        return response
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{user_id}/downline/levels")
+async def get_downline_levels(
+    user_id: int,
+    max_depth: Optional[int] = Query(None, ge=1, description="Deepest level counted"),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Active and prime member counts per downline level, from referral_closure"""
+    try:
+        rows = (await db.execute(downline_levels_query(user_id, max_depth))).all()
+        if not rows or rows[0].level != 0:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        levels = [{"level": row.level, "members": row.members, "prime": row.prime} for row in rows[1:]]
+        return {
+            "userId": user_id,
+            "totalMembers": sum(level["members"] for level in levels),
+            "totalPrime": sum(level["prime"] for level in levels),
+            "levels": levels,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{user_id}/downline/prime-count")
+async def get_downline_prime_count(
+    user_id: int,
+    max_depth: Optional[int] = Query(None, ge=1, description="Deepest level counted"),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Size of the user's active downline and how many of its members are prime"""
+    try:
+        row = (await db.execute(downline_prime_query(user_id, max_depth))).one()
+        if not row.found:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return {
+            "userId": user_id,
+            "members": row.members,
+            "prime": row.prime,
+            "primePercentage": round(row.prime / row.members * 100, 1) if row.members else 0.0,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{user_id}/upline")
+async def get_upline(
+    user_id: int,
+    max_levels: Optional[int] = Query(None, ge=1, description="Introducers returned, nearest first"),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Introducer chain of a user with the level each ancestor is at (LevelIncome.level), nearest first"""
+    try:
+        rows = (await db.execute(upline_query(user_id, max_levels))).all()
+        if not rows or rows[0].level != 0:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return {
+            "userId": user_id,
+            "memberId": rows[0].member_id,
+            "upline": [
+                {
+                    "level": row.level,
+                    "UserID": row.UserID,
+                    "fullname": row.fullname or f"User {row.UserID}",
+                    "member_id": row.member_id,
+                    "prime_status": row.prime_status,
+                    "IsDeleted": row.IsDeleted,
+                }
+                for row in rows[1:]
+            ],
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,34 +1,34 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, or_, func, select
 from datetime import datetime
 from decimal import Decimal
+import logging
 
-from core.database import get_db
+from core.database import get_async_read_db
 from core.auth import get_current_user, TokenData
 from models.payment_gateway import Payment_Gateway
 from models.models import User, LcrMoney, LcrRewards
 from models.service_request import Service_Request
 
 router = APIRouter(tags=["transactions"])
+logger = logging.getLogger(__name__)
 
 @router.get("/detail/{reference_id}")
 async def get_transaction_detail(
     reference_id: str,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get detailed transaction info including LCR money and rewards by reference_id"""
     try:
-        print(f"🔍 Searching for reference_id: {reference_id}")
-        
         # Find service request by reference_id
-        service_req = db.query(Service_Request).filter(
+        service_req = await db.scalar(select(Service_Request).where(
             Service_Request.reference_id == reference_id
-        ).first()
+        ).limit(1))
         
         if not service_req:
-            print(f"⚠️ No service request found for reference_id: {reference_id}")
+            logger.debug("No service request found for reference_id %s", reference_id)
             return {
                 "reference_id": reference_id,
                 "service_type": "N/A",
@@ -40,19 +40,15 @@ async def get_transaction_detail(
                 "status": "Not Found"
             }
         
-        print(f"✅ Found service request: ID={service_req.id}, Status={service_req.status}")
-        
         # Get LCR Money total for this reference_id
-        lcr_money_total = db.query(func.sum(LcrMoney.amount)).filter(
+        lcr_money_total = await db.scalar(select(func.sum(LcrMoney.amount)).where(
             LcrMoney.reference_id == reference_id
-        ).scalar() or Decimal('0.00')
+        )) or Decimal('0.00')
         
         # Get LCR Rewards total for this reference_id
-        lcr_reward_total = db.query(func.sum(LcrRewards.amount)).filter(
+        lcr_reward_total = await db.scalar(select(func.sum(LcrRewards.amount)).where(
             LcrRewards.reference_id == reference_id
-        ).scalar() or Decimal('0.00')
-        
-        print(f"💰 LCR Money Total: {lcr_money_total}, LCR Reward Total: {lcr_reward_total}")
+        )) or Decimal('0.00')
         
         # Determine status based on service request status
         is_completed = service_req.status.lower() in ['completed', 'paid', 'success']
@@ -69,20 +65,18 @@ async def get_transaction_detail(
         }
         
     except Exception as e:
-        print(f"❌ Error in get_transaction_detail: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_transaction_detail: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
 @router.get("/service-types")
 async def get_service_types(
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all unique service types"""
     try:
-        service_types = db.query(Service_Request.service_type).distinct().all()
+        service_types = (await db.execute(select(Service_Request.service_type).distinct())).all()
         return [st[0] for st in service_types if st[0]]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -94,7 +88,7 @@ async def get_mobile_transactions(
     limit: int = Query(500, le=1000),
     service_type: str = Query(None),
     status: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get mobile recharge transactions only (excluding Prime, BBPS, DTH)
@@ -102,7 +96,7 @@ async def get_mobile_transactions(
     """
     try:
         # Base query - ONLY mobile recharge services (strict filtering)
-        query = db.query(Service_Request).filter(
+        query = select(Service_Request).where(
             Service_Request.status.in_(['completed', 'failed', 'processing', 'paid']),
             Service_Request.service_type.ilike('%mobile%'),
             Service_Request.service_type.ilike('%recharge%'),
@@ -114,13 +108,13 @@ async def get_mobile_transactions(
 
         # Apply service type filter if provided
         if service_type and service_type != 'all':
-            query = query.filter(Service_Request.service_type == service_type)
+            query = query.where(Service_Request.service_type == service_type)
 
         # Apply status filter if provided
         if status and status != 'all':
-            query = query.filter(Service_Request.status == status)
+            query = query.where(Service_Request.status == status)
 
-        service_requests = query.order_by(desc(Service_Request.created_at)).limit(limit).all()
+        service_requests = (await db.scalars(query.order_by(desc(Service_Request.created_at)).limit(limit))).all()
 
         result = []
         for sr in service_requests:
@@ -151,7 +145,7 @@ async def get_payment_details(
     lcr_money_page: int = Query(1, ge=1),
     lcr_rewards_page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=10, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get complete payment details for a reference ID
@@ -160,61 +154,59 @@ async def get_payment_details(
     """
     try:
         # Primary query - get service request by reference_id
-        service_request = (
-            db.query(Service_Request)
-            .filter(Service_Request.reference_id == reference_id)
-            .first()
+        service_request = await db.scalar(
+            select(Service_Request)
+            .where(Service_Request.reference_id == reference_id)
+            .limit(1)
         )
 
         if not service_request:
             raise HTTPException(status_code=404, detail=f"Service request not found for reference_id: {reference_id}")
 
         # Get user details - optimized single query
-        user = db.query(
+        user = (await db.execute(select(
             User.UserID, User.fullname, User.MobileNumber, User.Email, User.member_id
-        ).filter(User.UserID == service_request.user_id).first()
+        ).where(User.UserID == service_request.user_id).limit(1))).first()
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Payment Gateway transactions - related to this service request
-        payments = db.query(Payment_Gateway).filter(
+        payments = (await db.scalars(select(Payment_Gateway).where(
             Payment_Gateway.service_request_id == service_request.id
-        ).order_by(desc(Payment_Gateway.created_at)).limit(10).all()
+        ).order_by(desc(Payment_Gateway.created_at)).limit(10))).all()
 
         # LCR Money - JOIN by reference_id (PRIMARY) + user_id fallback
         lcr_money_offset = (lcr_money_page - 1) * page_size
-        lcr_money_query = db.query(LcrMoney).filter(
+        lcr_money_query = select(LcrMoney).where(
             LcrMoney.reference_id == reference_id
         )
         
-        lcr_money = lcr_money_query.order_by(
+        lcr_money = (await db.scalars(lcr_money_query.order_by(
             desc(LcrMoney.transactiondate)
-        ).limit(page_size).offset(lcr_money_offset).all()
+        ).limit(page_size).offset(lcr_money_offset))).all()
 
-        lcr_money_total = lcr_money_query.count()
-        
-        # Calculate total distributed LCRmoney
-        lcr_money_total_amount = db.query(func.sum(LcrMoney.amount)).filter(
-            LcrMoney.reference_id == reference_id
-        ).scalar() or Decimal('0.00000')
+        # Count and total distributed LCRmoney in one aggregate
+        lcr_money_total, lcr_money_total_amount = (await db.execute(
+            select(func.count(), func.sum(LcrMoney.amount)).where(LcrMoney.reference_id == reference_id)
+        )).one()
+        lcr_money_total_amount = lcr_money_total_amount or Decimal('0.00000')
 
         # LCR Rewards - JOIN by reference_id (PRIMARY) + user_id fallback
         lcr_rewards_offset = (lcr_rewards_page - 1) * page_size
-        lcr_rewards_query = db.query(LcrRewards).filter(
+        lcr_rewards_query = select(LcrRewards).where(
             LcrRewards.reference_id == reference_id
         )
         
-        lcr_rewards = lcr_rewards_query.order_by(
+        lcr_rewards = (await db.scalars(lcr_rewards_query.order_by(
             desc(LcrRewards.transactiondate)
-        ).limit(page_size).offset(lcr_rewards_offset).all()
+        ).limit(page_size).offset(lcr_rewards_offset))).all()
 
-        lcr_rewards_total = lcr_rewards_query.count()
-        
-        # Calculate total distributed LCR_rewards
-        lcr_rewards_total_amount = db.query(func.sum(LcrRewards.amount)).filter(
-            LcrRewards.reference_id == reference_id
-        ).scalar() or Decimal('0.00000')
+        # Count and total distributed LCR_rewards in one aggregate
+        lcr_rewards_total, lcr_rewards_total_amount = (await db.execute(
+            select(func.count(), func.sum(LcrRewards.amount)).where(LcrRewards.reference_id == reference_id)
+        )).one()
+        lcr_rewards_total_amount = lcr_rewards_total_amount or Decimal('0.00000')
 
         return {
             "service_request": {
@@ -325,23 +317,22 @@ async def get_payment_details(
 async def get_dth_transactions(
     current_user: TokenData = Depends(get_current_user),
     limit: int = Query(100, le=500),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get DTH recharge transactions"""
     try:
-        transactions = db.query(Payment_Gateway).join(
+        rows = (await db.execute(select(Payment_Gateway, User.fullname).join(
             User, Payment_Gateway.payer_mobile == User.MobileNumber
-        ).filter(
+        ).where(
             Payment_Gateway.purpose.ilike('%dth%')
-        ).order_by(desc(Payment_Gateway.created_at)).limit(limit).all()
+        ).order_by(desc(Payment_Gateway.created_at)).limit(limit))).all()
 
         result = []
-        for txn in transactions:
-            user = db.query(User).filter(User.MobileNumber == txn.payer_mobile).first()
+        for txn, user_fullname in rows:
             result.append({
                 "id": txn.id,
                 "transactionId": f"DTH{txn.id:06d}",
-                "user": txn.payer_name or (user.fullname if user else "Unknown"),
+                "user": txn.payer_name or user_fullname or "Unknown",
                 "subscriberId": txn.service_data.get('subscriber_id', f"SUB{txn.id}") if txn.service_data else f"SUB{txn.id}",
                 "operator": txn.service_data.get('operator', 'Unknown') if txn.service_data else 'Unknown',
                 "plan": txn.service_data.get('plan', 'Standard') if txn.service_data else 'Standard',
@@ -363,7 +354,7 @@ async def get_other_transactions(
     limit: int = Query(500, le=1000),
     service_type: str = Query(None),
     status: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get other service transactions (Prime Activation, BBPS, etc.)
@@ -372,7 +363,7 @@ async def get_other_transactions(
     try:
         # Base query - Prime Activation, BBPS and other services
         # EXCLUDE mobile recharge and DTH completely
-        query = db.query(Service_Request).filter(
+        query = select(Service_Request).where(
             Service_Request.status.in_(['completed', 'failed', 'processing', 'paid']),
             or_(
                 Service_Request.service_type.ilike('%prime%'),
@@ -385,13 +376,13 @@ async def get_other_transactions(
 
         # Apply service type filter if provided
         if service_type and service_type != 'all':
-            query = query.filter(Service_Request.service_type == service_type)
+            query = query.where(Service_Request.service_type == service_type)
 
         # Apply status filter if provided
         if status and status != 'all':
-            query = query.filter(Service_Request.status == status)
+            query = query.where(Service_Request.status == status)
 
-        service_requests = query.order_by(desc(Service_Request.created_at)).limit(limit).all()
+        service_requests = (await db.scalars(query.order_by(desc(Service_Request.created_at)).limit(limit))).all()
 
         result = []
         for sr in service_requests:
@@ -419,20 +410,20 @@ async def get_other_transactions(
 async def get_user_all_transactions(
     user_id: int,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all transactions for a specific user - Service Requests + LCR Money + LCR Rewards (joined by reference_id)"""
     try:
         # Get user details
-        user = db.query(User).filter(User.UserID == user_id).first()
+        user = await db.scalar(select(User).where(User.UserID == user_id).limit(1))
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Service Requests (excluding pending)
-        service_requests = db.query(Service_Request).filter(
+        service_requests = (await db.scalars(select(Service_Request).where(
             Service_Request.user_id == user_id,
             Service_Request.status != 'pending'
-        ).order_by(desc(Service_Request.created_at)).all()
+        ).order_by(desc(Service_Request.created_at)))).all()
 
         # Get all reference_ids for joining
         service_reference_ids = [sr.reference_id for sr in service_requests if sr.reference_id]
@@ -440,16 +431,16 @@ async def get_user_all_transactions(
         # LCR Bones - joined by reference_id
         lcr_bones = []
         if service_reference_ids:
-            lcr_bones = db.query(LcrMoney).filter(
+            lcr_bones = (await db.scalars(select(LcrMoney).where(
                 LcrMoney.reference_id.in_(service_reference_ids)
-            ).order_by(desc(LcrMoney.transactiondate)).all()
+            ).order_by(desc(LcrMoney.transactiondate)))).all()
 
         # LCR Rewards - joined by reference_id
         lcr_rewards = []
         if service_reference_ids:
-            lcr_rewards = db.query(LcrRewards).filter(
+            lcr_rewards = (await db.scalars(select(LcrRewards).where(
                 LcrRewards.reference_id.in_(service_reference_ids)
-            ).order_by(desc(LcrRewards.transactiondate)).all()
+            ).order_by(desc(LcrRewards.transactiondate)))).all()
 
         return {
             "user": {
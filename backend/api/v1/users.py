@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import func, desc, select
 from typing import Optional
 from datetime import datetime
 
-from core.database import get_db
+from core.database import get_async_read_db
 from core.auth import get_current_user, TokenData
 from models.models import User
 from models.payment_gateway import Payment_Gateway
@@ -17,50 +18,50 @@ async def get_all_users(
     user_type: Optional[str] = Query(None, description="Filter by Prime or Normal"),
     kyc_status: Optional[str] = Query(None, description="Filter by KYC status"),
     limit: int = Query(100, le=500),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all users with Prime/Normal and KYC status filters"""
     try:
-        query = db.query(User).filter(User.IsDeleted == False)
+        query = select(User).where(User.IsDeleted == False)
 
         # User Type Filter (Prime or Normal ONLY)
         if user_type and user_type != 'All':
             if user_type == 'Prime' or user_type == 'Prime User':
-                query = query.filter(User.prime_status == True)
+                query = query.where(User.prime_status == True)
             elif user_type == 'Normal' or user_type == 'Normal User':
-                query = query.filter(User.prime_status == False)
+                query = query.where(User.prime_status == False)
 
         # KYC Status Filter
         if kyc_status and kyc_status.lower() not in ['all', 'none', '']:
             if kyc_status.lower() == 'verified':
-                query = query.filter(
+                query = query.where(
                     User.aadhar_verification_status == True,
                     User.pan_verification_status == True
                 )
             elif kyc_status.lower() == 'partially verified' or kyc_status.lower() == 'partial verified':
                 from sqlalchemy import or_, and_
-                query = query.filter(
+                query = query.where(
                     or_(
                         and_(User.aadhar_verification_status == True, User.pan_verification_status == False),
                         and_(User.aadhar_verification_status == False, User.pan_verification_status == True)
                     )
                 )
             elif kyc_status.lower() == 'not verified':
-                query = query.filter(
+                query = query.where(
                     User.aadhar_verification_status == False,
                     User.pan_verification_status == False
                 )
 
-        users = query.order_by(desc(User.CreatedAt)).limit(limit).all()
+        users = (await db.scalars(query.order_by(desc(User.CreatedAt)).limit(limit))).all()
 
         # Get all transaction counts in a single query (optimized)
         user_mobiles = [u.MobileNumber for u in users]
-        txn_counts_query = db.query(
+        txn_counts_query = (await db.execute(select(
             Payment_Gateway.payer_mobile,
             func.count(Payment_Gateway.id).label('count')
-        ).filter(
+        ).where(
             Payment_Gateway.payer_mobile.in_(user_mobiles)
-        ).group_by(Payment_Gateway.payer_mobile).all()
+        ).group_by(Payment_Gateway.payer_mobile))).all()
 
         # Create a dictionary for quick lookup
         txn_counts = {mobile: count for mobile, count in txn_counts_query}
@@ -98,13 +99,13 @@ async def get_all_users(
 async def get_new_signups(
     current_user: TokenData = Depends(get_current_user),
     limit: int = Query(100, le=500),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get new user signups"""
     try:
-        users = db.query(User).filter(
+        users = (await db.scalars(select(User).where(
             User.IsDeleted == False
-        ).order_by(desc(User.CreatedAt)).limit(limit).all()
+        ).order_by(desc(User.CreatedAt)).limit(limit))).all()
 
         result = []
         for user in users:
@@ -131,7 +132,7 @@ async def get_new_signups(
 async def get_user_detail(
     user_id: int,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get complete user details with PAN and Aadhaar information"""
     try:
@@ -139,43 +140,43 @@ async def get_user_detail(
         from models.payment_gateway import Payment_Gateway
 
         # Get user with joins
-        user = db.query(User).filter(
+        user = await db.scalar(select(User).where(
             User.UserID == user_id,
             User.IsDeleted == False
-        ).first()
+        ).limit(1))
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Get Aadhaar details
-        aadhaar = db.query(Aadhar_User).join(
+        # Get Aadhaar details (the joined address is loaded with it; async sessions cannot lazy-load)
+        aadhaar = await db.scalar(select(Aadhar_User).join(
             User_Aadhar_Address,
             Aadhar_User.address_id == User_Aadhar_Address.id,
             isouter=True
-        ).filter(Aadhar_User.user_id == user_id).first()
+        ).options(contains_eager(Aadhar_User.address)).where(Aadhar_User.user_id == user_id).limit(1))
 
         # Get PAN details
-        pan = db.query(PanVerification).filter(
+        pan = await db.scalar(select(PanVerification).where(
             PanVerification.user_id == user_id
-        ).first()
+        ).limit(1))
 
         # Get PAN image from offline KYC
         pan_image = None
-        offline_kyc = db.query(OfflineKYC).filter(
+        offline_kyc = await db.scalar(select(OfflineKYC).where(
             OfflineKYC.user_id == user_id
-        ).first()
+        ).limit(1))
 
         if offline_kyc:
-            pan_offline = db.query(PanOfflineKYC).filter(
+            pan_offline = await db.scalar(select(PanOfflineKYC).where(
                 PanOfflineKYC.offline_kyc_id == offline_kyc.id
-            ).first()
+            ).limit(1))
             if pan_offline:
                 pan_image = pan_offline.pan_front
 
         # Get transaction counts
-        total_txns = db.query(func.count(Payment_Gateway.id)).filter(
+        total_txns = await db.scalar(select(func.count(Payment_Gateway.id)).where(
             Payment_Gateway.payer_mobile == user.MobileNumber
-        ).scalar() or 0
+        )) or 0
 
         result = {
             # Basic Info
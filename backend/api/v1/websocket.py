@@ -1,9 +1,97 @@
-# WebSocket functionality is currently disabled
-# Client uses polling instead
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+
+from core.auth import TokenData, verify_token
+from core.config import settings
+from core.token_cache import revocation_list
+from services.live_feed import RESYNC, transaction_feed
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Keeping router for future use
-# class ConnectionManager:
\ No newline at end of file
+PING = json.dumps({"type": "ping"})
+
+
+def _authenticate(websocket: WebSocket, token: Optional[str]) -> Optional[TokenData]:
+    """Access token from ?token= (browsers cannot set headers on a WebSocket) or the Authorization header"""
+    if not token:
+        authorization = websocket.headers.get("authorization", "")
+        if authorization.startswith("Bearer "):
+            token = authorization[7:].strip()
+    if not token:
+        return None
+    try:
+        return verify_token(token, "access")
+    except HTTPException as e:
+        logger.debug("WebSocket authentication failed: %s", e.detail)
+    except Exception as e:
+        logger.debug("WebSocket authentication failed: %s", e)
+    return None
+
+
+def _still_valid(token_data: TokenData) -> bool:
+    """Checked before every message, so a socket outlives neither its token's exp nor a logout"""
+    if token_data.exp.timestamp() <= time.time():
+        return False
+    return not (token_data.digest and revocation_list.is_revoked(token_data.digest))
+
+
+@router.websocket("/transactions")
+async def live_transactions(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """Live payment_gateway feed
+
+    Sends ``{"type": "snapshot", "data": [...]}`` with the latest transactions on connect (and again
+    if this socket falls behind), then ``{"type": "transactions", "data": [...]}`` with each batch of
+    new or changed rows, and ``{"type": "ping"}`` when idle. Closes with 1008 when the token is
+    missing, invalid, expired or revoked.
+    """
+    token_data = _authenticate(websocket, token)
+    if token_data is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        subscriber = await transaction_feed.subscribe()
+    except Exception as e:
+        logger.error("Live feed unavailable: %s", e)
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+
+    async def send() -> None:
+        await websocket.send_text(transaction_feed.snapshot())
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), settings.LIVE_FEED_HEARTBEAT)
+            except asyncio.TimeoutError:
+                message = PING
+            if not _still_valid(token_data):
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return
+            if message is RESYNC:
+                message = transaction_feed.snapshot()
+            await websocket.send_text(message)
+
+    async def receive() -> None:
+        # Clients send nothing; reading is how a disconnect is noticed
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, (WebSocketDisconnect, RuntimeError)):
+                logger.warning("Live feed socket closed: %s", error)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await transaction_feed.unsubscribe(subscriber)
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,112 @@
+"""
+Benchmark: GET /api/v1/auth/verify with per-request print() vs queued logging
+
+Run from backend/:
+    python -m benchmarks.bench_auth_logging [--requests 5000] [--concurrency 20] [--sink /tmp/bench_auth.log]
+
+The ``print`` run overrides get_current_user with the print-debugging version
+it replaced (sixteen stdout lines per request, written synchronously on the
+event loop). The ``queued`` runs use the real dependency with ``core.auth`` at
+DEBUG and at the INFO default: records are only enqueued on the request path
+and the listener thread does the writes. stdout is redirected to --sink so the
+runs measure the logging cost and not the terminal; results are printed to the
+real stdout. No database connection is needed.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+
+def legacy_current_user(verify_token, algorithm):
+    """get_current_user as it was, with its print() debugging, for the baseline run"""
+    from fastapi import Depends, Header, HTTPException, status
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from core.auth import security
+
+    async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
+                               authorization: str = Header(None)):
+        print(f"\n{'=' * 60}")
+        print("🔍 AUTH REQUEST DEBUG")
+        print(f"{'=' * 60}")
+        print(f"  HTTPBearer credentials present: {credentials is not None}")
+        print(f"  Authorization header present: {authorization is not None}")
+        token = credentials.credentials
+        print("  ✓ Token source: HTTPBearer")
+        print(f"  ✓ Token length: {len(token)}")
+        print(f"  ✓ Token preview: {token[:30]}...")
+        print("  🔐 Starting token verification...")
+        print(f"  📏 Token length: {len(token)}")
+        print(f"  🔑 Using algorithm: {algorithm}")
+        print(f"🔍 Decoding token with SECRET_KEY (length: {len(token)})")
+        token_data = verify_token(token, "access")
+        if token_data is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+        print(f"📦 Token payload - username: {token_data.username}, type: access, exp: {token_data.exp}")
+        print(f"  ✅ Token verified for user: {token_data.username}")
+        print(f"  ✅ Token expires: {token_data.exp}")
+        print(f"{'=' * 60}\n")
+        return token_data
+
+    return get_current_user
+
+
+async def run(client, headers: dict, total: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with gate:
+            response = await client.get("/api/v1/auth/verify", headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(total)))
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per run (default: 5000)")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight (default: 20)")
+    parser.add_argument("--sink", default="/tmp/bench_auth.log", help="file that receives stdout (default: /tmp/bench_auth.log)")
+    args = parser.parse_args()
+
+    out = sys.stdout
+    # Line buffered, like a terminal or a container log pipe; must be in place before main sets up logging
+    sys.stdout = open(args.sink, "w", buffering=1, encoding="utf-8")
+
+    import httpx
+    import main as app_module
+    from core import auth
+    from core.logging_config import shutdown_logging
+
+    app = app_module.app
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # the client's per-request line is not under test
+    token = auth.create_access_token({"username": app_module.settings.ADMIN_USERNAME})
+    headers = {"Authorization": f"Bearer {token}"}
+    runs = [
+        ("print", {auth.get_current_user: legacy_current_user(auth.verify_token, auth.ALGORITHM)}, logging.INFO),
+        ("queued DEBUG", {}, logging.DEBUG),
+        ("queued INFO", {}, logging.INFO),
+    ]
+
+    print(f"/api/v1/auth/verify: {args.requests} requests, concurrency {args.concurrency}", file=out)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, overrides, level in runs:
+            app.dependency_overrides = overrides
+            logging.getLogger("core.auth").setLevel(level)
+            await run(client, headers, 100, args.concurrency)  # warm up
+            elapsed = await run(client, headers, args.requests, args.concurrency)
+            print(f"  {label:<13} {args.requests / elapsed:8.1f} req/s", file=out)
+    app.dependency_overrides = {}
+
+    shutdown_logging()
+    sys.stdout.close()
+    sys.stdout = out
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
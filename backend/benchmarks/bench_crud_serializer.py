@@ -0,0 +1,95 @@
+"""
+Micro-benchmark: auto-CRUD row serialization, legacy path vs precompiled serializer
+
+Run from backend/:
+    python -m benchmarks.bench_crud_serializer [--rows 200] [--repeat 200]
+
+The legacy path mirrors what list_records did before precompiled serializers:
+a per-field getattr/isinstance loop followed by FastAPI's jsonable_encoder and
+JSONResponse rendering. No database connection is needed.
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.crud_generator import CRUDGenerator
+from core.serializers import FastJSONResponse, get_row_serializer
+from models.payment_gateway import Payment_Gateway
+
+
+def make_rows(count: int):
+    now = datetime(2025, 10, 20, 12, 0)
+    return [
+        Payment_Gateway(
+            id=i,
+            service_request_id=i,
+            payer_name=f"Payer {i}",
+            payer_email=f"payer{i}@example.com",
+            payer_mobile=f"98{i:08d}",
+            client_txn_id=f"CT{i:010d}",
+            sabpaisa_txn_id=f"SP{i:010d}",
+            amount=Decimal("199.00") + i,
+            paid_amount=Decimal("199.50") + i,
+            payment_mode="UPI",
+            bank_name="HDFC",
+            rrn=f"RRN{i}",
+            purpose="mobile recharge",
+            status="SUCCESS",
+            status_code="0000",
+            sabpaisa_message="Transaction successful",
+            service_data={"operator": "JIO", "circle": "DL", "plan": i},
+            amount_type="INR",
+            trans_date=now - timedelta(minutes=i),
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(minutes=i // 2),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_render(records, fields) -> bytes:
+    data = []
+    for record in records:
+        record_dict = {}
+        for field in fields:
+            value = getattr(record, field.name, None)
+            if isinstance(value, datetime):
+                record_dict[field.name] = value.isoformat()
+            else:
+                record_dict[field.name] = value
+        data.append(record_dict)
+    payload = jsonable_encoder({"status": "success", "data": data, "meta": {"page": 1}})
+    return JSONResponse(payload).body
+
+
+def fast_render(records, serialize) -> bytes:
+    payload = {"status": "success", "data": [serialize(record) for record in records], "meta": {"page": 1}}
+    return FastJSONResponse(payload).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200, help="rows per page (default: 200)")
+    parser.add_argument("--repeat", type=int, default=200, help="pages rendered per timing run (default: 200)")
+    args = parser.parse_args()
+
+    fields = [f for f in CRUDGenerator.get_model_fields(Payment_Gateway) if f.type != "relationship"]
+    serialize = get_row_serializer(Payment_Gateway, tuple(f.name for f in fields))
+    records = make_rows(args.rows)
+
+    legacy = min(timeit.repeat(lambda: legacy_render(records, fields), number=args.repeat, repeat=5))
+    fast = min(timeit.repeat(lambda: fast_render(records, serialize), number=args.repeat, repeat=5))
+
+    per_page = lambda total: total / args.repeat * 1000
+    print(f"payment_gateway, {args.rows} rows/page, best of 5 x {args.repeat} pages")
+    print(f"  legacy (loop + jsonable_encoder): {per_page(legacy):8.3f} ms/page")
+    print(f"  precompiled + FastJSONResponse:   {per_page(fast):8.3f} ms/page")
+    print(f"  speedup: {legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
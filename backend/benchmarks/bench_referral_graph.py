@@ -0,0 +1,84 @@
+"""
+Micro-benchmark: the in-memory referral graph behind /api/v1/users/network/*
+
+Run from backend/:
+    python -m benchmarks.bench_referral_graph [--members 1000000] [--refresh 1000]
+
+Builds a synthetic referral forest (each member introduced by a random earlier
+one, often a recent one; three roots, 30% prime) without a database, then
+times the full compute, an incremental refresh of ``--refresh`` new members on
+a copy, and each query the endpoints make.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from services.referral_graph import ReferralGraph
+
+
+def make_rows(count: int, start: int = 0, seed: int = 7):
+    rng = random.Random(seed + start)
+    created = datetime(2025, 1, 1) + timedelta(seconds=start)
+    for i in range(start, start + count):
+        # Any earlier member, or (one in five) a recent one, so some chains run deep
+        if i < 3:
+            introducer = None
+        elif rng.random() < 0.2:
+            introducer = max(0, i - 1 - int(rng.expovariate(1 / 50)))
+        else:
+            introducer = rng.randrange(i)
+        yield (
+            i + 1,
+            f"M{i + 1}",
+            f"M{introducer + 1}" if introducer is not None else None,
+            introducer + 1 if introducer is not None else None,
+            rng.random() < 0.3,
+            created + timedelta(seconds=i - start),
+        )
+
+
+def timed(label: str, fn, repeat: int = 1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<34} {elapsed * 1000:10.2f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=1_000_000)
+    parser.add_argument("--refresh", type=int, default=1000)
+    args = parser.parse_args()
+
+    graph = ReferralGraph()
+    timed("load rows", lambda: graph.add_rows(make_rows(args.members)))
+    timed("compute", graph.compute)
+    timed("warm", graph.warm)
+    print(f"members {len(graph)}, depth {len(graph.level_members) - 1}, status {graph.status_counts}")
+
+    def refresh():
+        updated = graph.copy()
+        added, relinked = updated.add_rows(make_rows(args.refresh, start=args.members))
+        if relinked or not updated.attach(added):
+            updated.compute()
+        updated.warm(graph)
+        return updated
+    updated = timed(f"refresh (+{args.refresh}, copy + warm)", refresh)
+    assert len(updated) == args.members + args.refresh
+
+    root = graph.node_of(1)
+    leaf = graph.node_of(args.members)
+    timed("summary", graph.summary, 100)
+    timed("levels", graph.levels, 100)
+    timed("top 100", lambda: graph.top("downline", 100), 100)
+    timed("eligibility (>= 51, prime >= 10)", lambda: graph.eligible(51, 10, 100), 10)
+    timed("member (leaf)", lambda: (graph.member(leaf), graph.downline_levels(leaf, 10)), 100)
+    timed("member (root, 10 levels)", lambda: (graph.member(root), graph.downline_levels(root, 10)), 10)
+    timed("orphans", lambda: graph.orphan_list(100), 100)
+
+
+if __name__ == "__main__":
+    main()
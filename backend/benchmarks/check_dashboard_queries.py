@@ -0,0 +1,56 @@
+"""
+Query-count check: GET /api/v1/dashboard/stats must run at most 4 SQL statements
+
+Run from backend/ against the configured DATABASE_URL:
+    python -m benchmarks.check_dashboard_queries [--max-queries 4]
+
+The endpoint is called in process with ``X-Fresh-Read: true``, which bypasses
+the dashboard snapshot so the statistics are really computed; the statement
+count comes from the ``Server-Timing`` header written by
+SQLInstrumentationMiddleware, which counts every statement the request ran on
+any connection. The response is also compared with
+DashboardService.get_dashboard_stats on a plain sync session, so the concurrent
+path cannot drift from the sequential one. Exits 1 on failure.
+"""
+import argparse
+import re
+import sys
+
+from fastapi.testclient import TestClient
+
+import main
+from core.auth import create_access_token
+from core.config import settings
+from core.database import FRESH_READ_HEADER, SessionLocal
+from services.dashboard_service import DashboardService
+
+QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def main_check() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-queries", type=int, default=4, help="statement budget (default: 4)")
+    args = parser.parse_args()
+
+    headers = {
+        "Authorization": f"Bearer {create_access_token({'username': settings.ADMIN_USERNAME})}",
+        FRESH_READ_HEADER: "true",
+    }
+    with TestClient(main.app) as client:
+        response = client.get("/api/v1/dashboard/stats", headers=headers)
+    response.raise_for_status()
+    queries = int(QUERIES.search(response.headers["server-timing"]).group(1))
+
+    with SessionLocal() as db:
+        expected = DashboardService.get_dashboard_stats(db)
+    body = response.json()
+    mismatched = {key: (value, body[key]) for key, value in expected.items() if body[key] != value}
+
+    print(f"/api/v1/dashboard/stats: {queries} statements (budget {args.max_queries})")
+    if mismatched:
+        print(f"  differs from the sequential service (expected, got): {mismatched}")
+    return 0 if queries <= args.max_queries and not mismatched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,119 @@
+"""
+Consistency check: referral_closure as maintained by the triggers must equal what ``build`` computes
+
+Run from backend/ (SQLite in memory unless --url names a scratch database; its
+users and referral_closure tables are dropped and recreated):
+    python -m benchmarks.check_referral_closure [--url postgresql://.../scratch]
+
+Replays writes in the orders other writers of users produce them: members
+inserted before their introducer (a chain and a fan of subtrees), introducer
+changes, deletions, and inserts/updates that would close a cycle (which must
+be refused). After each step the trigger-maintained rows are compared with a
+fresh ``build``. The scratch users table has no introducer foreign key, as
+writers outside this API do not need one. Exits 1 on the first mismatch.
+"""
+import argparse
+import sys
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, insert, select, update
+from sqlalchemy.exc import DBAPIError
+
+from models.referral_closure import ReferralClosure
+from services.referral_closure import build, ensure_referral_closure_triggers
+
+metadata = MetaData()
+users = Table(
+    "users", metadata,
+    Column("UserID", Integer, primary_key=True),
+    Column("member_id", String(255), unique=True),
+    Column("introducer_id", String(255), index=True),
+)
+ReferralClosure.__table__.to_metadata(metadata)
+
+
+def add(engine, user_id: int, member_id: str, introducer_id):
+    with engine.begin() as conn:
+        conn.execute(insert(users).values(UserID=user_id, member_id=member_id, introducer_id=introducer_id))
+
+
+def reparent(engine, member_id: str, introducer_id):
+    with engine.begin() as conn:
+        conn.execute(update(users).where(users.c.member_id == member_id).values(introducer_id=introducer_id))
+
+
+def remove(engine, member_id: str):
+    with engine.begin() as conn:
+        conn.execute(delete(users).where(users.c.member_id == member_id))
+
+
+def closure_rows(engine):
+    closure = metadata.tables["referral_closure"]
+    with engine.connect() as conn:
+        return sorted(conn.execute(select(closure.c.ancestor, closure.c.descendant, closure.c.depth)).all())
+
+
+def refused(engine, write) -> bool:
+    try:
+        write()
+    except DBAPIError:
+        return True
+    return False
+
+
+def main_check() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite://", help="scratch database (default: SQLite in memory)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    ensure_referral_closure_triggers(engine)
+
+    steps = [
+        ("root", lambda: add(engine, 1, "M1", None)),
+        ("child before its introducer", lambda: add(engine, 3, "M1001", "M1000")),
+        ("grandchild before its introducer", lambda: add(engine, 4, "M1002", "M1001")),
+        ("introducer arrives", lambda: add(engine, 2, "M1000", "M1")),
+        ("two subtrees waiting for one introducer", lambda: (
+            add(engine, 5, "M2001", "M2000"), add(engine, 6, "M2002", "M2000"), add(engine, 7, "M2003", "M2002"),
+        )),
+        ("their introducer arrives under an existing member", lambda: add(engine, 8, "M2000", "M1001")),
+        ("member without member_id", lambda: add(engine, 9, None, "M2000")),
+        ("subtree moved to another introducer", lambda: reparent(engine, "M2002", "M1")),
+        ("member detached", lambda: reparent(engine, "M1001", None)),
+        ("member deleted", lambda: remove(engine, "M2000")),
+        ("orphans re-attached by a new member", lambda: add(engine, 10, "M2000", "M1002")),
+        ("member waiting for its introducer", lambda: add(engine, 12, "C3", "C2")),
+    ]
+    for name, write in steps:
+        write()
+        maintained = closure_rows(engine)
+        build(engine)
+        rebuilt = closure_rows(engine)
+        if maintained != rebuilt:
+            print(f"{name}: trigger rows differ from build")
+            print(f"  missing: {sorted(set(rebuilt) - set(maintained))}")
+            print(f"  extra:   {sorted(set(maintained) - set(rebuilt))}")
+            return 1
+        print(f"{name}: {len(maintained)} rows, same as build")
+
+    cycles = [
+        ("insert introduced by itself", lambda: add(engine, 11, "C1", "C1")),
+        ("insert introduced by its own waiting downline", lambda: add(engine, 13, "C2", "C3")),
+        ("update under its own downline", lambda: reparent(engine, "M1001", "M2000")),
+    ]
+    for name, write in cycles:
+        before = closure_rows(engine)
+        if not refused(engine, write):
+            print(f"{name}: not refused")
+            return 1
+        if closure_rows(engine) != before:
+            print(f"{name}: refused but referral_closure changed")
+            return 1
+        print(f"{name}: refused")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,115 @@
+"""
+Load test: sync Session vs AsyncSession under mixed slow and fast requests
+
+Run from backend/ against the configured DATABASE_URL:
+    python -m benchmarks.load_async_db [--requests 200] [--concurrency 20] [--slow-ratio 0.1] [--slow-seconds 0.5]
+
+Two identical pairs of endpoints are mounted on a throwaway app, one pair on
+``get_db`` and one on ``get_async_db``. Requests are fired concurrently through
+an in-process ASGI client, so every handler shares one event loop exactly as in
+a single uvicorn worker. A slow query on the sync session holds the loop for
+its whole duration; on the async session the fast requests keep flowing.
+
+Keep --concurrency within the sync pool (pool_size + max_overflow = 30): past
+that, a blocked checkout on the loop waits out pool_timeout, because the
+sessions that would release a connection are closed by that same loop.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.database import dispose_async_engine, engine, get_async_db, get_db
+
+FAST_SQL = text("SELECT 1")
+
+
+def slow_sql(dialect: str, seconds: float):
+    if dialect == "postgresql":
+        return text("SELECT pg_sleep(:seconds)").bindparams(seconds=seconds)
+    # SQLite has no sleep; a recursive count runs at roughly two million rows per second
+    rows = int(seconds * 2_000_000)
+    return text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :rows) SELECT count(*) FROM n"
+    ).bindparams(rows=rows)
+
+
+def build_app(slow_seconds: float) -> FastAPI:
+    app = FastAPI()
+    slow = slow_sql(engine.dialect.name, slow_seconds)
+
+    @app.get("/sync/fast")
+    async def sync_fast(db: Session = Depends(get_db)):
+        return {"value": db.execute(FAST_SQL).scalar()}
+
+    @app.get("/sync/slow")
+    async def sync_slow(db: Session = Depends(get_db)):
+        return {"value": db.execute(slow).scalar()}
+
+    @app.get("/async/fast")
+    async def async_fast(db: AsyncSession = Depends(get_async_db)):
+        return {"value": (await db.execute(FAST_SQL)).scalar()}
+
+    @app.get("/async/slow")
+    async def async_slow(db: AsyncSession = Depends(get_async_db)):
+        return {"value": (await db.execute(slow)).scalar()}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, prefix: str, plan: list, concurrency: int) -> dict:
+    latencies = {"fast": [], "slow": []}
+    gate = asyncio.Semaphore(concurrency)
+
+    async def call(kind: str):
+        async with gate:
+            started = time.perf_counter()
+            response = await client.get(f"/{prefix}/{kind}")
+            response.raise_for_status()
+            latencies[kind].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(kind) for kind in plan))
+    latencies["elapsed"] = time.perf_counter() - started
+    return latencies
+
+
+def report(label: str, result: dict, total: int):
+    fast = sorted(result["fast"])
+    p95 = fast[int(len(fast) * 0.95) - 1] if fast else 0.0
+    print(f"  {label:<13} {total / result['elapsed']:8.1f} req/s   "
+          f"fast p50 {statistics.median(fast) * 1000 if fast else 0.0:8.1f} ms   fast p95 {p95 * 1000:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per run (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight (default: 20)")
+    parser.add_argument("--slow-ratio", type=float, default=0.1, help="share of slow requests (default: 0.1)")
+    parser.add_argument("--slow-seconds", type=float, default=0.5, help="duration of a slow query (default: 0.5)")
+    args = parser.parse_args()
+
+    random.seed(7)
+    plan = ["slow" if random.random() < args.slow_ratio else "fast" for _ in range(args.requests)]
+    app = build_app(args.slow_seconds)
+
+    print(f"{engine.dialect.name}: {args.requests} requests, {plan.count('slow')} slow "
+          f"(~{args.slow_seconds}s each), concurrency {args.concurrency}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for prefix in ("sync", "async"):
+            await client.get(f"/{prefix}/fast")  # warm the pool
+            report(f"{prefix} Session", await run(client, prefix, plan, args.concurrency), len(plan))
+
+    await dispose_async_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,11 @@ from pydantic import BaseModel
 from datetime import datetime, timedelta
 from jose import jwt
 from core.config import settings
+from core.token_cache import token_cache, revocation_list, token_digest
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 # JWT Configuration
 SECRET_KEY = settings.SECRET_KEY
@@ -21,6 +26,8 @@ class TokenData(BaseModel):
     username: str
     exp: datetime
     token_type: str = "access"
+    # SHA-256 of the JWT, used to revoke it on logout
+    digest: Optional[str] = None
 
 class LoginRequest(BaseModel):
     username: str
@@ -36,6 +43,9 @@ class LoginResponse(BaseModel):
 class RefreshRequest(BaseModel):
     refresh_token: str
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -47,7 +57,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "token_type": "access",
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        # Unique per token, so revoking one login never revokes another issued in the same second
+        "jti": uuid.uuid4().hex
     })
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -60,54 +72,79 @@ def create_refresh_token(data: dict) -> str:
     to_encode.update({
         "exp": expire,
         "token_type": "refresh",
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        # Unique per token, so revoking one login never revokes another issued in the same second
+        "jti": uuid.uuid4().hex
     })
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str, expected_type: str = "access") -> Optional[TokenData]:
-    """Verify JWT token and return token data"""
+    """Verify JWT token and return token data
+
+    Revoked tokens are rejected first; tokens already verified by this worker are
+    served from the LRU without decoding them again.
+    """
+    digest = token_digest(token)
+    if revocation_list.is_revoked(digest):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    cached = token_cache.get(digest)
+    if cached is not None:
+        if cached.token_type != expected_type:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid token type. Expected {expected_type}, got {cached.token_type}"
+            )
+        return cached
+
     try:
-        print(f"🔍 Decoding token with SECRET_KEY (length: {len(SECRET_KEY)})")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("username")
         exp: int = payload.get("exp")
         token_type: str = payload.get("token_type", "access")
 
-        print(f"📦 Token payload - username: {username}, type: {token_type}, exp: {exp}")
-
         if username is None:
-            print("❌ No username in token")
+            logger.debug("Token has no username claim")
             return None
 
         if token_type != expected_type:
-            print(f"❌ Token type mismatch: expected {expected_type}, got {token_type}")
+            logger.debug("Token type mismatch: expected %s, got %s", expected_type, token_type)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid token type. Expected {expected_type}, got {token_type}"
             )
 
-        return TokenData(
+        token_data = TokenData(
             username=username,
             exp=datetime.fromtimestamp(exp),
-            token_type=token_type
+            token_type=token_type,
+            digest=digest
         )
+        token_cache.put(digest, exp, token_data)
+        return token_data
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError as e:
-        print(f"❌ Token expired: {e}")
+        logger.debug("Token expired: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"}
         )
     except jwt.InvalidTokenError as e:
-        print(f"❌ Invalid token: {e}")
+        logger.debug("Invalid token: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"}
         )
     except Exception as e:
-        print(f"❌ Token validation error: {e}")
+        logger.warning("Token validation error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -121,70 +158,57 @@ async def get_current_user(
     """Validate JWT token and return user data"""
     token = None
 
-    print(f"\n{'='*60}")
-    print(f"🔍 AUTH REQUEST DEBUG")
-    print(f"{'='*60}")
-    print(f"  HTTPBearer credentials present: {credentials is not None}")
-    print(f"  Authorization header present: {authorization is not None}")
-    
     # Try to get token from HTTPBearer security first
     if credentials:
         token = credentials.credentials
-        print(f"  ✓ Token source: HTTPBearer")
-        print(f"  ✓ Token length: {len(token)}")
-        print(f"  ✓ Token preview: {token[:30]}...")
     # Fallback to manual Authorization header parsing
     elif authorization:
         # Handle "Bearer <token>" format
         if authorization.startswith("Bearer "):
             token = authorization[7:].strip()  # Remove "Bearer " prefix
-            print(f"  ✓ Token source: Authorization Header")
-            print(f"  ✓ Token length: {len(token)}")
-            print(f"  ✓ Token preview: {token[:30]}...")
         else:
-            print(f"  ✗ Invalid header format: {authorization[:50]}...")
-            print(f"  ✗ Expected: 'Bearer <token>'")
+            logger.debug("Authorization header is not in 'Bearer <token>' format")
     
     if not token:
-        print("❌ Authentication failed: No token found in request")
-        print(f"   - HTTPBearer credentials present: {credentials is not None}")
-        print(f"   - Authorization header present: {authorization is not None}")
+        logger.debug(
+            "Authentication failed: no token (bearer credentials: %s, authorization header: %s)",
+            credentials is not None, authorization is not None
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing or invalid authorization header",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    print(f"  🔐 Starting token verification...")
-    print(f"  📏 Token length: {len(token)}")
-    print(f"  🔑 Using algorithm: {ALGORITHM}")
-    
     try:
         token_data = verify_token(token, "access")
         
         if token_data is None:
-            print(f"  ✗ Token verification returned None")
-            print(f"{'='*60}\n")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired token",
                 headers={"WWW-Authenticate": "Bearer"}
             )
         
-        print(f"  ✅ Token verified for user: {token_data.username}")
-        print(f"  ✅ Token expires: {token_data.exp}")
-        print(f"{'='*60}\n")
+        logger.debug("Token verified for user %s", token_data.username)
         return token_data
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Unexpected error during token verification: {str(e)}")
+        logger.exception("Unexpected error during token verification: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token verification failed",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+def revoke_token(token_data: TokenData) -> None:
+    """Invalidate a verified token on every worker (blocking: writes revoked_tokens)"""
+    token_cache.discard(token_data.digest)
+    revocation_list.revoke(
+        token_data.digest, token_data.exp.timestamp(), token_data.username, token_data.token_type
+    )
+
 async def require_admin(current_user: TokenData = Depends(get_current_user)) -> TokenData:
     """Require admin role for protected operations"""
     # All authenticated users are admins for now
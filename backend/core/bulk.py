@@ -0,0 +1,465 @@
+"""
+Bulk create / update / delete for auto-CRUD models
+
+Rows arrive as a JSON array (or ``{"rows": [...]}`` / ``{"ids": [...]}``) or as
+NDJSON, are validated one by one against Pydantic models generated from the
+table's columns, and are written in chunks of ``BULK_CHUNK_SIZE``:
+
+* each chunk runs in its own SAVEPOINT as executemany statements (rows grouped
+  by the set of keys they provide) or, on Postgres with ``method=copy``, COPY;
+* if a chunk fails, it is rolled back and its halves are retried, down to
+  single rows, so the report names exactly which rows the database rejected.
+
+Every call returns a per-row report: ``{"index", "status", "id"}`` plus
+``errors`` (validation) or ``error`` (database) for rows that were not written.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, Iterable, List, Literal, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, StringConstraints, TypeAdapter, ValidationError, create_model
+from sqlalchemy import JSON, and_, bindparam, delete, insert, inspect, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+MAX_BULK_ROWS = 50000
+BULK_CHUNK_SIZE = 1000
+
+ON_CONFLICT = ("error", "ignore", "update")
+METHODS = ("insert", "copy")
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Written for NULL in COPY ... (FORMAT csv), so empty strings stay empty strings
+COPY_NULL = "\\N"
+
+_MISSING = object()
+
+
+class BulkError(ValueError):
+    """Raised for request bodies or options a bulk call cannot accept; surfaced as a 400"""
+    code = "INVALID_BODY"
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        if code:
+            self.code = code
+
+
+class BulkReport:
+    """Per-row outcome of a bulk call"""
+
+    def __init__(self, received: int):
+        self.received = received
+        self.results: List[Dict[str, Any]] = []
+
+    def add(self, index: int, status: str, key: Any = None, **details):
+        self.results.append({"index": index, "status": status, "id": key, **details})
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.results.sort(key=lambda result: result["index"])
+        summary = Counter(result["status"] for result in self.results)
+        return {
+            "results": self.results,
+            "summary": {"received": self.received, **summary}
+        }
+
+
+# ============================= PARSING & VALIDATION =============================
+
+def parse_body(body: bytes, content_type: Optional[str], key: str) -> List[Any]:
+    """Decode a JSON array, ``{key: [...]}`` object or NDJSON body into a list of items"""
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise BulkError("Body must be UTF-8 encoded")
+
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        items = []
+        for line_number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise BulkError(f"Line {line_number}: {e.msg}")
+            if len(items) > MAX_BULK_ROWS:
+                break
+    else:
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BulkError(f"Invalid JSON: {e.msg}")
+        if isinstance(items, dict) and isinstance(items.get(key), list):
+            items = items[key]
+        if not isinstance(items, list):
+            raise BulkError(f"Body must be a JSON array, an object with a '{key}' array, or NDJSON")
+
+    if not items:
+        raise BulkError("Body contains no rows")
+    if len(items) > MAX_BULK_ROWS:
+        raise BulkError(f"At most {MAX_BULK_ROWS} rows can be sent per request", "TOO_MANY_ROWS")
+    return items
+
+
+def _field_type(column) -> Any:
+    if getattr(column.type, "enums", None):
+        return Literal[tuple(column.type.enums)]
+    if isinstance(column.type, JSON):
+        return Any
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return Any
+    length = getattr(column.type, "length", None)
+    if python_type is str and length:
+        return Annotated[str, StringConstraints(max_length=length)]
+    return python_type
+
+
+def _required_on_create(column) -> bool:
+    if column.nullable or column.default is not None or column.server_default is not None:
+        return False
+    # Autoincrementing integer keys are assigned by the database
+    return not (column.primary_key and column is column.table.autoincrement_column)
+
+
+@lru_cache(maxsize=None)
+def get_row_schemas(model: Type) -> Tuple[Type[BaseModel], Type[BaseModel]]:
+    """(create, update) Pydantic models generated from the model's columns"""
+    config = ConfigDict(extra="forbid", protected_namespaces=())
+    columns = list(inspect(model).columns)
+
+    create_fields = {}
+    update_fields = {}
+    for column in columns:
+        field_type = _field_type(column)
+        if _required_on_create(column):
+            create_fields[column.key] = (field_type, ...)
+        else:
+            create_fields[column.key] = (Optional[field_type], None)
+        if column.primary_key:
+            update_fields[column.key] = (field_type, ...)
+        else:
+            update_fields[column.key] = (Optional[field_type], None)
+
+    create_schema = create_model(f"{model.__name__}BulkCreate", __config__=config, **create_fields)
+    update_schema = create_model(f"{model.__name__}BulkUpdate", __config__=config, **update_fields)
+    return create_schema, update_schema
+
+
+def _validation_errors(error: ValidationError) -> List[Dict[str, str]]:
+    return [
+        {"field": ".".join(str(part) for part in detail["loc"]), "message": detail["msg"]}
+        for detail in error.errors(include_url=False)
+    ]
+
+
+def validate_rows(items: List[Any], schema: Type[BaseModel], report: BulkReport) -> List[Tuple[int, Dict[str, Any]]]:
+    """Validate every item; invalid ones go straight to the report, valid ones are returned with their index"""
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            report.add(index, "invalid", errors=[{"field": "", "message": "Row must be a JSON object"}])
+            continue
+        try:
+            row = schema.model_validate(item)
+        except ValidationError as e:
+            report.add(index, "invalid", errors=_validation_errors(e))
+            continue
+        valid.append((index, row.model_dump(exclude_unset=True)))
+    return valid
+
+
+# ============================= WRITING =============================
+
+def _chunks(items: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        yield items[start:start + BULK_CHUNK_SIZE]
+
+
+def _group_by_keys(items: List[Tuple[int, Dict[str, Any]]]) -> Iterable[Tuple[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]]]:
+    """executemany needs every parameter set to have the same keys"""
+    groups: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]] = {}
+    for index, row in items:
+        groups.setdefault(tuple(sorted(row)), []).append((index, row))
+    return groups.items()
+
+
+def _db_error(error: SQLAlchemyError) -> str:
+    message = str(getattr(error, "orig", None) or error)
+    return message.strip().splitlines()[0] if message.strip() else type(error).__name__
+
+
+def _python_default(default) -> Any:
+    """Evaluate a Column default/onupdate outside of a statement, or _MISSING if it only exists in SQL"""
+    if default is None or default.is_sequence or default.is_clause_element:
+        return _MISSING
+    if default.is_callable:
+        # SQLAlchemy wraps zero-argument callables to accept the execution context
+        return default.arg(None)
+    return default.arg
+
+
+def _write_chunk(db: Session, report: BulkReport, chunk: List[Tuple[int, Any]],
+                 write: Callable[[List[Tuple[int, Any]]], List[Tuple[int, str, Any]]]) -> None:
+    """Write a chunk in one SAVEPOINT; on failure retry each half, down to single rows, to isolate the rejected rows"""
+    try:
+        with db.begin_nested():
+            outcomes = write(chunk)
+    except SQLAlchemyError as e:
+        if len(chunk) == 1:
+            report.add(chunk[0][0], "failed", error=_db_error(e))
+            return
+        middle = len(chunk) // 2
+        _write_chunk(db, report, chunk[:middle], write)
+        _write_chunk(db, report, chunk[middle:], write)
+        return
+
+    for index, status, key in outcomes:
+        report.add(index, status, key)
+
+
+def _conflict_target(table, conflict_on: Optional[str]) -> Tuple[str, ...]:
+    """Validate ?conflict_on= against the table's primary key and unique constraints"""
+    primary_key = tuple(column.key for column in table.primary_key.columns)
+    if not conflict_on:
+        return primary_key
+
+    target = tuple(name.strip() for name in conflict_on.split(",") if name.strip())
+    candidates = {frozenset(primary_key)}
+    candidates.update(frozenset([column.key]) for column in table.columns if column.unique)
+    for constraint in table.constraints:
+        if constraint.__class__.__name__ == "UniqueConstraint":
+            candidates.add(frozenset(column.key for column in constraint.columns))
+    for index in table.indexes:
+        if index.unique:
+            candidates.add(frozenset(column.key for column in index.columns))
+
+    if frozenset(target) not in candidates:
+        raise BulkError(
+            f"conflict_on must name the primary key or a unique constraint, not '{conflict_on}'",
+            "INVALID_CONFLICT_TARGET"
+        )
+    return target
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise BulkError(f"on_conflict=ignore/update is not supported on {dialect}", "UNSUPPORTED")
+    return dialect_insert
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def bulk_create(db: Session, model: Type, items: List[Any], on_conflict: str = "error",
+                conflict_on: Optional[str] = None, method: str = "insert") -> Dict[str, Any]:
+    """Insert (or upsert) validated rows in chunks and report the outcome of each"""
+    if on_conflict not in ON_CONFLICT:
+        raise BulkError(f"on_conflict must be one of: {', '.join(ON_CONFLICT)}", "INVALID_PARAMETER")
+    if method not in METHODS:
+        raise BulkError(f"method must be one of: {', '.join(METHODS)}", "INVALID_PARAMETER")
+
+    table = model.__table__
+    pk_columns = list(table.primary_key.columns)
+    target = _conflict_target(table, conflict_on)
+    dialect_insert = _dialect_insert(db) if on_conflict != "error" else None
+
+    if method == "copy":
+        if db.get_bind().dialect.name != "postgresql" or on_conflict != "error":
+            raise BulkError("method=copy is only available on PostgreSQL with on_conflict=error", "UNSUPPORTED")
+
+    create_schema, _ = get_row_schemas(model)
+    report = BulkReport(len(items))
+    rows = validate_rows(items, create_schema, report)
+
+    def pk_of(values) -> Any:
+        key = tuple(values[column.key] for column in pk_columns)
+        return key[0] if len(key) == 1 else list(key)
+
+    def insert_plain(group: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, str, Any]]:
+        statement = insert(table).returning(*pk_columns, sort_by_parameter_order=True)
+        result = db.execute(statement, [row for _, row in group])
+        return [(index, "created", pk_of(returned._mapping)) for (index, _), returned in zip(group, result)]
+
+    def insert_on_conflict(group: List[Tuple[int, Dict[str, Any]]], keys: Tuple[str, ...]) -> List[Tuple[int, str, Any]]:
+        statement = dialect_insert(table)
+        update_keys = [key for key in keys if key not in target]
+        if on_conflict == "update" and update_keys:
+            set_ = {key: statement.excluded[key] for key in update_keys}
+            for column in table.columns:
+                if column.onupdate is not None and column.key not in set_:
+                    value = _python_default(column.onupdate)
+                    if value is not _MISSING:
+                        set_[column.key] = value
+            statement = statement.on_conflict_do_update(index_elements=list(target), set_=set_)
+            written_status = "upserted"
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=list(target))
+            written_status = "created"
+
+        returning = list(dict.fromkeys([*(table.columns[key] for key in target), *pk_columns]))
+        result = db.execute(statement.returning(*returning), [row for _, row in group])
+        written = {tuple(returned._mapping[key] for key in target): pk_of(returned._mapping) for returned in result}
+
+        outcomes = []
+        for index, row in group:
+            row_key = tuple(row[key] for key in target)
+            if row_key in written:
+                outcomes.append((index, written_status, written[row_key]))
+            else:
+                outcomes.append((index, "skipped", pk_of(row) if all(c.key in row for c in pk_columns) else None))
+        return outcomes
+
+    def copy_rows(group: List[Tuple[int, Dict[str, Any]]], keys: Tuple[str, ...]) -> List[Tuple[int, str, Any]]:
+        # COPY bypasses SQLAlchemy, so Python-side column defaults are filled in here
+        defaults = {}
+        for column in table.columns:
+            if column.key not in keys:
+                value = _python_default(column.default)
+                if value is not _MISSING:
+                    defaults[column.key] = value
+        columns = [*keys, *defaults]
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for _, row in group:
+            writer.writerow([_copy_value(row[key] if key in row else defaults[key]) for key in columns])
+        buffer.seek(0)
+
+        quote = db.get_bind().dialect.identifier_preparer.quote
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {quote(table.name)} ({', '.join(quote(table.columns[key].name) for key in columns)}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer
+            )
+        finally:
+            cursor.close()
+        return [
+            (index, "created", pk_of(row) if all(c.key in row for c in pk_columns) else None)
+            for index, row in group
+        ]
+
+    def write(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, str, Any]]:
+        outcomes = []
+        for keys, group in _group_by_keys(chunk):
+            if method == "copy":
+                outcomes.extend(copy_rows(group, keys))
+            elif on_conflict == "error" or not set(target) <= set(keys):
+                # Rows without the conflict key cannot collide on it; they are plain inserts
+                outcomes.extend(insert_plain(group))
+            else:
+                outcomes.extend(insert_on_conflict(group, keys))
+        return outcomes
+
+    for chunk in _chunks(rows):
+        _write_chunk(db, report, chunk, write)
+    return report.to_dict()
+
+
+def bulk_update(db: Session, model: Type, items: List[Any]) -> Dict[str, Any]:
+    """Update validated rows by primary key in chunks and report the outcome of each"""
+    table = model.__table__
+    pk_columns = list(table.primary_key.columns)
+    pk_keys = [column.key for column in pk_columns]
+
+    _, update_schema = get_row_schemas(model)
+    report = BulkReport(len(items))
+    rows = validate_rows(items, update_schema, report)
+
+    def key_of(row: Dict[str, Any]) -> Any:
+        key = tuple(row[name] for name in pk_keys)
+        return key[0] if len(key) == 1 else key
+
+    def write(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, str, Any]]:
+        existing = _existing_keys(db, pk_columns, [key_of(row) for _, row in chunk])
+        outcomes = []
+        pending = []
+        for index, row in chunk:
+            if key_of(row) not in existing:
+                outcomes.append((index, "not_found", key_of(row)))
+            elif len(row) == len(pk_keys):
+                outcomes.append((index, "unchanged", key_of(row)))
+            else:
+                pending.append((index, row))
+
+        for keys, group in _group_by_keys(pending):
+            changed = [key for key in keys if key not in pk_keys]
+            statement = update(table).where(
+                and_(*(column == bindparam(f"k_{column.key}") for column in pk_columns))
+            ).values({key: bindparam(f"v_{key}") for key in changed})
+            db.execute(statement, [
+                {**{f"k_{key}": row[key] for key in pk_keys}, **{f"v_{key}": row[key] for key in changed}}
+                for _, row in group
+            ])
+            outcomes.extend((index, "updated", key_of(row)) for index, row in group)
+        return outcomes
+
+    for chunk in _chunks(rows):
+        _write_chunk(db, report, chunk, write)
+    return report.to_dict()
+
+
+def bulk_delete(db: Session, model: Type, items: List[Any]) -> Dict[str, Any]:
+    """Delete rows by primary key (ids, or objects carrying the key) in chunks and report each"""
+    table = model.__table__
+    pk_columns = list(table.primary_key.columns)
+    if len(pk_columns) != 1:
+        raise BulkError("Bulk delete needs a single-column primary key", "UNSUPPORTED")
+    pk_column = pk_columns[0]
+    _, update_schema = get_row_schemas(model)
+    adapter = TypeAdapter(update_schema.model_fields[pk_column.key].annotation)
+
+    report = BulkReport(len(items))
+    keys = []
+    for index, item in enumerate(items):
+        raw = item.get(pk_column.key, _MISSING) if isinstance(item, dict) else item
+        if raw is _MISSING:
+            report.add(index, "invalid", errors=[{"field": pk_column.key, "message": "Field required"}])
+            continue
+        try:
+            keys.append((index, adapter.validate_python(raw)))
+        except ValidationError as e:
+            report.add(index, "invalid", errors=[
+                {**error, "field": error["field"] or pk_column.key} for error in _validation_errors(e)
+            ])
+
+    def write(chunk: List[Tuple[int, Any]]) -> List[Tuple[int, str, Any]]:
+        existing = _existing_keys(db, pk_columns, [key for _, key in chunk])
+        if existing:
+            db.execute(delete(table).where(pk_column.in_(list(existing))))
+        return [(index, "deleted" if key in existing else "not_found", key) for index, key in chunk]
+
+    for chunk in _chunks(keys):
+        _write_chunk(db, report, chunk, write)
+    return report.to_dict()
+
+
+def _existing_keys(db: Session, pk_columns: list, keys: List[Any]) -> set:
+    if len(pk_columns) == 1:
+        return set(db.execute(select(pk_columns[0]).where(pk_columns[0].in_(keys))).scalars())
+    rows = db.execute(select(*pk_columns).where(
+        and_(*(column.in_([key[i] for key in keys]) for i, column in enumerate(pk_columns)))
+    ))
+    return {tuple(row) for row in rows}
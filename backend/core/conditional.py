@@ -0,0 +1,126 @@
+"""
+Conditional GET (ETag / Last-Modified / 304) for auto-CRUD endpoints
+
+A model's version column is an ``updated_at``/``UpdatedAt`` timestamp with an
+``onupdate``/``server_onupdate``; a column nothing refreshes on update (or a
+``created_at``) would keep serving 304s for edited rows. With one, a listing's
+version is ``max(<version column>)`` under the request's filters (inserts and
+updates) plus its total (deletes), hashed with every query parameter so each
+page, ordering and field selection gets its own ETag; a record's is its own
+stamp. Anything else (no version column, no exact/cached total, or ?expand=,
+whose related rows the stamp does not cover) is validated by hashing the
+response body, which saves the transfer but not the query.
+
+``Last-Modified`` is sent on records only, read in the column's stored zone
+(IST wall time unless the column writes UTC), and ``If-Modified-Since`` is
+honoured there when no ``If-None-Match`` is sent. Listings send none: their
+``max()`` does not move when a row is deleted.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional, Type
+
+from fastapi import Request, Response
+from sqlalchemy import inspect
+
+from core.base import IST
+from core.timeseries import stored_zone
+
+# Checked in order; the first timestamp column refreshed on every update is the model's version column
+VERSION_COLUMNS = ("updated_at", "UpdatedAt")
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def version_column(model: Type):
+    """The column whose maximum changes whenever a row is written, or None"""
+    columns = inspect(model).columns
+    for name in VERSION_COLUMNS:
+        column = columns.get(name)
+        if column is None or getattr(column.type, "python_type", None) is not datetime:
+            continue
+        if column.onupdate is not None or column.server_onupdate is not None:
+            return getattr(model, name)
+    return None
+
+
+def make_etag(*parts: Any) -> str:
+    payload = json.dumps(parts, default=str, separators=(",", ":"), sort_keys=True)
+    return f'W/"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+
+def request_fingerprint(request: Request) -> list:
+    """Every query parameter, normalized, so distinct pages/orderings/fields get distinct validators"""
+    return sorted(request.query_params.multi_items())
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): ignore the W/ prefix on both sides
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == wanted:
+            return True
+    return False
+
+
+def last_modified(column, value: Any) -> Optional[datetime]:
+    """A version stamp as an aware UTC datetime; naive values are read in the column's stored zone"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = IST.localize(value) if stored_zone(column) == "IST" else value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_fresh(request: Request, etag: str, modified: Optional[datetime] = None) -> bool:
+    """Whether the client's copy is current: If-None-Match when sent (RFC 9110 13.2.2), else If-Modified-Since"""
+    if request.headers.get("if-none-match"):
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if not since or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    modified = http_date(last_modified)
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def validate_body(request: Request, response: Response) -> Response:
+    """ETag a rendered response by its body, for results no version stamp covers"""
+    etag = make_etag(hashlib.sha1(response.body).hexdigest())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+    return response
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -9,6 +10,12 @@ class Settings(BaseSettings):
 
     # Database - PostgreSQL (from .env file) or fallback to SQLite
     DATABASE_URL: str = "sqlite:///./lcrpay.db"
+
+    # Read replicas for GET traffic, e.g. DATABASE_REPLICA_URLS='["postgresql://ro@replica1/db"]';
+    # a replica lagging more than REPLICA_MAX_LAG_SECONDS is skipped until it catches up
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL: float = 5.0
     
     # JWT Authentication
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -23,6 +30,52 @@ class Settings(BaseSettings):
     UPLOAD_FOLDER: str = os.getenv("UPLOAD_FOLDER", "./uploads")
     STATIC_URL_PATH: str = os.getenv("STATIC_URL_PATH", "/uploads")
 
+    # Auto-CRUD total counts: per-table strategy overrides (exact/estimated/cached/off),
+    # e.g. CRUD_COUNT_STRATEGIES='{"payment_gateway": "estimated"}'
+    CRUD_COUNT_STRATEGIES: Dict[str, str] = {}
+    CRUD_COUNT_CACHE_TTL: int = 60
+    CRUD_COUNT_CACHE_SIZE: int = 1024
+
+    # Per-request SQL instrumentation: a statement repeated this many times in one request is logged as a likely N+1
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # JWT auth: verified-token LRU size, and how often each worker reloads the revoked_tokens table
+    # written by /auth/logout (the longest a logout can take to reach the other workers)
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_REVOCATION_PERSIST: bool = True
+    TOKEN_REVOCATION_SYNC_INTERVAL: float = 2.0
+
+    # Dashboard snapshots: stats/charts are recomputed at most once per TTL seconds across all workers;
+    # a refresh lease lasts DASHBOARD_SNAPSHOT_LEASE seconds. The store is the primary database unless
+    # DASHBOARD_SNAPSHOT_URL names another one (e.g. sqlite:////var/lib/lcr/snapshots.db shared by local workers).
+    # A TTL of 0 disables the cache.
+    DASHBOARD_SNAPSHOT_TTL: float = 60.0
+    DASHBOARD_SNAPSHOT_LEASE: float = 30.0
+    DASHBOARD_SNAPSHOT_URL: str = ""
+
+    # Live transaction feed (/api/v1/ws/transactions): one poll of payment_gateway per process every
+    # LIVE_FEED_POLL_INTERVAL seconds (immediate on PostgreSQL NOTIFY), at most LIVE_FEED_QUEUE_SIZE
+    # messages queued per socket before a slow one is resynced, LIVE_FEED_LIMIT rows in the snapshot,
+    # and a ping after LIVE_FEED_HEARTBEAT idle seconds
+    LIVE_FEED_POLL_INTERVAL: float = 1.0
+    LIVE_FEED_QUEUE_SIZE: int = 100
+    LIVE_FEED_LIMIT: int = 50
+    LIVE_FEED_HEARTBEAT: float = 30.0
+
+    # In-memory referral graph (/api/v1/users/network/*): each process picks up new users and prime
+    # activations every NETWORK_GRAPH_REFRESH_INTERVAL seconds and reloads the whole graph every
+    # NETWORK_GRAPH_FULL_RELOAD seconds (introducer changes, deletions and lost prime status)
+    NETWORK_GRAPH_REFRESH_INTERVAL: float = 60.0
+    NETWORK_GRAPH_FULL_RELOAD: float = 3600.0
+
+    # Logging: root level, per-module overrides (e.g. LOG_LEVELS='{"core.auth": "DEBUG"}'), json or text output,
+    # and at most LOG_DEBUG_RATE_LIMIT DEBUG records per call site every LOG_DEBUG_RATE_WINDOW seconds
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}
+    LOG_FORMAT: str = "json"
+    LOG_DEBUG_RATE_LIMIT: int = 20
+    LOG_DEBUG_RATE_WINDOW: float = 1.0
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -31,7 +84,4 @@ settings = Settings()
 
 # Override DATABASE_URL from environment if provided
 if os.getenv("DATABASE_URL"):
-    settings.DATABASE_URL = os.getenv("DATABASE_URL")
-    print(f"✅ Using PostgreSQL from .env: {settings.DATABASE_URL.split('@')[0]}@****")
-else:
-    print(f"⚠️  Using SQLite fallback: {settings.DATABASE_URL}")
\ No newline at end of file
+    settings.DATABASE_URL = os.getenv("DATABASE_URL")
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Total-count strategies for auto-CRUD listings
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from core.config import settings
+
+EXACT = "exact"
+ESTIMATED = "estimated"
+CACHED = "cached"
+OFF = "off"
+
+COUNT_STRATEGIES = (EXACT, ESTIMATED, CACHED, OFF)
+
+
+class CountCache:
+    """Thread-safe TTL cache of exact counts keyed by table and normalized filters"""
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_table(self, table_name: str) -> None:
+        """Drop every cached count for a table, e.g. after a bulk write"""
+        prefix = json.dumps([table_name], separators=(",", ":"))[:-1] + ","
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+count_cache = CountCache(settings.CRUD_COUNT_CACHE_TTL, settings.CRUD_COUNT_CACHE_SIZE)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, compiled and bound like the statement itself"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    # Binds go through the dialect's own paramstyle (pyformat on psycopg2, $n on asyncpg)
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def resolve_strategy(requested: Optional[str], default: str) -> str:
+    """Map the ?count= query parameter onto a strategy, falling back to the model default"""
+    if requested is None:
+        return default
+
+    value = requested.strip().lower()
+    if value in ("false", "0", "no", "none", OFF):
+        return OFF
+    if value in ("true", "1", "yes"):
+        return EXACT if default == OFF else default
+    if value in COUNT_STRATEGIES:
+        return value
+
+    raise ValueError(f"Unknown count strategy '{requested}'. Use one of: {', '.join(COUNT_STRATEGIES)}, false")
+
+
+def make_cache_key(table_name: str, filters: Dict[str, Any], search: Optional[str], search_mode: Optional[str]) -> str:
+    """Normalize a filter set so equivalent requests share one cached count"""
+    normalized = sorted((key, str(value)) for key, value in filters.items() if value not in (None, ""))
+    # Each search mode matches a different row set; without a search the mode is irrelevant
+    mode = (search_mode or "") if search else ""
+    return json.dumps([table_name, normalized, search or "", mode], separators=(",", ":"))
+
+
+def estimate_count(db: Session, query, table_name: str, filtered: bool) -> Optional[int]:
+    """Use Postgres planner statistics instead of counting rows; None when unavailable"""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+
+    if not filtered:
+        reltuples = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(quote_ident(:table_name))"),
+            {"table_name": table_name}
+        ).scalar()
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    plan = db.execute(Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_query(
+    db: Session,
+    query,
+    table_name: str,
+    strategy: str,
+    filters: Dict[str, Any],
+    search: Optional[str],
+    search_mode: Optional[str]
+) -> Tuple[Optional[int], str]:
+    """Return (total, strategy actually used) for a filtered listing query"""
+    if strategy == OFF:
+        return None, OFF
+
+    if strategy == ESTIMATED:
+        filtered = bool(search) or any(value not in (None, "") for value in filters.values())
+        estimate = estimate_count(db, query, table_name, filtered)
+        if estimate is not None:
+            return estimate, ESTIMATED
+        return query.count(), EXACT
+
+    if strategy == CACHED:
+        key = make_cache_key(table_name, filters, search, search_mode)
+        cached = count_cache.get(key)
+        if cached is not None:
+            return cached, CACHED
+        total = query.count()
+        count_cache.set(key, total)
+        return total, EXACT
+
+    return query.count(), EXACT
@@ -1,13 +1,92 @@
-from typing import Type, List, Optional, Dict, Any, Callable
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import inspect, desc, asc, or_, and_
+from typing import Type, List, Optional, Dict, Any, Callable, Tuple, Iterable, Iterator, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, load_only, lazyload, joinedload, undefer, aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import inspect, desc, asc, or_, and_, false, func, nulls_first, nulls_last, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, create_model
-from datetime import datetime
-from core.database import get_db
+from datetime import datetime, date
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+from core.database import get_db, get_async_read_db, ReadSessionLocal, wants_fresh_read
 from core.auth import require_admin
+from core.config import settings
+from core import counting
+from core.serializers import FastJSONResponse, ExpandTree, get_row_serializer, get_expanded_serializer
+from core import search as text_search
+from core import filters as filter_engine
+from core import timeseries
+from core import bulk
+from core import conditional
+import base64
+import binascii
 import csv
 import io
+import json
+import zlib
+
+
+# Query parameters consumed by the endpoints themselves; everything else is a filter
+RESERVED_PARAMS = {
+    "page", "page_size", "ordering", "search", "search_mode", "format", "cursor", "gzip", "count",
+    "fields", "expand", "group_by", "metrics", "bucket",
+}
+
+# Rows fetched per round-trip from the server-side cursor during CSV export
+EXPORT_BATCH_SIZE = 1000
+
+# Primary keys per IN (...) query, and per /batch request
+BATCH_CHUNK_SIZE = 500
+BATCH_MAX_IDS = 5000
+
+# ?expand= limits: relationship hops per path, and rows serialized per collection
+EXPAND_MAX_DEPTH = 2
+EXPAND_MAX_ROWS = 100
+
+# /aggregate: rows returned before the result is reported as truncated
+AGGREGATE_MAX_GROUPS = 1000
+
+# Column types (as reported by get_model_fields) each aggregate metric accepts; None = any column
+NUMERIC_TYPES = {"integer", "decimal"}
+ORDERED_TYPES = NUMERIC_TYPES | {"timestamp"}
+AGGREGATE_METRICS = {
+    "count": None,
+    "sum": NUMERIC_TYPES,
+    "avg": NUMERIC_TYPES,
+    "min": ORDERED_TYPES,
+    "max": ORDERED_TYPES,
+}
+
+
+class QueryParamError(ValueError):
+    """Raised for invalid listing parameters; surfaced to the client as a 400"""
+    code = "INVALID_PARAMETER"
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        if code:
+            self.code = code
+
+    def to_http(self) -> HTTPException:
+        return HTTPException(status_code=400, detail={
+            "status": "error",
+            "error": {
+                "code": self.code,
+                "message": str(self)
+            }
+        })
+
+
+class CursorError(QueryParamError):
+    """Raised when a pagination cursor cannot be decoded or does not match the query"""
+    code = "INVALID_CURSOR"
+
+
+class BatchRequest(BaseModel):
+    ids: List[Union[int, str]]
 
 
 class FieldMetadata(BaseModel):
@@ -49,6 +128,8 @@ class CRUDGenerator:
                 field_type = "boolean"
             elif "decimal" in col_type_lower or "numeric" in col_type_lower:
                 field_type = "decimal"
+            elif "float" in col_type_lower or "double" in col_type_lower or col_type_lower == "real":
+                field_type = "decimal"
             elif "timestamp" in col_type_lower or "datetime" in col_type_lower or "date" in col_type_lower:
                 field_type = "timestamp"
             elif "text" in col_type_lower:
@@ -70,7 +151,7 @@ class CRUDGenerator:
                 unique=column.unique or column.primary_key,
                 choices=choices,
                 references=fk_reference,
-                default=column.default.arg if column.default else None
+                default=column.default.arg if column.default is not None and column.default.is_scalar else None
             ))
 
         # Add relationship fields
@@ -84,86 +165,392 @@ class CRUDGenerator:
 
         return fields
 
+    @classmethod
+    def apply_filters(cls, query, model: Type, filters: Dict[str, Any]):
+        """Apply typed query-string filters (``field`` / ``field__op``) to query"""
+        compiler = filter_engine.get_filter_compiler(model, cls.get_model_fields)
+        try:
+            return compiler.apply(query, filters)
+        except filter_engine.FilterError as e:
+            raise QueryParamError(str(e), "INVALID_FILTER")
+
     @staticmethod
-    def apply_filters(query, model: Type, filters: Dict[str, Any]):
-        """Apply dynamic filters to query"""
-        for key, value in filters.items():
-            if value is None or value == "":
-                continue
+    def apply_search(query, model: Type, search: str, fields: List[FieldMetadata], mode: str = "contains"):
+        """Apply search across text fields, using the search index when the model declares one"""
+        text_fields = [f.name for f in fields if f.type in ["string", "text"]]
+        return text_search.apply_search(query, model, search, mode, text_fields)
 
-            # Handle comparison operators
-            if key.endswith("__gt"):
-                field = key.replace("__gt", "")
-                if hasattr(model, field):
-                    query = query.filter(getattr(model, field) > value)
-            elif key.endswith("__gte"):
-                field = key.replace("__gte", "")
-                if hasattr(model, field):
-                    query = query.filter(getattr(model, field) >= value)
-            elif key.endswith("__lt"):
-                field = key.replace("__lt", "")
-                if hasattr(model, field):
-                    query = query.filter(getattr(model, field) < value)
-            elif key.endswith("__lte"):
-                field = key.replace("__lte", "")
-                if hasattr(model, field):
-                    query = query.filter(getattr(model, field) <= value)
-            elif key.endswith("__like"):
-                field = key.replace("__like", "")
-                if hasattr(model, field):
-                    query = query.filter(getattr(model, field).like(f"%{value}%"))
-            elif key.endswith("__in"):
-                field = key.replace("__in", "")
-                if hasattr(model, field):
-                    values = value.split(",") if isinstance(value, str) else value
-                    query = query.filter(getattr(model, field).in_(values))
-            else:
-                # Exact match
-                if hasattr(model, key):
-                    query = query.filter(getattr(model, key) == value)
+    @staticmethod
+    def parse_ordering(model: Type, ordering: Optional[str]) -> List[Tuple[Any, bool]]:
+        """Resolve an ordering string into (column, ascending) pairs, skipping unknown fields"""
+        if not ordering:
+            return []
+
+        columns = []
+        for field in ordering.split(","):
+            field = field.strip()
+            ascending = not field.startswith("-")
+            field_name = field.lstrip("-")
+            if field_name and hasattr(model, field_name):
+                columns.append((getattr(model, field_name), ascending))
+
+        return columns
+
+    @classmethod
+    def apply_sorting(cls, query, model: Type, ordering: str):
+        """Apply sorting to query"""
+        for column, ascending in cls.parse_ordering(model, ordering):
+            query = query.order_by(asc(column) if ascending else desc(column))
 
         return query
 
     @staticmethod
-    def apply_search(query, model: Type, search: str, fields: List[FieldMetadata]):
-        """Apply search across text fields"""
-        if not search:
-            return query
+    def _encode_cursor_value(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        if isinstance(value, date):
+            return {"d": value.isoformat()}
+        if isinstance(value, Decimal):
+            return {"dec": str(value)}
+        if isinstance(value, UUID):
+            return {"uuid": str(value)}
+        if isinstance(value, Enum):
+            return value.value
+        return value
 
-        text_fields = [f.name for f in fields if f.type in ["string", "text"]]
-        if not text_fields:
-            return query
+    @staticmethod
+    def _decode_cursor_value(value: Any) -> Any:
+        if isinstance(value, dict) and len(value) == 1:
+            (tag, raw), = value.items()
+            if tag == "dt":
+                return datetime.fromisoformat(raw)
+            if tag == "d":
+                return date.fromisoformat(raw)
+            if tag == "dec":
+                return Decimal(raw)
+            if tag == "uuid":
+                return UUID(raw)
+        return value
+
+    @classmethod
+    def encode_cursor(cls, record, keyset: List[Tuple[Any, bool]], ordering: Optional[str], direction: str) -> str:
+        """Build an opaque cursor pointing at ``record`` within the given keyset ordering"""
+        payload = {
+            "o": ordering or "",
+            "d": direction,
+            "k": [cls._encode_cursor_value(getattr(record, column.key)) for column, _ in keyset],
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
-        conditions = []
-        for field_name in text_fields:
-            if hasattr(model, field_name):
-                conditions.append(getattr(model, field_name).like(f"%{search}%"))
+    @classmethod
+    def decode_cursor(cls, cursor: str, keyset: List[Tuple[Any, bool]], ordering: Optional[str]) -> Tuple[List[Any], str]:
+        """Decode a cursor into (key values, direction), validating it against the active ordering"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            values = [cls._decode_cursor_value(v) for v in payload["k"]]
+            direction = payload["d"]
+            cursor_ordering = payload["o"]
+        except (binascii.Error, ValueError, KeyError, TypeError) as e:
+            raise CursorError(f"Malformed cursor: {e}")
 
-        if conditions:
-            query = query.filter(or_(*conditions))
+        if cursor_ordering != (ordering or ""):
+            raise CursorError("Cursor was issued for a different ordering")
+        if direction not in ("next", "prev") or len(values) != len(keyset):
+            raise CursorError("Cursor does not match this listing")
 
-        return query
+        return values, direction
 
     @staticmethod
-    def apply_sorting(query, model: Type, ordering: str):
-        """Apply sorting to query"""
-        if not ordering:
-            return query
+    def apply_keyset(query, keyset: List[Tuple[Any, bool]], values: Optional[List[Any]], direction: str):
+        """Seek past (or before) ``values`` in the keyset ordering instead of using OFFSET.
+
+        NULLs always sort last so the seek predicate is identical on every backend.
+        """
+        forward = direction == "next"
 
-        order_fields = ordering.split(",")
-        for field in order_fields:
-            if field.startswith("-"):
-                field_name = field[1:]
-                if hasattr(model, field_name):
-                    query = query.order_by(desc(getattr(model, field_name)))
+        if values is not None:
+            clauses = []
+            for position, (column, ascending) in enumerate(keyset):
+                value = values[position]
+                equal_prefix = [
+                    prev_column.is_(None) if prev_value is None else prev_column == prev_value
+                    for (prev_column, _), prev_value in zip(keyset[:position], values[:position])
+                ]
+                if forward:
+                    if value is None:
+                        step = false()
+                    else:
+                        step = or_(column > value if ascending else column < value, column.is_(None))
+                else:
+                    if value is None:
+                        step = column.isnot(None)
+                    else:
+                        step = column < value if ascending else column > value
+                clauses.append(and_(*equal_prefix, step))
+            query = query.filter(or_(*clauses))
+
+        for column, ascending in keyset:
+            if forward:
+                query = query.order_by(nulls_last(asc(column) if ascending else desc(column)))
             else:
-                if hasattr(model, field):
-                    query = query.order_by(asc(getattr(model, field)))
+                query = query.order_by(nulls_first(desc(column) if ascending else asc(column)))
 
         return query
 
     @staticmethod
-    def to_csv(data: List[Dict[str, Any]], fields: List[FieldMetadata]) -> str:
+    def parse_fields(fields_param: Optional[str], column_fields: List[FieldMetadata]) -> List[FieldMetadata]:
+        """Resolve ?fields=a,b,c into column metadata, in the requested order"""
+        if not fields_param:
+            return column_fields
+
+        by_name = {f.name: f for f in column_fields}
+        requested = list(dict.fromkeys(name.strip() for name in fields_param.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in by_name]
+        if unknown:
+            raise QueryParamError(
+                f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(by_name)}",
+                "INVALID_FIELDS"
+            )
+        if not requested:
+            return column_fields
+
+        return [by_name[name] for name in requested]
+
+    @staticmethod
+    def apply_projection(query, model: Type, selected: List[FieldMetadata], column_fields: List[FieldMetadata], extra_keys: Iterable[str] = ()):
+        """Narrow the SELECT to the selected columns (plus any keys needed for paging)"""
+        if len(selected) == len(column_fields):
+            return query
+
+        keys = dict.fromkeys([*(f.name for f in selected), *extra_keys])
+        return query.options(load_only(*(getattr(model, key) for key in keys)))
+
+    @staticmethod
+    def parse_expand(model: Type, expand: Optional[str]) -> ExpandTree:
+        """Resolve ?expand=a,b.c into a relationship tree, validating every hop"""
+        if not expand:
+            return ()
+
+        tree: Dict[str, Any] = {}
+        for path in expand.split(","):
+            path = path.strip()
+            if not path:
+                continue
+            keys = path.split(".")
+            if len(keys) > EXPAND_MAX_DEPTH:
+                raise QueryParamError(
+                    f"'{path}' is nested too deeply; at most {EXPAND_MAX_DEPTH} levels can be expanded",
+                    "INVALID_EXPAND"
+                )
+
+            mapper = inspect(model)
+            node = tree
+            for key in keys:
+                if key not in mapper.relationships:
+                    raise QueryParamError(
+                        f"Unknown relationship '{key}' in '{path}'. Available: {', '.join(mapper.relationships.keys())}",
+                        "INVALID_EXPAND"
+                    )
+                if mapper.relationships[key].secondary is not None:
+                    raise QueryParamError(
+                        f"'{key}' in '{path}' goes through an association table and cannot be expanded",
+                        "INVALID_EXPAND"
+                    )
+                mapper = mapper.relationships[key].mapper
+                node = node.setdefault(key, {})
+
+        def freeze(node: Dict[str, Any]) -> ExpandTree:
+            return tuple((key, freeze(child)) for key, child in sorted(node.items()))
+
+        return freeze(tree)
+
+    @staticmethod
+    def apply_expansion(query, entity, expand: ExpandTree):
+        """Join the expanded scalar relationships into the query; every other relationship is left unloaded.
+
+        Expanded collections are filled afterwards by load_expanded, which needs the parent side of
+        each join condition loaded even when ?fields= leaves it out.
+        """
+        options = [lazyload("*")]
+
+        def walk(entity, tree: ExpandTree, parent):
+            relationships = inspect(entity).mapper.relationships
+            for key, subtree in tree:
+                relationship = relationships[key]
+                if relationship.uselist:
+                    if parent is None:
+                        options.extend(
+                            undefer(getattr(entity, relationship.parent.get_property_by_column(local).key))
+                            for local, _ in relationship.local_remote_pairs
+                        )
+                    continue
+                attribute = getattr(entity, key)
+                loader = joinedload(attribute) if parent is None else parent.joinedload(attribute)
+                options.append(loader.lazyload("*"))
+                walk(relationship.mapper.class_, subtree, loader)
+
+        walk(entity, expand, None)
+        return query.options(*options)
+
+    @classmethod
+    def load_expanded(cls, session: Session, records: List[Any], model: Type, expand: ExpandTree, max_rows: int = EXPAND_MAX_ROWS):
+        """Fill the expanded collections of loaded records, at most max_rows per parent.
+
+        One query per collection per BATCH_CHUNK_SIZE parents; the cap is applied in SQL with
+        row_number() over each parent's children (in the relationship's order_by, else primary key),
+        so a parent with 100k children still loads only max_rows of them.
+        """
+        if not records or not expand:
+            return
+
+        relationships = inspect(model).relationships
+        for key, subtree in expand:
+            relationship = relationships[key]
+            target = relationship.mapper.class_
+            if not relationship.uselist:
+                # Already joined into the parent query; only its own collections are left to load
+                loaded = {id(value): value for value in (getattr(record, key) for record in records) if value is not None}
+                cls.load_expanded(session, list(loaded.values()), target, subtree, max_rows)
+                continue
+
+            pairs = relationship.local_remote_pairs
+            parent_keys = [relationship.parent.get_property_by_column(local).key for local, _ in pairs]
+            child_keys = [relationship.mapper.get_property_by_column(remote).key for _, remote in pairs]
+            remote_columns = [remote for _, remote in pairs]
+
+            def key_of(obj, attrs):
+                return tuple(getattr(obj, attr) for attr in attrs)
+
+            keys = list(dict.fromkeys(
+                key for key in (key_of(record, parent_keys) for record in records) if None not in key
+            ))
+            children: Dict[tuple, List[Any]] = {}
+            for start in range(0, len(keys), BATCH_CHUNK_SIZE):
+                chunk = keys[start:start + BATCH_CHUNK_SIZE]
+                if len(remote_columns) == 1:
+                    match = remote_columns[0].in_([key[0] for key in chunk])
+                else:
+                    match = tuple_(*remote_columns).in_(chunk)
+                rank = func.row_number().over(
+                    partition_by=remote_columns,
+                    order_by=relationship.order_by or inspect(target).primary_key
+                ).label("expand_rank")
+                ranked = select(target, rank).where(match).subquery()
+                child = aliased(target, ranked)
+                query = cls.apply_expansion(session.query(child), child, subtree)
+                for row in query.filter(ranked.c.expand_rank <= max_rows).order_by(ranked.c.expand_rank):
+                    children.setdefault(key_of(row, child_keys), []).append(row)
+
+            for record in records:
+                set_committed_value(record, key, children.get(key_of(record, parent_keys), []))
+            cls.load_expanded(
+                session, [row for rows in children.values() for row in rows], target, subtree, max_rows
+            )
+
+    @classmethod
+    def parse_group_by(cls, model: Type, group_by: Optional[str], column_fields: List[FieldMetadata]) -> List[str]:
+        """Resolve ?group_by=a,b into column names that can be grouped on"""
+        if not group_by:
+            return []
+
+        groupable = filter_engine.get_filter_compiler(model, cls.get_model_fields).fields
+        names = list(dict.fromkeys(name.strip() for name in group_by.split(",") if name.strip()))
+        for name in names:
+            field_filter = groupable.get(name)
+            if field_filter is None or field_filter.coerce is None:
+                raise QueryParamError(
+                    f"Cannot group by '{name}'. Available: "
+                    f"{', '.join(f.name for f in column_fields if f.name in groupable and groupable[f.name].coerce)}",
+                    "INVALID_GROUP_BY"
+                )
+        return names
+
+    @staticmethod
+    def parse_metrics(model: Type, metrics: Optional[str], column_fields: List[FieldMetadata]) -> List[Tuple[str, Any]]:
+        """Resolve ?metrics=count,sum:amount into (label, aggregate expression) pairs"""
+        types = {f.name: f.type for f in column_fields}
+        parsed = []
+        for metric in (metrics or "count").split(","):
+            metric = metric.strip()
+            if not metric:
+                continue
+            function, _, field = metric.partition(":")
+            if function not in AGGREGATE_METRICS:
+                raise QueryParamError(
+                    f"Unknown metric '{function}'. Use one of: {', '.join(AGGREGATE_METRICS)}",
+                    "INVALID_METRIC"
+                )
+
+            if not field:
+                if function != "count":
+                    raise QueryParamError(f"Metric '{function}' needs a column, e.g. {function}:amount", "INVALID_METRIC")
+                parsed.append(("count", func.count()))
+                continue
+
+            if field not in types:
+                raise QueryParamError(f"Unknown field '{field}' in metric '{metric}'", "INVALID_METRIC")
+            allowed = AGGREGATE_METRICS[function]
+            if allowed is not None and types[field] not in allowed:
+                raise QueryParamError(
+                    f"Metric '{function}' is not supported on {types[field]} field '{field}'",
+                    "INVALID_METRIC"
+                )
+            parsed.append((f"{function}_{field}", getattr(func, function)(getattr(model, field))))
+
+        if not parsed:
+            raise QueryParamError("At least one metric is required", "INVALID_METRIC")
+        return parsed
+
+    @staticmethod
+    def parse_bucket(model: Type, bucket: str, column_fields: List[FieldMetadata], dialect: str) -> Tuple[Any, str]:
+        """Resolve ?bucket=created_at:day into an IST time-bucket expression and its granularity"""
+        field, _, granularity = bucket.partition(":")
+        granularity = granularity or "day"
+        types = {f.name: f.type for f in column_fields}
+        if types.get(field) != "timestamp":
+            raise QueryParamError(
+                f"Cannot bucket on '{field}'. Available: {', '.join(name for name, t in types.items() if t == 'timestamp')}",
+                "INVALID_BUCKET"
+            )
+        try:
+            expression = timeseries.bucket_expression(getattr(model, field), granularity, dialect)
+        except ValueError as e:
+            raise QueryParamError(str(e), "INVALID_BUCKET")
+        return expression, granularity
+
+    @staticmethod
+    def parse_ids(raw_ids: Iterable[Any], coerce: Callable[[str], Any]) -> List[Any]:
+        """Coerce and de-duplicate primary keys for a batch fetch, keeping request order"""
+        ids = []
+        for raw in raw_ids:
+            raw = str(raw).strip()
+            if not raw:
+                continue
+            try:
+                ids.append(coerce(raw))
+            except filter_engine.FilterError as e:
+                raise QueryParamError(str(e), "INVALID_IDS")
+        ids = list(dict.fromkeys(ids))
+
+        if not ids:
+            raise QueryParamError("At least one id is required", "INVALID_IDS")
+        if len(ids) > BATCH_MAX_IDS:
+            raise QueryParamError(f"At most {BATCH_MAX_IDS} ids can be fetched per request", "INVALID_IDS")
+        return ids
+
+    @staticmethod
+    def csv_value(value: Any) -> str:
+        """Format a single value for a CSV cell"""
+        if value is None:
+            return ""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    @classmethod
+    def to_csv(cls, data: List[Dict[str, Any]], fields: List[FieldMetadata]) -> str:
         """Convert data to CSV format"""
         if not data:
             return ""
@@ -173,107 +560,437 @@ class CRUDGenerator:
         writer.writeheader()
 
         for row in data:
-            csv_row = {}
-            for field in fields:
-                value = row.get(field.name)
-                if value is None:
-                    csv_row[field.name] = ""
-                elif isinstance(value, datetime):
-                    csv_row[field.name] = value.isoformat()
-                else:
-                    csv_row[field.name] = str(value)
-            writer.writerow(csv_row)
+            writer.writerow({field.name: cls.csv_value(row.get(field.name)) for field in fields})
 
         return output.getvalue()
 
+    @classmethod
+    def stream_csv(
+        cls,
+        records: Iterable[Any],
+        fields: List[FieldMetadata],
+        batch_size: int = EXPORT_BATCH_SIZE,
+        compress: bool = False
+    ) -> Iterator[bytes]:
+        """Yield CSV bytes for ORM records in batches, optionally as a gzip stream"""
+        names = [f.name for f in fields]
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        pending = 1
+
+        def flush() -> bytes:
+            chunk = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            return compressor.compress(chunk) if compressor else chunk
+
+        for record in records:
+            writer.writerow([cls.csv_value(getattr(record, name, None)) for name in names])
+            pending += 1
+            if pending >= batch_size:
+                pending = 0
+                chunk = flush()
+                if chunk:
+                    yield chunk
+
+        chunk = flush()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+
     @classmethod
     def create_router(
         cls,
         model: Type,
         name: str,
         prefix: str = "",
-        tags: Optional[List[str]] = None
+        tags: Optional[List[str]] = None,
+        count_strategy: Optional[str] = None
     ) -> APIRouter:
         """Create a complete CRUD router for a model"""
         router = APIRouter(prefix=prefix, tags=tags or [name])
         fields = cls.get_model_fields(model)
-        primary_key = next((f.name for f in fields if f.readonly and f.name in ["id", "ID", f"{model.__tablename__}_id"]), "id")
+        mapper = inspect(model)
+        pk_keys = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+        primary_key = pk_keys[0]
+        default_count = count_strategy or settings.CRUD_COUNT_STRATEGIES.get(model.__tablename__, counting.EXACT)
+        column_fields = [f for f in fields if f.type != "relationship"]
+        serialize = get_row_serializer(model, tuple(f.name for f in column_fields))
+        version_col = conditional.version_column(model)
+
+        def serializer_for(selected: List[FieldMetadata], expand_tree: ExpandTree):
+            if selected is column_fields and not expand_tree:
+                return serialize
+            return get_expanded_serializer(model, tuple(f.name for f in selected), expand_tree, EXPAND_MAX_ROWS)
+
+        # Metadata only changes with the code, so its payload and validator are built once
+        meta_payload = {
+            "status": "success",
+            "data": {
+                "name": name,
+                "tableName": model.__tablename__,
+                "fields": [f.dict() for f in fields]
+            }
+        }
+        meta_etag = conditional.make_etag(meta_payload)
 
         @router.get("/meta")
-        async def get_metadata():
+        async def get_metadata(request: Request):
             """Get model metadata for dynamic rendering"""
-            return {
-                "status": "success",
-                "data": {
-                    "name": name,
-                    "tableName": model.__tablename__,
-                    "fields": [f.dict() for f in fields]
-                }
-            }
+            if conditional.etag_matches(request, meta_etag):
+                return conditional.not_modified(meta_etag)
+            return FastJSONResponse(meta_payload, headers=conditional.validator_headers(meta_etag))
 
         @router.get("/")
         async def list_records(
+            request: Request,
             page: int = Query(1, ge=1),
             page_size: int = Query(20, ge=1, le=200),
             ordering: Optional[str] = Query(None),
             search: Optional[str] = Query(None),
+            search_mode: str = Query("contains", regex="^(contains|prefix|rank)$"),
             format: str = Query("json", regex="^(json|csv)$"),
-            db: Session = Depends(get_db),
-            **filters
+            cursor: Optional[str] = Query(None, description="Keyset pagination cursor; pass an empty value for the first page"),
+            count: Optional[str] = Query(None, description="Total count strategy: exact, estimated, cached or false"),
+            fields_param: Optional[str] = Query(None, alias="fields", description="Comma-separated columns to return"),
+            expand: Optional[str] = Query(None, description="Comma-separated relationships to include inline (dotted paths allowed)"),
+            db: AsyncSession = Depends(get_async_read_db)
         ):
             """List all records with pagination, filtering, search, and sorting"""
             try:
-                query = db.query(model)
+                filters = {k: v for k, v in request.query_params.items() if k not in RESERVED_PARAMS}
+                try:
+                    strategy = counting.resolve_strategy(count, default_count)
+                except ValueError as e:
+                    raise QueryParamError(str(e), "INVALID_COUNT")
+                selected = cls.parse_fields(fields_param, column_fields)
+                expand_tree = cls.parse_expand(model, expand) if format == "json" else ()
+                if cursor is not None and search and search_mode == "rank":
+                    raise QueryParamError("search_mode=rank orders by relevance and cannot be combined with cursor pagination")
 
-                # Apply filters
-                query = cls.apply_filters(query, model, filters)
+                # Built with the Query API inside run_sync: a greenlet drives the async driver, so the loop is never blocked
+                def render(session: Session):
+                    query = session.query(model)
+
+                    # Apply filters
+                    query = cls.apply_filters(query, model, filters)
+
+                    # Apply search
+                    query = cls.apply_search(query, model, search, fields, search_mode)
+
+                    # Get total count
+                    total, total_strategy = counting.count_query(
+                        session, query, model.__tablename__, strategy, filters, search, search_mode
+                    )
+
+                    # Conditional GET: the filtered set's latest version plus its total (which catches deletions);
+                    # a matching ETag skips the page entirely. Otherwise the rendered page is hashed.
+                    headers = {}
+                    versioned = version_col is not None and strategy in (counting.EXACT, counting.CACHED) and not expand_tree
+                    if versioned:
+                        latest = query.with_entities(func.max(version_col)).order_by(None).scalar()
+                        etag = conditional.make_etag(
+                            model.__tablename__, latest, total, conditional.request_fingerprint(request)
+                        )
+                        if conditional.etag_matches(request, etag):
+                            return conditional.not_modified(etag)
+                        headers = conditional.validator_headers(etag)
+
+                    if cursor is None:
+                        # Apply sorting
+                        query = cls.apply_sorting(query, model, ordering)
+
+                        # Apply pagination
+                        query = cls.apply_projection(query, model, selected, column_fields)
+                        query = cls.apply_expansion(query, model, expand_tree)
+                        offset = (page - 1) * page_size
+                        records = query.offset(offset).limit(page_size).all()
+                        cls.load_expanded(session, records, model, expand_tree)
+                        pagination = {
+                            "page": page,
+                            "page_size": page_size,
+                            "total": total,
+                            "total_strategy": total_strategy
+                        }
+                    else:
+                        # Keyset pagination: seek on the ordering columns plus the primary key
+                        keyset = cls.parse_ordering(model, ordering)
+                        ordered_keys = {column.key for column, _ in keyset}
+                        keyset += [(getattr(model, key), True) for key in pk_keys if key not in ordered_keys]
+
+                        values, direction = (None, "next")
+                        if cursor:
+                            values, direction = cls.decode_cursor(cursor, keyset, ordering)
+
+                        query = cls.apply_projection(
+                            query, model, selected, column_fields, (column.key for column, _ in keyset)
+                        )
+                        query = cls.apply_expansion(query, model, expand_tree)
+                        records = cls.apply_keyset(query, keyset, values, direction).limit(page_size + 1).all()
+                        has_more = len(records) > page_size
+                        records = records[:page_size]
+                        if direction == "prev":
+                            records.reverse()
+                        cls.load_expanded(session, records, model, expand_tree)
+
+                        next_cursor = prev_cursor = None
+                        if records:
+                            if direction == "prev" or has_more:
+                                next_cursor = cls.encode_cursor(records[-1], keyset, ordering, "next")
+                            if (direction == "next" and values is not None) or (direction == "prev" and has_more):
+                                prev_cursor = cls.encode_cursor(records[0], keyset, ordering, "prev")
+                        pagination = {
+                            "page_size": page_size,
+                            "total": total,
+                            "total_strategy": total_strategy,
+                            "next_cursor": next_cursor,
+                            "prev_cursor": prev_cursor
+                        }
+
+                    # CSV export
+                    if format == "csv":
+                        rows = [{f.name: getattr(record, f.name) for f in selected} for record in records]
+                        csv_data = cls.to_csv(rows, selected)
+                        response = Response(
+                            content=csv_data,
+                            media_type="text/csv",
+                            headers={
+                                **headers,
+                                "Content-Disposition": f"attachment; filename={model.__tablename__}.csv"
+                            }
+                        )
+                    else:
+                        row_serializer = serializer_for(selected, expand_tree)
+                        response = FastJSONResponse({
+                            "status": "success",
+                            "data": [row_serializer(record) for record in records],
+                            "meta": pagination
+                        }, headers=headers)
+                    return response if versioned else conditional.validate_body(request, response)
+
+                return await db.run_sync(render)
+            except QueryParamError as e:
+                raise e.to_http()
+            except Exception as e:
+                raise HTTPException(status_code=500, detail={
+                    "status": "error",
+                    "error": {
+                        "code": "SERVER_ERROR",
+                        "message": str(e)
+                    }
+                })
 
-                # Apply search
-                query = cls.apply_search(query, model, search, fields)
+        @router.get("/export")
+        async def export_records(
+            request: Request,
+            ordering: Optional[str] = Query(None),
+            search: Optional[str] = Query(None),
+            search_mode: str = Query("contains", regex="^(contains|prefix|rank)$"),
+            gzip: bool = Query(False, description="Compress the CSV stream with gzip"),
+            fields_param: Optional[str] = Query(None, alias="fields", description="Comma-separated columns to export"),
+        ):
+            """Stream every record matching the filters as CSV from a server-side cursor"""
+            filters = {k: v for k, v in request.query_params.items() if k not in RESERVED_PARAMS}
+            try:
+                selected = cls.parse_fields(fields_param, column_fields)
+            except QueryParamError as e:
+                raise e.to_http()
 
-                # Apply sorting
+            # The session outlives this handler, so it is owned by the stream rather than get_read_db
+            db = ReadSessionLocal(fresh=wants_fresh_read(request))
+            try:
+                query = db.query(model)
+                query = cls.apply_filters(query, model, filters)
+                query = cls.apply_search(query, model, search, fields, search_mode)
                 query = cls.apply_sorting(query, model, ordering)
+                query = cls.apply_projection(query, model, selected, column_fields)
+                query = cls.apply_expansion(query, model, ())
+                query = query.yield_per(EXPORT_BATCH_SIZE)
+            except QueryParamError as e:
+                db.close()
+                raise e.to_http()
+            except Exception as e:
+                db.close()
+                raise HTTPException(status_code=500, detail={
+                    "status": "error",
+                    "error": {
+                        "code": "SERVER_ERROR",
+                        "message": str(e)
+                    }
+                })
 
-                # Get total count
-                total = query.count()
+            def stream():
+                try:
+                    yield from cls.stream_csv(query, selected, compress=gzip)
+                finally:
+                    db.close()
 
-                # Apply pagination
-                offset = (page - 1) * page_size
-                records = query.offset(offset).limit(page_size).all()
+            filename = f"{model.__tablename__}.csv.gz" if gzip else f"{model.__tablename__}.csv"
+            return StreamingResponse(
+                stream(),
+                media_type="application/gzip" if gzip else "text/csv",
+                headers={
+                    "Content-Disposition": f"attachment; filename={filename}"
+                }
+            )
 
-                # Convert to dict
-                data = []
-                for record in records:
-                    record_dict = {}
-                    for field in fields:
-                        value = getattr(record, field.name, None)
-                        if isinstance(value, datetime):
-                            record_dict[field.name] = value.isoformat()
-                        else:
-                            record_dict[field.name] = value
-                    data.append(record_dict)
-
-                # CSV export
-                if format == "csv":
-                    csv_data = cls.to_csv(data, fields)
-                    return Response(
-                        content=csv_data,
-                        media_type="text/csv",
-                        headers={
-                            "Content-Disposition": f"attachment; filename={model.__tablename__}.csv"
+        @router.get("/aggregate")
+        async def aggregate_records(
+            request: Request,
+            group_by: Optional[str] = Query(None, description="Comma-separated columns to group by"),
+            metrics: str = Query("count", description="Comma-separated metrics: count, count:col, sum:col, avg:col, min:col, max:col"),
+            bucket: Optional[str] = Query(None, description="Time bucket as column:granularity (hour, day, week or month, in IST)"),
+            search: Optional[str] = Query(None),
+            search_mode: str = Query("contains", regex="^(contains|prefix)$"),
+            db: AsyncSession = Depends(get_async_read_db)
+        ):
+            """Summarize the records matching the filters in a single GROUP BY query"""
+            try:
+                filters = {k: v for k, v in request.query_params.items() if k not in RESERVED_PARAMS}
+                group_names = cls.parse_group_by(model, group_by, column_fields)
+                metric_columns = cls.parse_metrics(model, metrics, column_fields)
+
+                def summarize(session: Session):
+                    grouping = [getattr(model, name) for name in group_names]
+                    columns = [getattr(model, name).label(name) for name in group_names]
+                    granularity = None
+                    if bucket:
+                        bucket_expression, granularity = cls.parse_bucket(
+                            model, bucket, column_fields, session.get_bind().dialect.name
+                        )
+                        grouping.append(bucket_expression)
+                        columns.append(bucket_expression.label("bucket"))
+
+                    query = session.query(*columns, *(expression.label(label) for label, expression in metric_columns))
+                    query = query.select_from(model)
+                    query = cls.apply_filters(query, model, filters)
+                    query = cls.apply_search(query, model, search, fields, search_mode)
+                    if grouping:
+                        query = query.group_by(*grouping).order_by(*grouping)
+
+                    rows = query.limit(AGGREGATE_MAX_GROUPS + 1).all()
+                    truncated = len(rows) > AGGREGATE_MAX_GROUPS
+                    data = []
+                    for row in rows[:AGGREGATE_MAX_GROUPS]:
+                        item = row._asdict()
+                        if granularity:
+                            item["bucket"] = timeseries.format_bucket(item["bucket"], granularity)
+                        data.append(item)
+
+                    return FastJSONResponse({
+                        "status": "success",
+                        "data": data,
+                        "meta": {
+                            "group_by": group_names,
+                            "metrics": [label for label, _ in metric_columns],
+                            "bucket": bucket,
+                            "groups": len(data),
+                            "truncated": truncated
                         }
-                    )
+                    })
 
-                return {
-                    "status": "success",
-                    "data": data,
-                    "meta": {
-                        "page": page,
-                        "page_size": page_size,
-                        "total": total
+                return await db.run_sync(summarize)
+            except QueryParamError as e:
+                raise e.to_http()
+            except Exception as e:
+                raise HTTPException(status_code=500, detail={
+                    "status": "error",
+                    "error": {
+                        "code": "SERVER_ERROR",
+                        "message": str(e)
                     }
+                })
+
+        def fetch_batch(db: Session, raw_ids: Iterable[Any], fields_param: Optional[str], expand: Optional[str]) -> FastJSONResponse:
+            pk_filter = filter_engine.get_filter_compiler(model, cls.get_model_fields).fields[primary_key]
+            ids = cls.parse_ids(raw_ids, pk_filter.value)
+            selected = cls.parse_fields(fields_param, column_fields)
+            expand_tree = cls.parse_expand(model, expand)
+            row_serializer = serializer_for(selected, expand_tree)
+            query = cls.apply_projection(db.query(model), model, selected, column_fields, (primary_key,))
+            query = cls.apply_expansion(query, model, expand_tree)
+            pk_column = getattr(model, primary_key)
+
+            found = {}
+            for start in range(0, len(ids), BATCH_CHUNK_SIZE):
+                chunk = ids[start:start + BATCH_CHUNK_SIZE]
+                records = query.filter(pk_column.in_(chunk)).all()
+                cls.load_expanded(db, records, model, expand_tree)
+                for record in records:
+                    found[getattr(record, primary_key)] = row_serializer(record)
+
+            return FastJSONResponse({
+                "status": "success",
+                "data": {str(pk): found[pk] for pk in ids if pk in found},
+                "meta": {
+                    "requested": len(ids),
+                    "found": len(found),
+                    "missing": [pk for pk in ids if pk not in found]
                 }
+            })
+
+        @router.get("/batch")
+        async def get_batch(
+            ids: str = Query(..., description="Comma-separated primary keys"),
+            fields_param: Optional[str] = Query(None, alias="fields", description="Comma-separated columns to return"),
+            expand: Optional[str] = Query(None, description="Comma-separated relationships to include inline (dotted paths allowed)"),
+            db: AsyncSession = Depends(get_async_read_db)
+        ):
+            """Fetch many records by primary key in chunked IN queries"""
+            try:
+                return await db.run_sync(fetch_batch, ids.split(","), fields_param, expand)
+            except QueryParamError as e:
+                raise e.to_http()
+            except Exception as e:
+                raise HTTPException(status_code=500, detail={
+                    "status": "error",
+                    "error": {
+                        "code": "SERVER_ERROR",
+                        "message": str(e)
+                    }
+                })
+
+        @router.post("/batch")
+        async def post_batch(
+            body: BatchRequest,
+            fields_param: Optional[str] = Query(None, alias="fields", description="Comma-separated columns to return"),
+            expand: Optional[str] = Query(None, description="Comma-separated relationships to include inline (dotted paths allowed)"),
+            db: AsyncSession = Depends(get_async_read_db)
+        ):
+            """Fetch many records by primary key; use for id sets too long for a query string"""
+            try:
+                return await db.run_sync(fetch_batch, body.ids, fields_param, expand)
+            except QueryParamError as e:
+                raise e.to_http()
+            except Exception as e:
+                raise HTTPException(status_code=500, detail={
+                    "status": "error",
+                    "error": {
+                        "code": "SERVER_ERROR",
+                        "message": str(e)
+                    }
+                })
+
+        # Bulk writes stay on a sync session (COPY needs the psycopg2 connection) and run in the threadpool
+        async def run_bulk(request: Request, db: Session, key: str, operation: Callable[[List[Any]], Dict[str, Any]]):
+            try:
+                items = bulk.parse_body(await request.body(), request.headers.get("content-type"), key)
+                report = await run_in_threadpool(operation, items)
+                await run_in_threadpool(db.commit)
+                counting.count_cache.invalidate_table(model.__tablename__)
+                return FastJSONResponse({
+                    "status": "success",
+                    "data": report["results"],
+                    "meta": report["summary"]
+                })
+            except bulk.BulkError as e:
+                await run_in_threadpool(db.rollback)
+                raise QueryParamError(str(e), e.code).to_http()
             except Exception as e:
+                await run_in_threadpool(db.rollback)
                 raise HTTPException(status_code=500, detail={
                     "status": "error",
                     "error": {
@@ -282,38 +999,85 @@ class CRUDGenerator:
                     }
                 })
 
+        @router.post("/bulk", dependencies=[Depends(require_admin)])
+        async def bulk_create_records(
+            request: Request,
+            on_conflict: str = Query("error", regex="^(error|ignore|update)$"),
+            conflict_on: Optional[str] = Query(None, description="Unique column(s) that identify a conflict; defaults to the primary key"),
+            method: str = Query("insert", regex="^(insert|copy)$", description="copy uses COPY FROM STDIN (PostgreSQL, on_conflict=error)"),
+            db: Session = Depends(get_db)
+        ):
+            """Create or upsert up to 50k rows (JSON array or NDJSON) and report the outcome of each"""
+            return await run_bulk(
+                request, db, "rows",
+                lambda items: bulk.bulk_create(db, model, items, on_conflict, conflict_on, method)
+            )
+
+        @router.patch("/bulk", dependencies=[Depends(require_admin)])
+        async def bulk_update_records(request: Request, db: Session = Depends(get_db)):
+            """Update up to 50k rows by primary key; each row carries its key plus the columns to change"""
+            return await run_bulk(request, db, "rows", lambda items: bulk.bulk_update(db, model, items))
+
+        @router.post("/bulk/delete", dependencies=[Depends(require_admin)])
+        async def bulk_delete_records(request: Request, db: Session = Depends(get_db)):
+            """Delete up to 50k rows by primary key"""
+            return await run_bulk(request, db, "ids", lambda items: bulk.bulk_delete(db, model, items))
+
         @router.get("/{record_id}")
         async def get_record(
+            request: Request,
             record_id: int,
-            db: Session = Depends(get_db)
+            fields_param: Optional[str] = Query(None, alias="fields", description="Comma-separated columns to return"),
+            expand: Optional[str] = Query(None, description="Comma-separated relationships to include inline (dotted paths allowed)"),
+            db: AsyncSession = Depends(get_async_read_db)
         ):
             """Get a single record by ID"""
             try:
-                record = db.query(model).filter(
-                    getattr(model, primary_key) == record_id
-                ).first()
-
-                if not record:
-                    raise HTTPException(status_code=404, detail={
-                        "status": "error",
-                        "error": {
-                            "code": "NOT_FOUND",
-                            "message": f"{name} not found"
-                        }
-                    })
+                selected = cls.parse_fields(fields_param, column_fields)
+                expand_tree = cls.parse_expand(model, expand)
 
-                record_dict = {}
-                for field in fields:
-                    value = getattr(record, field.name, None)
-                    if isinstance(value, datetime):
-                        record_dict[field.name] = value.isoformat()
-                    else:
-                        record_dict[field.name] = value
+                def load(session: Session):
+                    # Conditional GET: the row's version stamp alone decides whether it changed; without one
+                    # (or with ?expand=, whose rows it does not cover) the rendered record is hashed
+                    headers = {}
+                    versioned = False
+                    if version_col is not None and not expand_tree:
+                        version = session.query(version_col).filter(getattr(model, primary_key) == record_id).first()
+                        if version is not None:
+                            versioned = True
+                            modified = conditional.last_modified(version_col, version[0])
+                            etag = conditional.make_etag(
+                                model.__tablename__, record_id, version[0], conditional.request_fingerprint(request)
+                            )
+                            if conditional.is_fresh(request, etag, modified):
+                                return conditional.not_modified(etag, modified)
+                            headers = conditional.validator_headers(etag, modified)
 
-                return {
-                    "status": "success",
-                    "data": record_dict
-                }
+                    query = cls.apply_projection(session.query(model), model, selected, column_fields)
+                    query = cls.apply_expansion(query, model, expand_tree)
+                    record = query.filter(
+                        getattr(model, primary_key) == record_id
+                    ).first()
+
+                    if not record:
+                        raise HTTPException(status_code=404, detail={
+                            "status": "error",
+                            "error": {
+                                "code": "NOT_FOUND",
+                                "message": f"{name} not found"
+                            }
+                        })
+
+                    cls.load_expanded(session, [record], model, expand_tree)
+                    response = FastJSONResponse({
+                        "status": "success",
+                        "data": serializer_for(selected, expand_tree)(record)
+                    }, headers=headers)
+                    return response if versioned else conditional.validate_body(request, response)
+
+                return await db.run_sync(load)
+            except QueryParamError as e:
+                raise e.to_http()
             except HTTPException:
                 raise
             except Exception as e:
@@ -1,18 +1,22 @@
-
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.sql.dml import UpdateBase
+from typing import AsyncGenerator, Callable, Generator, Optional
 from core.config import settings
+from core.replicas import Replica, ReplicaPool
+from core.instrumentation import instrument_engine
+
+POOL_OPTIONS = dict(pool_size=10, max_overflow=20, pool_timeout=60, pool_recycle=3600)
+
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=60,
-    pool_recycle=3600
-)
+def _create_engine(url: str) -> Engine:
+    return instrument_engine(create_engine(url, pool_pre_ping=True, echo=False, **POOL_OPTIONS))
+
+
+engine = _create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db() -> Generator[Session, None, None]:
@@ -22,3 +26,159 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# Async drivers per backend; the sync DATABASE_URL is translated so one setting configures both engines
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> URL:
+    """Map a sync database URL onto its async driver (asyncpg for Postgres, aiosqlite for SQLite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+
+    query = dict(parsed.query)
+    if backend == "postgresql" and "sslmode" in query:
+        # libpq's sslmode is spelled ssl by asyncpg
+        query["ssl"] = query.pop("sslmode")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend], query=query)
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    async_url = async_database_url(url)
+    # aiosqlite runs on SQLAlchemy's default NullPool, which takes no sizing options
+    pool_options = POOL_OPTIONS if async_url.get_backend_name() != "sqlite" else {}
+    async_engine = create_async_engine(async_url, pool_pre_ping=True, echo=False, **pool_options)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """The shared AsyncEngine, created on first use so sync-only scripts never need the async drivers"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _create_async_engine(settings.DATABASE_URL)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for an async database session; queries await the driver instead of blocking the event loop"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Read replicas (DATABASE_REPLICA_URLS); with none configured, read sessions are plain primary sessions
+FRESH_READ_HEADER = "X-Fresh-Read"
+FRESH_READ_VALUES = {"1", "true", "yes"}
+
+replica_pool: Optional[ReplicaPool] = None
+if settings.DATABASE_REPLICA_URLS:
+    replica_pool = ReplicaPool(
+        [Replica(url, _create_engine, _create_async_engine) for url in settings.DATABASE_REPLICA_URLS],
+        max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+        interval=settings.REPLICA_CHECK_INTERVAL,
+    )
+
+
+class RoutingSession(Session):
+    """Session that sends reads to one replica, pinned for its lifetime, and everything else to the primary
+
+    Writes, flushes and sessions opened with ``info={"fresh": True}`` use the primary; so does
+    every statement after the session's first write, so it reads back what it wrote.
+    """
+
+    def __init__(self, *args, primary: Engine, replica_bind: Callable[[Replica], Engine], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replica_bind = replica_bind
+        self._read_bind: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["fresh"] = True
+        if self.info.get("fresh"):
+            return self.primary
+        if self._read_bind is None:
+            replica = replica_pool.choose()
+            self._read_bind = self.primary if replica is None else self.replica_bind(replica)
+        return self._read_bind
+
+
+_read_session_factory: Optional[sessionmaker] = None
+_async_read_session_factory: Optional[async_sessionmaker] = None
+
+
+def ReadSessionLocal(fresh: bool = False) -> Session:
+    """A session for read-only work: a healthy replica when configured, else (or when fresh) the primary"""
+    global _read_session_factory
+    if replica_pool is None:
+        return SessionLocal()
+    if _read_session_factory is None:
+        _read_session_factory = sessionmaker(
+            class_=RoutingSession, autocommit=False, autoflush=False,
+            primary=engine, replica_bind=lambda replica: replica.engine
+        )
+    return _read_session_factory(info={"fresh": fresh})
+
+
+def AsyncReadSessionLocal(fresh: bool = False) -> AsyncSession:
+    global _async_read_session_factory
+    if replica_pool is None:
+        return AsyncSessionLocal()
+    if _async_read_session_factory is None:
+        _async_read_session_factory = async_sessionmaker(
+            sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+            primary=get_async_engine().sync_engine, replica_bind=lambda replica: replica.async_engine.sync_engine
+        )
+    return _async_read_session_factory(info={"fresh": fresh})
+
+
+def wants_fresh_read(request: Request) -> bool:
+    """Clients send ``X-Fresh-Read: true`` when they must see their own just-committed writes"""
+    return request.headers.get(FRESH_READ_HEADER, "").strip().lower() in FRESH_READ_VALUES
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Dependency for a read-only database session, routed to a replica when one is healthy"""
+    db = ReadSessionLocal(fresh=wants_fresh_read(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of get_read_db"""
+    async with AsyncReadSessionLocal(fresh=wants_fresh_read(request)) as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections; called on application shutdown"""
+    global _async_engine, _async_session_factory, _async_read_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+    _async_read_session_factory = None
+    if replica_pool is not None:
+        for replica in replica_pool.replicas:
+            await replica.dispose_async()
+        replica_pool.stop()
@@ -0,0 +1,221 @@
+"""
+Typed filter engine for auto-CRUD query parameters
+
+Each model gets one ``FilterCompiler``, built on first use from the field list
+``CRUDGenerator.get_model_fields`` produces. It resolves ``field__op`` keys once
+per model, coerces raw query-string values to the column's Python type and emits
+bound-parameter expressions, so identical filter shapes share one entry in
+SQLAlchemy's compiled-statement cache regardless of the values.
+
+Supported operators (``?field__op=value``):
+
+    eq (no suffix), ne, gt, gte, lt, lte   comparison
+    like, ilike                            substring match (string columns)
+    in                                     comma-separated values
+    between                                two comma-separated bounds, inclusive
+    isnull                                 true / false
+"""
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from sqlalchemy import inspect
+
+from core.search import escape_like
+
+TRUE_VALUES = {"true", "1", "yes", "on"}
+FALSE_VALUES = {"false", "0", "no", "off"}
+
+OPERATORS = ("eq", "ne", "gt", "gte", "lt", "lte", "like", "ilike", "in", "isnull", "between")
+TEXT_OPERATORS = {"like", "ilike"}
+ORDERED_OPERATORS = {"gt", "gte", "lt", "lte", "between"}
+
+
+class FilterError(ValueError):
+    """Raised for unknown filter fields, unsupported operators or values that do not fit the column"""
+
+
+def parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f"expected true or false, got '{value}'")
+
+
+def _parse_decimal(value: str) -> Decimal:
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"expected a number, got '{value}'")
+    if not number.is_finite():
+        raise ValueError(f"expected a finite number, got '{value}'")
+    return number
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+
+
+def _parse_date(value: str) -> date:
+    return _parse_datetime(value).date()
+
+
+def _coercer_for(column, choices: Optional[List[str]]) -> Tuple[Callable[[str], Any], bool]:
+    """Return (coerce, ordered) for a column; ordered types accept range operators"""
+    if choices:
+        allowed = set(choices)
+
+        def coerce_choice(value: str) -> str:
+            if value not in allowed:
+                raise ValueError(f"expected one of {', '.join(choices)}")
+            return value
+        return coerce_choice, False
+
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = None
+
+    if python_type is bool:
+        return parse_bool, False
+    if python_type is int:
+        return int, True
+    if python_type is float:
+        return float, True
+    if python_type is Decimal:
+        return _parse_decimal, True
+    if python_type is datetime:
+        return _parse_datetime, True
+    if python_type is date:
+        return _parse_date, True
+    if python_type is time:
+        return time.fromisoformat, True
+    if python_type is UUID:
+        return UUID, False
+    if python_type is str:
+        return str, True
+    # JSON, binary and other opaque columns only support isnull
+    return None, False
+
+
+class FieldFilter:
+    """Precompiled filter information for one column"""
+
+    __slots__ = ("name", "attribute", "coerce", "ordered", "textual")
+
+    def __init__(self, name: str, attribute, coerce: Optional[Callable[[str], Any]], ordered: bool, textual: bool):
+        self.name = name
+        self.attribute = attribute
+        self.coerce = coerce
+        self.ordered = ordered
+        self.textual = textual
+
+    def value(self, raw: str) -> Any:
+        try:
+            return self.coerce(raw)
+        except (TypeError, ValueError) as e:
+            raise FilterError(f"Invalid value for '{self.name}': {e}")
+
+    def values(self, raw: str) -> List[Any]:
+        return [self.value(part.strip()) for part in raw.split(",") if part.strip()]
+
+    def build(self, op: str, raw: str):
+        if op == "isnull":
+            try:
+                is_null = parse_bool(raw)
+            except ValueError as e:
+                raise FilterError(f"Invalid value for '{self.name}__isnull': {e}")
+            return self.attribute.is_(None) if is_null else self.attribute.is_not(None)
+
+        if self.coerce is None:
+            raise FilterError(f"Field '{self.name}' only supports the isnull operator")
+        if op in TEXT_OPERATORS and not self.textual:
+            raise FilterError(f"Operator '{op}' is only supported on text fields, not '{self.name}'")
+        if op in ORDERED_OPERATORS and not self.ordered:
+            raise FilterError(f"Operator '{op}' is not supported on field '{self.name}'")
+
+        if op == "eq":
+            return self.attribute == self.value(raw)
+        if op == "ne":
+            return self.attribute != self.value(raw)
+        if op == "gt":
+            return self.attribute > self.value(raw)
+        if op == "gte":
+            return self.attribute >= self.value(raw)
+        if op == "lt":
+            return self.attribute < self.value(raw)
+        if op == "lte":
+            return self.attribute <= self.value(raw)
+        if op == "like":
+            return self.attribute.like(f"%{escape_like(raw)}%", escape="\\")
+        if op == "ilike":
+            return self.attribute.ilike(f"%{escape_like(raw)}%", escape="\\")
+        if op == "in":
+            values = self.values(raw)
+            if not values:
+                raise FilterError(f"'{self.name}__in' needs at least one value")
+            return self.attribute.in_(values)
+        # between
+        bounds = self.values(raw)
+        if len(bounds) != 2:
+            raise FilterError(f"'{self.name}__between' needs exactly two comma-separated values")
+        return self.attribute.between(bounds[0], bounds[1])
+
+
+class FilterCompiler:
+    """Resolves query-string filters for one model into SQL expressions"""
+
+    def __init__(self, model: Type, fields: List[Any]):
+        mapper = inspect(model)
+        self.model = model
+        self.fields: Dict[str, FieldFilter] = {}
+
+        for field in fields:
+            if field.type == "relationship" or field.name not in mapper.columns:
+                continue
+            attribute = getattr(model, field.name, None)
+            if attribute is None:
+                continue
+            column = mapper.columns[field.name]
+            coerce, ordered = _coercer_for(column, field.choices)
+            self.fields[field.name] = FieldFilter(
+                field.name, attribute, coerce, ordered, textual=field.type in ("string", "text") and coerce is str
+            )
+
+        # Every accepted query key resolved up front: "amount__gte" -> (field, "gte")
+        self.keys: Dict[str, Tuple[FieldFilter, str]] = {}
+        for name, field_filter in self.fields.items():
+            self.keys[name] = (field_filter, "eq")
+            for op in OPERATORS:
+                self.keys[f"{name}__{op}"] = (field_filter, op)
+
+    def compile(self, filters: Dict[str, Any]) -> list:
+        """Turn a {query key: raw value} mapping into a list of filter clauses"""
+        clauses = []
+        for key, value in filters.items():
+            if value is None or value == "":
+                continue
+            resolved = self.keys.get(key)
+            if resolved is None:
+                raise FilterError(f"Unknown filter '{key}'")
+            field_filter, op = resolved
+            clauses.append(field_filter.build(op, value if isinstance(value, str) else ",".join(map(str, value))))
+        return clauses
+
+    def apply(self, query, filters: Dict[str, Any]):
+        clauses = self.compile(filters)
+        return query.filter(*clauses) if clauses else query
+
+
+_compilers: Dict[Type, FilterCompiler] = {}
+
+
+def get_filter_compiler(model: Type, describe: Callable[[Type], List[Any]]) -> FilterCompiler:
+    """The model's FilterCompiler, built from ``describe(model)`` on first use"""
+    compiler = _compilers.get(model)
+    if compiler is None:
+        compiler = _compilers[model] = FilterCompiler(model, describe(model))
+    return compiler
@@ -0,0 +1,254 @@
+"""
+Per-request SQL instrumentation, N+1 detection and Prometheus metrics
+
+``instrument_engine`` hooks ``before/after_cursor_execute`` on an engine; while a
+request is in flight, every statement it runs is added to that request's
+``RequestStats`` (held in a context variable, so it follows the request into
+run_sync greenlets and threadpool dependencies). ``SQLInstrumentationMiddleware``
+opens the stats, adds a ``Server-Timing`` header to the response and feeds the
+per-route histograms rendered by ``render_metrics`` for ``GET /metrics``.
+
+A statement fingerprint is its SQL text with whitespace normalized and literals
+and IN-lists collapsed, so the same query with different parameters counts as a
+repeat. A fingerprint repeated ``SQL_N_PLUS_ONE_THRESHOLD`` times or more in one
+request is reported as a likely N+1.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+|'(?:[^']|'')*'|-?\d+(?:\.\d+)?)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b-?\d+(?:\.\d+)?\b")
+
+
+def fingerprint(statement: str) -> str:
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _IN_LIST.sub("(?)", normalized)
+    return _LITERAL.sub("?", normalized)
+
+
+class RequestStats:
+    """SQL executed on behalf of one request"""
+
+    __slots__ = ("queries", "db_time", "slowest_time", "slowest_statement", "fingerprints")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints executed at least ``threshold`` times, most frequent first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_instrumentation_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Attach the cursor hooks to a sync engine (pass ``AsyncEngine.sync_engine`` for async ones)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """A labelled Prometheus histogram with cumulative buckets"""
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...], labels: Tuple[str, ...] = ("method", "route")):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, (list(buckets), total, count)) for labels, (buckets, total, count) in self._series.items())
+        for label_values, (bucket_counts, total, count) in series:
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                labels = _format_labels(self.labels, label_values, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CounterMetric:
+    """A labelled Prometheus counter"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ("method", "route")):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body, per route",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements executed per request, per route",
+    (0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000),
+)
+DB_TIME = Histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL per request, per route",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+N_PLUS_ONE = CounterMetric(
+    "db_n_plus_one_requests_total", "Requests that repeated one statement at least SQL_N_PLUS_ONE_THRESHOLD times",
+)
+METRICS = [REQUEST_DURATION, DB_QUERIES, DB_TIME, N_PLUS_ONE]
+
+METRICS_PATH = "/metrics"
+UNMATCHED_ROUTE = "unmatched"
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+
+def _finish(method: str, route: str, stats: RequestStats, elapsed: float) -> None:
+    labels = (method, route)
+    REQUEST_DURATION.observe(labels, elapsed)
+    DB_QUERIES.observe(labels, stats.queries)
+    DB_TIME.observe(labels, stats.db_time)
+
+    repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+    if repeated:
+        N_PLUS_ONE.inc(labels)
+        statement, count = repeated[0]
+        logger.warning(
+            "Possible N+1 on %s %s: %d queries, one statement repeated %d times: %s",
+            method, route, stats.queries, count, statement[:500],
+        )
+    if stats.slowest_statement is not None:
+        logger.debug(
+            "%s %s: %d queries in %.1f ms, slowest %.1f ms: %s",
+            method, route, stats.queries, stats.db_time * 1000, stats.slowest_time * 1000,
+            stats.slowest_statement[:500],
+        )
+
+
+class SQLInstrumentationMiddleware:
+    """ASGI middleware that opens per-request SQL stats and reports them"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing(stats, time.perf_counter() - started).encode("latin-1")
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            _finish(scope["method"], route, stats, time.perf_counter() - started)
@@ -0,0 +1,143 @@
+"""
+Queued, leveled logging for the API process
+
+``setup_logging`` puts a single ``QueueHandler`` on the root logger. Request
+threads and the event loop only enqueue records; a ``QueueListener`` thread
+formats them (JSON by default) and does the blocking writes. Levels come from
+``Settings``: ``LOG_LEVEL`` for the root, ``LOG_LEVELS`` for per-module overrides,
+e.g. ``LOG_LEVELS='{"core.auth": "DEBUG", "sqlalchemy.engine": "WARNING"}'``.
+
+DEBUG records are sampled: each call site (logger + message template) may emit
+``LOG_DEBUG_RATE_LIMIT`` records per ``LOG_DEBUG_RATE_WINDOW`` seconds; the rest
+are dropped before they are queued, and the next emitted record carries the
+number dropped as ``sampled_out``.
+
+``token=`` query parameters (the WebSocket feed authenticates that way, and
+uvicorn logs the full path) are redacted from every message.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from core.config import settings
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+_TOKEN_PARAM = re.compile(r"([?&]token=)[^&\s\"']+")
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, any ``extra`` fields and the exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Rate-limits DEBUG records per call site; other levels always pass"""
+
+    def __init__(self, limit: int, window: float):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._sites: Dict[Tuple[str, object], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                dropped = site[2] if site else 0
+                site = self._sites[key] = [now, 0, 0]
+                if dropped:
+                    record.sampled_out = dropped
+            if site[1] >= self.limit:
+                site[2] += 1
+                return False
+            site[1] += 1
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Keeps exc_info as text but leaves message formatting to the listener's formatter"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = _TOKEN_PARAM.sub(r"\1[redacted]", record.getMessage())
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def setup_logging() -> None:
+    """Route all logging through one queue; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(DebugSampler(settings.LOG_DEBUG_RATE_LIMIT, settings.LOG_DEBUG_RATE_WINDOW))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    # uvicorn installs its own stream handlers; send its records through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
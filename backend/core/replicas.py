@@ -0,0 +1,151 @@
+"""
+Read-replica pool: health-checked round-robin with a replication-lag guard
+
+Replicas come from ``DATABASE_REPLICA_URLS``. A daemon thread probes each one
+every ``REPLICA_CHECK_INTERVAL`` seconds. A replica that fails its probe, or
+whose replay lags the primary by more than ``REPLICA_MAX_LAG_SECONDS``, is
+skipped until a later probe passes; with no eligible replica, reads fall back
+to the primary. Replicas start ineligible, so reads stay on the primary until
+the first probe has run.
+
+Lag is measured on PostgreSQL from ``pg_last_xact_replay_timestamp()``; other
+dialects (e.g. two local SQLite files) report no replication and a lag of 0.
+"""
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, make_url
+
+# Seconds the replica's replay is behind; 0 when it is caught up or is not a standby at all
+LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT CASE"
+        " WHEN NOT pg_is_in_recovery() THEN 0"
+        " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+        " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+        " END"
+    ),
+}
+PING_QUERY = text("SELECT 1")
+
+
+class Replica:
+    """One replica URL with its lazily created engines and last probe result"""
+
+    def __init__(self, url: str, engine_factory: Callable[[str], Engine], async_engine_factory: Callable[[str], object]):
+        self.url = url
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self._engine_factory = engine_factory
+        self._async_engine_factory = async_engine_factory
+        self._engine: Optional[Engine] = None
+        self._async_engine = None
+        self._lock = threading.Lock()
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._engine_factory(self.url)
+        return self._engine
+
+    @property
+    def async_engine(self):
+        if self._async_engine is None:
+            with self._lock:
+                if self._async_engine is None:
+                    self._async_engine = self._async_engine_factory(self.url)
+        return self._async_engine
+
+    def dispose(self) -> None:
+        if self._engine is not None:
+            self._engine.dispose()
+
+    async def dispose_async(self) -> None:
+        engine, self._async_engine = self._async_engine, None
+        if engine is not None:
+            await engine.dispose()
+
+    def check(self, max_lag: float) -> None:
+        try:
+            with self.engine.connect() as conn:
+                query = LAG_QUERIES.get(conn.dialect.name)
+                if query is None:
+                    conn.execute(PING_QUERY)
+                    lag = 0.0
+                else:
+                    lag = float(conn.execute(query).scalar() or 0)
+        except Exception as e:
+            self.healthy, self.lag, self.error = False, None, str(e)
+        else:
+            self.lag, self.error = lag, None
+            self.healthy = lag <= max_lag
+        self.checked_at = time.time()
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "replica": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at,
+        }
+
+
+class ReplicaPool:
+    """Round-robin over the replicas whose last probe passed"""
+
+    def __init__(self, replicas: List[Replica], max_lag: float, interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.interval = interval
+        self._cycle = itertools.cycle(replicas)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+
+    def choose(self) -> Optional[Replica]:
+        """The next eligible replica, or None when reads should go to the primary"""
+        self.start()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica.healthy:
+                    return replica
+        return None
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+
+    def start(self) -> None:
+        if self._checker is not None or not self.replicas:
+            return
+        with self._lock:
+            if self._checker is None:
+                self._stop.clear()
+                self._checker = threading.Thread(target=self._run, name="replica-health", daemon=True)
+                self._checker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        checker, self._checker = self._checker, None
+        if checker is not None:
+            checker.join(timeout=self.interval + 1)
+        for replica in self.replicas:
+            replica.dispose()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check_all()
+            self._stop.wait(self.interval)
+
+    def status(self) -> List[Dict[str, object]]:
+        return [replica.status() for replica in self.replicas]
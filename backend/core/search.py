@@ -0,0 +1,258 @@
+"""
+Indexed search for auto-CRUD listings
+
+Models opt in by declaring ``__searchable__ = ("column", ...)`` (string columns).
+
+* Postgres: every searchable column gets a pg_trgm GIN index, which serves the
+  substring ("contains") search, and the model gets one GIN expression index over
+  a 'simple' tsvector of all searchable columns for "prefix" and "rank" searches.
+* SQLite: an FTS5 shadow table with the trigram tokenizer, kept in sync by
+  triggers, serves all three modes.
+
+Models without ``__searchable__`` keep the legacy LIKE scan over every text column.
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import Integer, desc, inspect, literal_column, or_, and_, func, select, table, column, text
+from sqlalchemy.engine import Engine
+
+from core.base import Base
+
+SEARCH_MODES = ("contains", "prefix", "rank")
+
+TS_CONFIG = literal_column("'simple'::regconfig")
+EMPTY_TEXT = literal_column("''")
+SPACE_TEXT = literal_column("' '")
+
+# The SQLite trigram tokenizer cannot match terms shorter than three characters
+MIN_TRIGRAM_LENGTH = 3
+
+# Tables whose search index was verified or built by ensure_search_indexes, by dialect
+_ready_tables: Dict[str, str] = {}
+
+
+def searchable_columns(model: Type) -> List[str]:
+    """Columns a model declares as searchable (empty when it has not opted in)"""
+    return list(getattr(model, "__searchable__", ()))
+
+
+def _index_name(table_name: str, suffix: str) -> str:
+    name = f"ix_{table_name}_{suffix}".lower()
+    if len(name) <= 63:
+        return name
+    digest = hashlib.md5(name.encode()).hexdigest()[:8]
+    return f"{name[:54]}_{digest}"
+
+
+def _fts_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _words(term: str) -> List[str]:
+    return re.findall(r"\w+", term)
+
+
+def tsvector(model: Type):
+    """The tsvector expression indexed on Postgres; queries must use it verbatim to hit the index"""
+    document = None
+    for name in searchable_columns(model):
+        part = func.coalesce(getattr(model, name), EMPTY_TEXT)
+        document = part if document is None else document.op("||")(SPACE_TEXT).op("||")(part)
+    return func.to_tsvector(TS_CONFIG, document)
+
+
+# ============================= INDEX MAINTENANCE =============================
+
+def _ensure_postgres(conn, model: Type) -> None:
+    quote = conn.dialect.identifier_preparer.quote
+    table_name = model.__tablename__
+    columns = searchable_columns(model)
+
+    for name in columns:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {quote(_index_name(table_name, name + '_trgm'))} "
+            f"ON {quote(table_name)} USING gin ({quote(name)} gin_trgm_ops)"
+        ))
+
+    document = " || ' ' || ".join(f"coalesce({quote(name)}, '')" for name in columns)
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {quote(_index_name(table_name, 'search_tsv'))} "
+        f"ON {quote(table_name)} USING gin (to_tsvector('simple'::regconfig, {document}))"
+    ))
+
+
+def _ensure_sqlite(conn, model: Type) -> bool:
+    mapper = inspect(model)
+    if len(mapper.primary_key) != 1 or not isinstance(mapper.primary_key[0].type, Integer):
+        # FTS5 external content tables are keyed by an integer rowid
+        return False
+
+    quote = conn.dialect.identifier_preparer.quote
+    table_name = model.__tablename__
+    fts_name = _fts_name(table_name)
+    pk = quote(mapper.primary_key[0].name)
+    columns = [quote(name) for name in searchable_columns(model)]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+
+    expected_sql = (
+        f"CREATE VIRTUAL TABLE {quote(fts_name)} USING fts5({column_list}, "
+        f"content={quote(table_name)}, content_rowid={pk}, tokenize='trigram')"
+    )
+    existing_sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts_name}
+    ).scalar()
+    if existing_sql == expected_sql:
+        return True
+
+    # Missing, or built for a different column list: recreate and repopulate
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {quote(f'{fts_name}_{suffix}')}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {quote(fts_name)}"))
+    conn.execute(text(expected_sql))
+    conn.execute(text(
+        f"CREATE TRIGGER {quote(f'{fts_name}_ai')} AFTER INSERT ON {quote(table_name)} BEGIN "
+        f"INSERT INTO {quote(fts_name)}(rowid, {column_list}) VALUES (new.{pk}, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {quote(f'{fts_name}_ad')} AFTER DELETE ON {quote(table_name)} BEGIN "
+        f"INSERT INTO {quote(fts_name)}({quote(fts_name)}, rowid, {column_list}) "
+        f"VALUES ('delete', old.{pk}, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {quote(f'{fts_name}_au')} AFTER UPDATE ON {quote(table_name)} BEGIN "
+        f"INSERT INTO {quote(fts_name)}({quote(fts_name)}, rowid, {column_list}) "
+        f"VALUES ('delete', old.{pk}, {old_values}); "
+        f"INSERT INTO {quote(fts_name)}(rowid, {column_list}) VALUES (new.{pk}, {new_values}); END"
+    ))
+    conn.execute(text(f"INSERT INTO {quote(fts_name)}({quote(fts_name)}) VALUES ('rebuild')"))
+    return True
+
+
+def ensure_search_indexes(engine: Engine) -> List[str]:
+    """Create (idempotently) the search indexes for every model declaring __searchable__"""
+    dialect = engine.dialect.name
+    models = [mapper.class_ for mapper in Base.registry.mappers if searchable_columns(mapper.class_)]
+    built = []
+
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+        for model in models:
+            if dialect == "postgresql":
+                _ensure_postgres(conn, model)
+            elif dialect == "sqlite":
+                if not _ensure_sqlite(conn, model):
+                    continue
+            else:
+                continue
+            _ready_tables[model.__tablename__] = dialect
+            built.append(model.__tablename__)
+
+    return built
+
+
+# ============================= QUERYING =============================
+
+def _like_any(columns, term: str):
+    pattern = f"%{escape_like(term)}%"
+    return or_(*(col.like(pattern, escape="\\") for col in columns))
+
+
+def _word_prefix_all(columns, words: List[str]):
+    """Every word must start a word in at least one column"""
+    conditions = []
+    for word in words:
+        escaped = escape_like(word)
+        conditions.append(or_(*(
+            or_(col.like(f"{escaped}%", escape="\\"), col.like(f"% {escaped}%", escape="\\"))
+            for col in columns
+        )))
+    return and_(*conditions)
+
+
+def _fts_match(model: Type, match: str):
+    fts_name = _fts_name(model.__tablename__)
+    fts = table(fts_name, column("rowid"))
+    return fts, literal_column(f'"{fts_name}"').op("MATCH")(match)
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _search_postgres(query, model: Type, term: str, mode: str):
+    columns = [getattr(model, name) for name in searchable_columns(model)]
+
+    if mode == "contains":
+        return query.filter(_like_any(columns, term))
+
+    words = _words(term)
+    if not words:
+        return query.filter(_like_any(columns, term))
+
+    document = tsvector(model)
+    if mode == "prefix":
+        ts_query = func.to_tsquery(TS_CONFIG, " & ".join(f"{word}:*" for word in words))
+        return query.filter(document.op("@@")(ts_query))
+
+    ts_query = func.plainto_tsquery(TS_CONFIG, term)
+    return query.filter(document.op("@@")(ts_query)).order_by(desc(func.ts_rank(document, ts_query)))
+
+
+def _search_sqlite(query, model: Type, term: str, mode: str):
+    columns = [getattr(model, name) for name in searchable_columns(model)]
+    pk = inspect(model).primary_key[0]
+
+    if mode == "prefix":
+        words = _words(term)
+        if not words:
+            return query.filter(_like_any(columns, term))
+        long_words = [word for word in words if len(word) >= MIN_TRIGRAM_LENGTH]
+        if long_words:
+            fts, match = _fts_match(model, " ".join(_fts_phrase(word) for word in long_words))
+            query = query.filter(pk.in_(select(fts.c.rowid).where(match)))
+        return query.filter(_word_prefix_all(columns, words))
+
+    if len(term) < MIN_TRIGRAM_LENGTH:
+        return query.filter(_like_any(columns, term))
+
+    fts, match = _fts_match(model, _fts_phrase(term))
+    if mode == "contains":
+        return query.filter(pk.in_(select(fts.c.rowid).where(match)))
+
+    ranked = select(fts.c.rowid, func.bm25(literal_column(f'"{fts.name}"')).label("score")).where(match).subquery()
+    return query.join(ranked, ranked.c.rowid == pk).order_by(ranked.c.score)
+
+
+def apply_search(query, model: Type, term: Optional[str], mode: str, fallback_columns: List[str]):
+    """Filter (and for mode=rank, order) a query by a free-text search term"""
+    if not term:
+        return query
+
+    if not searchable_columns(model):
+        columns = [getattr(model, name) for name in fallback_columns if hasattr(model, name)]
+        if not columns:
+            return query
+        return query.filter(or_(*(col.like(f"%{term}%") for col in columns)))
+
+    dialect = query.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return _search_postgres(query, model, term, mode)
+    if dialect == "sqlite" and _ready_tables.get(model.__tablename__) == "sqlite":
+        return _search_sqlite(query, model, term, mode)
+
+    columns = [getattr(model, name) for name in searchable_columns(model)]
+    if mode == "prefix":
+        words = _words(term)
+        if words:
+            return query.filter(_word_prefix_all(columns, words))
+    return query.filter(_like_any(columns, term))
@@ -0,0 +1,146 @@
+"""
+Precompiled row serializers and a fast JSON response for auto-CRUD endpoints
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from uuid import UUID
+import json
+
+from fastapi import Response
+from sqlalchemy import inspect
+
+RowSerializer = Callable[[Any], Dict[str, Any]]
+
+
+def _decimal(value: Decimal):
+    # Same rule as FastAPI's jsonable_encoder: integral decimals become ints
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+def _isoformat(value) -> str:
+    return value.isoformat()
+
+
+def _enum(value: Enum):
+    return value.value
+
+
+def _text(value) -> str:
+    return str(value)
+
+
+# Checked in order, so datetime must come before its base class date
+_CONVERTERS = (
+    (datetime, _isoformat),
+    (date, _isoformat),
+    (time, _isoformat),
+    (Decimal, _decimal),
+    (UUID, _text),
+    (Enum, _enum),
+)
+
+
+def _converter_for(column) -> Optional[Callable[[Any], Any]]:
+    """Pick the conversion for a column once, from its declared Python type"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+
+    for base, converter in _CONVERTERS:
+        if isinstance(python_type, type) and issubclass(python_type, base):
+            return converter
+    return None
+
+
+@lru_cache(maxsize=512)
+def get_row_serializer(model: Type, names: Tuple[str, ...]) -> RowSerializer:
+    """Build (once per model and column set) a function turning an ORM row into a JSON-ready dict"""
+    columns = {column.name: column for column in inspect(model).columns}
+    getter = attrgetter(*names) if names else None
+    single = len(names) == 1
+    converted = tuple(
+        (name, converter)
+        for name in names
+        if (converter := _converter_for(columns[name])) is not None
+    )
+
+    def serialize(record) -> Dict[str, Any]:
+        if getter is None:
+            return {}
+        values = getter(record)
+        row = dict(zip(names, (values,) if single else values))
+        for name, converter in converted:
+            value = row[name]
+            if value is not None:
+                row[name] = converter(value)
+        return row
+
+    return serialize
+
+
+# Relationships to serialize inline: ((key, nested tree), ...)
+ExpandTree = Tuple[Tuple[str, "ExpandTree"], ...]
+
+
+def column_names(model: Type) -> Tuple[str, ...]:
+    return tuple(column.name for column in inspect(model).columns)
+
+
+@lru_cache(maxsize=512)
+def get_expanded_serializer(model: Type, names: Tuple[str, ...], expand: ExpandTree, max_rows: int) -> RowSerializer:
+    """Row serializer that also inlines the expanded relationships, at most max_rows per collection"""
+    serialize_row = get_row_serializer(model, names)
+    if not expand:
+        return serialize_row
+
+    relationships = inspect(model).relationships
+    nested = []
+    for key, subtree in expand:
+        relationship = relationships[key]
+        target = relationship.mapper.class_
+        nested.append((
+            key,
+            relationship.uselist,
+            get_expanded_serializer(target, column_names(target), subtree, max_rows),
+        ))
+
+    def serialize(record) -> Dict[str, Any]:
+        row = serialize_row(record)
+        for key, uselist, serialize_child in nested:
+            value = getattr(record, key)
+            if uselist:
+                row[key] = [serialize_child(child) for child in value[:max_rows]]
+            else:
+                row[key] = serialize_child(value) if value is not None else None
+        return row
+
+    return serialize
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values a precompiled serializer did not anticipate (e.g. inside JSON columns)"""
+    for base, converter in _CONVERTERS:
+        if isinstance(value, base):
+            return converter(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(Response):
+    """JSON response for payloads that are already JSON-ready; bypasses jsonable_encoder"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_default,
+        ).encode("utf-8")
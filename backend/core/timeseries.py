@@ -0,0 +1,117 @@
+"""
+Time bucketing in IST for aggregate queries
+
+Buckets are computed in the database so grouping stays a single query:
+
+* Postgres: ``date_trunc`` on the value converted to Asia/Kolkata wall time.
+* SQLite: ``strftime``/``date`` on the stored text, which is the wall time the
+  value was written in, shifted by +05:30 unless that was already IST.
+
+The zone a column is written in is not implied by ``timezone=True`` (payment
+and service request timestamps are aware columns defaulting to
+``datetime.utcnow``). ``stored_zone`` takes it from the column's
+``info={"stored_zone": "IST"}`` / ``"UTC"`` when declared, else from its
+default: IST for ``get_ist_time``, UTC for anything else or no default. On
+Postgres it only matters for naive columns; aware ones hold instants.
+
+Weeks start on Monday, matching Postgres ``date_trunc('week', ...)``.
+"""
+from datetime import date, datetime, timezone
+from typing import Any
+
+from sqlalchemy import func, literal_column
+
+from core.base import IST, get_ist_time
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+TIMEZONE = IST.zone
+IST_OFFSET_MODIFIER = "+330 minutes"
+
+# Inlined rather than bound, so the SELECT and GROUP BY copies of a bucket are the same expression
+# even under drivers that use server-side parameters
+TIMEZONE_SQL = literal_column(f"'{TIMEZONE}'")
+UTC_SQL = literal_column("'UTC'")
+
+
+STORED_ZONES = ("IST", "UTC")
+
+
+def _is_timezone_aware(column) -> bool:
+    return bool(getattr(column.type, "timezone", False))
+
+
+def stored_zone(column) -> str:
+    """``"IST"`` or ``"UTC"``: the wall time the column's values are written in"""
+    column = getattr(column, "expression", column)
+    declared = column.info.get("stored_zone")
+    if declared is not None:
+        if declared not in STORED_ZONES:
+            raise ValueError(f"{column}: stored_zone must be one of {', '.join(STORED_ZONES)}")
+        return declared
+    default = getattr(column, "default", None)
+    function = getattr(default, "arg", None)
+    # SQLAlchemy wraps callable defaults to accept the execution context
+    if getattr(function, "__wrapped__", function) is get_ist_time:
+        return "IST"
+    return "UTC"
+
+
+def to_ist(column, dialect: str):
+    """The column's value as IST wall-clock time, in the dialect's native representation"""
+    ist = stored_zone(column) == "IST"
+    if dialect == "postgresql":
+        if _is_timezone_aware(column):
+            return func.timezone(TIMEZONE_SQL, column)
+        if ist:
+            return column
+        return func.timezone(TIMEZONE_SQL, func.timezone(UTC_SQL, column))
+    if ist:
+        return func.datetime(column)
+    return func.datetime(column, IST_OFFSET_MODIFIER)
+
+
+def bucket_expression(column, granularity: str, dialect: str):
+    """Truncate a timestamp column to the start of its IST hour/day/week/month"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}")
+
+    local = to_ist(column, dialect)
+    if dialect == "postgresql":
+        return func.date_trunc(literal_column(f"'{granularity}'"), local)
+
+    if granularity == "hour":
+        return func.strftime("%Y-%m-%d %H:00:00", local)
+    if granularity == "day":
+        return func.date(local)
+    if granularity == "week":
+        # 'weekday 0' moves forward to Sunday; six days back is that week's Monday
+        return func.date(local, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", local)
+
+
+def format_bucket(value: Any, granularity: str) -> Any:
+    """Render a bucket value identically across dialects: ISO date, or ISO datetime for hours"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if granularity == "hour":
+            return value.replace(minute=0, second=0, microsecond=0, tzinfo=None).isoformat()
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def column_bound(moment: datetime, column, dialect: str) -> datetime:
+    """An aware instant as a literal comparable with the column's stored values, for sargable range filters
+
+    Mirrors ``to_ist``: Postgres aware columns compare instants; otherwise the
+    bound is the wall time in the column's ``stored_zone``.
+    """
+    if dialect == "postgresql" and _is_timezone_aware(column):
+        return moment
+    zone = IST if stored_zone(column) == "IST" else timezone.utc
+    return moment.astimezone(zone).replace(tzinfo=None)
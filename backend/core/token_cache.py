@@ -0,0 +1,190 @@
+"""
+Verified-token cache and revocation list for JWT auth
+
+Both are keyed by ``token_digest`` (SHA-256 of the raw JWT), so tokens are never
+kept in memory or written to the database as-is.
+
+``VerifiedTokenCache`` is a bounded LRU of tokens whose signature has already
+been checked; an entry expires with the token's own ``exp``, so a cache hit can
+never outlive the JWT. Dashboard refreshes fire several parallel calls with
+the same bearer, and only the first pays for ``jwt.decode``.
+
+``RevocationList`` is the in-memory set of logged-out tokens, consulted before
+the cache on every request without touching the database. ``revoke`` also
+inserts a ``revoked_tokens`` row (``TOKEN_REVOCATION_PERSIST``); every worker
+reloads the unexpired rows from the primary every
+``TOKEN_REVOCATION_SYNC_INTERVAL`` seconds, so a logout handled by one uvicorn
+worker is enforced by all of them within that interval.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from core.instrumentation import METRICS, CounterMetric
+from models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_LOOKUPS = CounterMetric(
+    "auth_token_cache_total", "Verified-token cache lookups by result (hit, miss, revoked)", labels=("result",),
+)
+METRICS.append(TOKEN_CACHE_LOOKUPS)
+
+# Expired revocations are deleted from the table at most this often (per worker)
+PURGE_INTERVAL = 300.0
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of digest -> verified claims, each entry valid until the token's exp"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[digest]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        TOKEN_CACHE_LOOKUPS.inc(("miss" if entry is None else "hit",))
+        return None if entry is None else entry[1]
+
+    def put(self, digest: str, expires_at: float, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (expires_at, value)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest: str) -> None:
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevocationList:
+    """Logged-out token digests, mirrored from the revoked_tokens table by a daemon thread"""
+
+    def __init__(self, session_factory: Callable[[], Session], persist: bool, interval: float):
+        self._session_factory = session_factory
+        self.persist = persist
+        self.interval = interval
+        # digest -> exp (epoch seconds); replaced wholesale by each sync
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        self._purged_at = 0.0
+        self.synced_at: Optional[float] = None
+
+    def is_revoked(self, digest: str) -> bool:
+        self.start()
+        expires_at = self._revoked.get(digest)
+        if expires_at is None:
+            return False
+        TOKEN_CACHE_LOOKUPS.inc(("revoked",))
+        return True
+
+    def revoke(self, digest: str, expires_at: float, username: str, token_type: str) -> None:
+        """Revoke locally at once and, when persisting, record it for the other workers (one INSERT)"""
+        with self._lock:
+            self._revoked[digest] = expires_at
+        if not self.persist:
+            return
+        with self._session_factory() as db:
+            db.add(RevokedToken(
+                token_digest=digest,
+                username=username,
+                token_type=token_type,
+                expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # already revoked by another request
+
+    def sync(self) -> None:
+        """Reload the unexpired revocations; the table only ever holds tokens that are still valid JWTs"""
+        now = datetime.now(timezone.utc)
+        with self._session_factory() as db:
+            rows = db.execute(
+                select(RevokedToken.token_digest, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+            ).all()
+            if time.time() - self._purged_at >= PURGE_INTERVAL:
+                db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                db.commit()
+                self._purged_at = time.time()
+
+        revoked = {digest: _epoch(expires_at) for digest, expires_at in rows}
+        with self._lock:
+            # Keep local revocations whose INSERT may not be visible yet; drop expired ones
+            current = time.time()
+            for digest, expires_at in self._revoked.items():
+                if expires_at > current:
+                    revoked.setdefault(digest, expires_at)
+            self._revoked = revoked
+        self.synced_at = time.time()
+
+    def start(self) -> None:
+        if self._syncer is not None or not self.persist:
+            return
+        with self._lock:
+            if self._syncer is None:
+                self._stop.clear()
+                self._syncer = threading.Thread(target=self._run, name="token-revocations", daemon=True)
+                self._syncer.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        syncer, self._syncer = self._syncer, None
+        if syncer is not None:
+            syncer.join(timeout=self.interval + 1)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning("Could not sync revoked tokens: %s", e)
+            self._stop.wait(self.interval)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite hands timestamps back naive; they were written as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+# Always the primary: a lagging replica would let a logged-out token back in
+revocation_list = RevocationList(
+    SessionLocal,
+    persist=settings.TOKEN_REVOCATION_PERSIST,
+    interval=settings.TOKEN_REVOCATION_SYNC_INTERVAL,
+)
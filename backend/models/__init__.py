@@ -14,4 +14,8 @@ from models.service_request import *  # Import before payment_gateway
 from models.service_job_log import *
 from models.payment_gateway import *
 from models.push_tokens import *
-from models.setting import *
\ No newline at end of file
+from models.setting import *
+from models.revoked_token import *
+from models.dashboard_snapshot import *
+from models.rollups import *
+from models.referral_closure import *
\ No newline at end of file
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from sqlalchemy import DDL, Float, String, Text, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.base import Base
+
+
+class DashboardSnapshot(Base):
+    """
+    Last computed dashboard stats / chart payloads, shared by all API workers
+    (see SnapshotCache in services/dashboard_service.py). On PostgreSQL the
+    table is UNLOGGED: it is a cache, so skipping the WAL is worth losing it on
+    a crash.
+    """
+    __tablename__ = "dashboard_snapshots"
+    # Internal table: not exposed through the auto-CRUD routers
+    __auto_crud__ = False
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # JSON document; NULL until the first computation finishes
+    payload: Mapped[Optional[str]] = mapped_column(Text)
+    # Epoch seconds
+    computed_at: Mapped[Optional[float]] = mapped_column(Float)
+    # Refresh lease: only the holder recomputes until lease_until (epoch seconds) passes
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(128))
+    lease_until: Mapped[Optional[float]] = mapped_column(Float)
+
+
+event.listen(
+    DashboardSnapshot.__table__,
+    "after_create",
+    DDL("ALTER TABLE dashboard_snapshots SET UNLOGGED").execute_if(dialect="postgresql"),
+)
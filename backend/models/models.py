@@ -20,6 +20,7 @@ IST = pytz.timezone("Asia/Kolkata")
 # ============================= USERS =============================
 class User(Base):
     __tablename__ = "users"
+    __searchable__ = ("fullname", "MobileNumber", "Email", "member_id")
 
     UserID = Column(Integer, primary_key=True)
     fullname = Column(String(255))
@@ -29,7 +30,8 @@ class User(Base):
     LoginPIN = Column(String(100))
     TransactionPIN = Column(String(100))
     IsKYCCompleted = Column(Boolean, default=False)
-    introducer_id = Column(String(255), ForeignKey("users.member_id"))
+    # Indexed: the referral tree is walked by introducer_id
+    introducer_id = Column(String(255), ForeignKey("users.member_id"), index=True)
     member_id = Column(String(255), unique=True)
     RewardWalletBalance = Column(DECIMAL(10, 5), default=Decimal("0.00"))
     INRWalletBalance = Column(DECIMAL(10, 5), default=Decimal("0.00"))
@@ -810,6 +812,7 @@ class LcrMoneyDistributionAmount(Base):
 
 class LcrRewards(Base):
     __tablename__ = "lcr_rewards"
+    __searchable__ = ("reference_id", "received_by", "received_from", "purpose")
 
     srno = Column(Integer, primary_key=True)
     amount = Column(DECIMAL(10, 5), default=Decimal("0.00000"))
@@ -828,6 +831,7 @@ class LcrRewards(Base):
 
 class LcrMoney(Base):
     __tablename__ = "lcrmoney"
+    __searchable__ = ("reference_id", "received_by", "received_from", "purpose")
 
     srno = Column(Integer, primary_key=True)
     amount = Column(DECIMAL(10, 5), default=Decimal("0.00000"))
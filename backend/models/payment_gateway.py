@@ -23,6 +23,11 @@ class Payment_Gateway(IntPrimaryKeyMixin, Base):
     Each payment links to a Service_Request entry.
     """
     __tablename__ = "payment_gateway"
+    # Columns served by the search index (see core/search.py)
+    __searchable__ = (
+        "payer_name", "payer_email", "payer_mobile",
+        "client_txn_id", "sabpaisa_txn_id", "rrn", "purpose",
+    )
 
     # =========================
     # RELATION TO SERVICE REQUEST
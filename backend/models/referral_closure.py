@@ -0,0 +1,28 @@
+from sqlalchemy import Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.base import Base
+
+
+class ReferralClosure(Base):
+    """
+    Transitive closure of users.introducer_id -> users.member_id: one row per
+    (ancestor, descendant) pair with the number of levels between them,
+    including each member's own (m, m, 0) row. Maintained by database triggers
+    on users and rebuilt with ``python -m services.referral_closure build``
+    (see services/referral_closure.py).
+    """
+    __tablename__ = "referral_closure"
+    # Internal table: not exposed through the auto-CRUD routers
+    __auto_crud__ = False
+
+    ancestor: Mapped[str] = mapped_column(String(255), primary_key=True)
+    descendant: Mapped[str] = mapped_column(String(255), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Downline by level: WHERE ancestor = ? [AND depth = ?]
+        Index("ix_referral_closure_ancestor_depth", "ancestor", "depth"),
+        # Upline: WHERE descendant = ? ORDER BY depth
+        Index("ix_referral_closure_descendant_depth", "descendant", "depth"),
+    )
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.base import Base, IntPrimaryKeyMixin, get_ist_time
+
+
+class RevokedToken(IntPrimaryKeyMixin, Base):
+    """
+    JWTs invalidated by /api/v1/auth/logout, shared by all API workers
+    (see core/token_cache.py). Only the SHA-256 of the token is stored.
+    """
+    __tablename__ = "revoked_tokens"
+    # Internal table: not exposed through the auto-CRUD routers
+    __auto_crud__ = False
+
+    token_digest: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    username: Mapped[str] = mapped_column(String(255), nullable=False)
+    token_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    # UTC; rows past this are dead weight and are purged by the sync
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=get_ist_time, nullable=False)
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Date, Integer, NUMERIC, TIMESTAMP, VARCHAR
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.base import Base, get_ist_time
+
+
+class DailyServiceStats(Base):
+    """
+    service_request volume per IST day x service_type x status, maintained by
+    services/rollup_service.py. NULL service types/statuses are stored as ''.
+    """
+    __tablename__ = "daily_service_stats"
+    # Derived table: written only by the rollup job, not exposed through the auto-CRUD routers
+    __auto_crud__ = False
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    service_type: Mapped[str] = mapped_column(VARCHAR(30), primary_key=True)
+    status: Mapped[str] = mapped_column(VARCHAR(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    amount_sum: Mapped[Decimal] = mapped_column(NUMERIC(18, 2), nullable=False, default=0)
+    amount_min: Mapped[Optional[Decimal]] = mapped_column(NUMERIC(10, 2))
+    amount_max: Mapped[Optional[Decimal]] = mapped_column(NUMERIC(10, 2))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=get_ist_time)
+
+
+class DailyPaymentStats(Base):
+    """
+    payment_gateway volume per IST day x purpose x status, maintained by
+    services/rollup_service.py. NULL purposes/statuses are stored as ''.
+    """
+    __tablename__ = "daily_payment_stats"
+    # Derived table: written only by the rollup job, not exposed through the auto-CRUD routers
+    __auto_crud__ = False
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    purpose: Mapped[str] = mapped_column(VARCHAR(50), primary_key=True)
+    status: Mapped[str] = mapped_column(VARCHAR(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    amount_sum: Mapped[Decimal] = mapped_column(NUMERIC(18, 2), nullable=False, default=0)
+    amount_min: Mapped[Optional[Decimal]] = mapped_column(NUMERIC(10, 2))
+    amount_max: Mapped[Optional[Decimal]] = mapped_column(NUMERIC(10, 2))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=get_ist_time)
+
+
+class RollupWatermark(Base):
+    """
+    Progress of one rollup table's incremental job.
+
+    ``high_water`` is the largest source ``updated_at`` already rolled up, as
+    the database returned it. Days before ``covered_before`` (an IST date) are
+    complete in the rollup; readers take them from the rollup and everything
+    from ``raw_boundary`` (the IST midnight of ``covered_before``, stored like
+    the source ``created_at`` so it can be compared with it) from raw rows.
+    """
+    __tablename__ = "rollup_watermarks"
+    # Internal table: not exposed through the auto-CRUD routers
+    __auto_crud__ = False
+
+    name: Mapped[str] = mapped_column(VARCHAR(64), primary_key=True)
+    high_water: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    covered_before: Mapped[Optional[date]] = mapped_column(Date)
+    raw_boundary: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=get_ist_time)
@@ -25,6 +25,8 @@ class Service_Request(IntPrimaryKeyMixin, Base):
     (Recharge, BBPS Bill, Prime Activation, etc.)
     """
     __tablename__ = "service_request"
+    # Columns served by the search index (see core/search.py)
+    __searchable__ = ("service_type", "mobile_number", "reference_id", "payment_txn_id", "utr_no")
 
     # =========================
     # BASE RELATION
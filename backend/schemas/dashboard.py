@@ -19,12 +19,17 @@ class DashboardStatsResponse(BaseModel):
     total_mobile_recharge: int = 0
     total_dth_recharge: int = 0
     active_system_status: bool = True
+    # When the figures were computed, and whether they are past the snapshot TTL (served while a refresh runs)
+    as_of: Optional[datetime] = None
+    stale: bool = False
 
     class Config:
         from_attributes = True
 
 class DailyVolumeData(BaseModel):
     name: str
+    # Start of the IST bucket: ISO date, or ISO datetime for hourly buckets
+    bucket: Optional[str] = None
     transactions: int = 0
     amount: float = 0.0
 
@@ -36,6 +41,10 @@ class ServiceDistributionData(BaseModel):
 class ChartDataResponse(BaseModel):
     daily_volume: List[DailyVolumeData] = []
     service_distribution: List[ServiceDistributionData] = []
+    days: int = 7
+    granularity: str = "day"
+    as_of: Optional[datetime] = None
+    stale: bool = False
 
 class LiveTransactionResponse(BaseModel):
     id: str = "N/A"
@@ -1,163 +1,258 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, cast, Numeric, or_
-from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, create_engine, func, desc, cast, or_, select, insert, update, true, union_all
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from models.models import User, Transactions
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from core import timeseries
+from core.base import IST
+from core.config import settings
+from core.database import AsyncReadSessionLocal, engine as primary_engine
+from models.models import User, Transactions, DirectIncome, LevelIncome, LcrMoney, LcrRewards
 from models.payment_gateway import Payment_Gateway
+from models.dashboard_snapshot import DashboardSnapshot
+from models.rollups import DailyPaymentStats, DailyServiceStats
+from models.service_request import Service_Request
+from services.rollup_service import PAYMENT_ROLLUP, SERVICE_ROLLUP, closed_days, live_rows
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Dashboard stats: one single-pass statement per table group, each COUNT(*) FILTER (WHERE ...)
+# instead of a separate round-trip per figure
+def _not_deleted():
+    return or_(User.IsDeleted == False, User.IsDeleted == None)
+
+
+def user_stats_query(now: datetime):
+    today = datetime.combine(now.date(), datetime.min.time())
+    return select(
+        func.count().label("total_users"),
+        func.count().filter(User.CreatedAt >= today, User.CreatedAt < today + timedelta(days=1)).label("new_signups_today"),
+        func.count().filter(User.CreatedAt >= now - timedelta(days=7)).label("new_signups_last_7_days"),
+        func.count().filter(User.IsKYCCompleted == True).label("kyc_verified_users"),
+        func.count().filter(User.prime_status == True).label("prime_users"),
+        # Distributor LCR Money = users with any wallet balance
+        func.count().filter(
+            or_(User.INRWalletBalance > 0, User.RewardWalletBalance > 0)
+        ).label("total_distributor_lcr_money"),
+    ).where(_not_deleted())
+
+
+def lcr_totals_query():
+    # Active (status=1) rows only; two scalar subqueries, one statement
+    return select(
+        select(func.coalesce(func.sum(LcrMoney.amount), 0)).where(LcrMoney.status == 1)
+        .scalar_subquery().label("total_lcr_money"),
+        select(func.coalesce(func.sum(LcrRewards.amount), 0)).where(LcrRewards.status == 1)
+        .scalar_subquery().label("total_lcr_reward_distributed"),
+    )
+
+
+def income_receivers_query():
+    # Unique receivers of direct and of level income
+    return select(
+        select(func.count(func.distinct(DirectIncome.receiver_member))).scalar_subquery().label("direct_income_users"),
+        select(func.count(func.distinct(LevelIncome.receiver_member))).scalar_subquery().label("level_income_users"),
+    )
+
+
+def payment_stats_query():
+    # Closed days from daily_payment_stats, the rest (normally today) from raw rows; see services/rollup_service.py
+    stats = DailyPaymentStats
+    success = stats.status == PAYMENT_SUCCESS_STATUS
+    closed = select(
+        func.coalesce(func.sum(stats.count), 0).label("total"),
+        func.coalesce(func.sum(stats.count).filter(
+            success, or_(stats.purpose.ilike('%mobile%'), stats.purpose.ilike('%recharge%'))
+        ), 0).label("mobile"),
+        func.coalesce(func.sum(stats.count).filter(success, stats.purpose.ilike('%dth%')), 0).label("dth"),
+    ).where(closed_days(PAYMENT_ROLLUP)).subquery()
+
+    success = Payment_Gateway.status == PAYMENT_SUCCESS_STATUS
+    live = select(
+        func.count().label("total"),
+        func.count().filter(
+            success, or_(Payment_Gateway.purpose.ilike('%mobile%'), Payment_Gateway.purpose.ilike('%recharge%'))
+        ).label("mobile"),
+        func.count().filter(success, Payment_Gateway.purpose.ilike('%dth%')).label("dth"),
+    ).select_from(Payment_Gateway).where(live_rows(PAYMENT_ROLLUP)).subquery()
+
+    return select(
+        (closed.c.total + live.c.total).label("total_payment_requests"),
+        (closed.c.mobile + live.c.mobile).label("total_mobile_recharge"),
+        (closed.c.dth + live.c.dth).label("total_dth_recharge"),
+    ).select_from(closed.join(live, true()))
+
+
+def dashboard_stats_queries(now: Optional[datetime] = None) -> list:
+    return [user_stats_query(now or datetime.now()), lcr_totals_query(), income_receivers_query(), payment_stats_query()]
+
+
+EMPTY_DASHBOARD_STATS = {
+    "total_users": 0,
+    "new_signups_today": 0,
+    "new_signups_last_7_days": 0,
+    "kyc_verified_users": 0,
+    "verified_accounts": 0,
+    "kyc_verification_percentage": 0.0,
+    "prime_users": 0,
+    "total_lcr_money": 0.0,
+    "total_lcr_reward_distributed": 0.0,
+    "total_payment_requests": 0,
+    "total_distributor_lcr_money": 0.0,
+    "total_distributor_prime_reward": 0.0,
+    "total_mobile_recharge": 0,
+    "total_dth_recharge": 0
+}
+
+
+def build_dashboard_stats(users, lcr, income, payments) -> dict:
+    """Assemble the response from the rows of dashboard_stats_queries, in that order"""
+    total_users = users.total_users or 0
+    kyc_verified_users = users.kyc_verified_users or 0
+    stats = {
+        "total_users": total_users,
+        "new_signups_today": users.new_signups_today or 0,
+        "new_signups_last_7_days": users.new_signups_last_7_days or 0,
+        "kyc_verified_users": kyc_verified_users,
+        # Verified accounts = KYC completed users
+        "verified_accounts": kyc_verified_users,
+        "kyc_verification_percentage": round(kyc_verified_users / total_users * 100, 2) if total_users > 0 else 0,
+        "prime_users": users.prime_users or 0,
+        "total_lcr_money": float(lcr.total_lcr_money or 0),
+        "total_lcr_reward_distributed": float(lcr.total_lcr_reward_distributed or 0),
+        "total_payment_requests": payments.total_payment_requests or 0,
+        "total_distributor_lcr_money": users.total_distributor_lcr_money or 0,
+        # Distributor Prime Reward = unique DirectIncome receivers + unique LevelIncome receivers
+        "total_distributor_prime_reward": (income.direct_income_users or 0) + (income.level_income_users or 0),
+        "total_mobile_recharge": payments.total_mobile_recharge or 0,
+        "total_dth_recharge": payments.total_dth_recharge or 0
+    }
+    logger.debug(
+        "Dashboard stats computed",
+        extra={key: stats[key] for key in ("total_users", "kyc_verified_users", "prime_users", "total_payment_requests")}
+    )
+    return stats
+
+
+SERVICE_SUCCESS_STATUSES = ['completed', 'paid', 'success']
+PAYMENT_SUCCESS_STATUS = 'SUCCESS'
+
+# Chart windows (?days=) and the bucket size each one is drawn with
+CHART_GRANULARITY = {1: "hour", 7: "day", 30: "day", 90: "week", 365: "week"}
+CHART_LABELS = {"hour": "%H:00", "day": "%b %d", "week": "%b %d"}
+
+
+def chart_buckets(days: int, granularity: str) -> Tuple[datetime, datetime, list]:
+    """The IST window [start, end) for the last ``days`` days and its (bucket key, label) pairs, oldest first
+
+    Keys match ``timeseries.format_bucket``; weeks start on Monday, so a weekly
+    window is widened back to the Monday of its first day.
+    """
+    now = datetime.now(IST)
+    if granularity == "hour":
+        # The last 24 hours, the current one included
+        end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        start = end - timedelta(hours=24)
+        step = timedelta(hours=1)
+    else:
+        end = IST.localize(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+        start = end - timedelta(days=days)
+        step = timedelta(days=1)
+        if granularity == "week":
+            start -= timedelta(days=start.weekday())
+            step = timedelta(weeks=1)
+
+    buckets = []
+    current = start
+    while current < end:
+        key = current.replace(tzinfo=None).isoformat() if granularity == "hour" else current.date().isoformat()
+        buckets.append((key, current.strftime(CHART_LABELS[granularity])))
+        current += step
+    return start, end, buckets
+
+
+def chart_bucket_key(value, granularity: str) -> str:
+    """The chart bucket a raw bucket value or rollup day falls in, as keyed by chart_buckets"""
+    if granularity == "hour":
+        return timeseries.format_bucket(value, granularity)
+    day = date.fromisoformat(timeseries.format_bucket(value, "day"))
+    if granularity == "week":
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def live_transaction(txn: Payment_Gateway) -> dict:
+    """A payment_gateway row as shown in the live transactions table (REST and WebSocket feed)"""
+    return {
+        "id": txn.client_txn_id or f"PG{txn.id}",
+        "TransactionID": txn.client_txn_id or f"PG{txn.id}",
+        "user": txn.payer_name or "Unknown User",
+        "fullname": txn.payer_name or "Unknown User",
+        "service": txn.purpose or "Service",
+        "purpose": txn.purpose or "Service",
+        "amount": float(txn.amount) if txn.amount else 0.0,
+        "status": txn.status.capitalize() if txn.status else "Pending",
+        "location": "India",
+        "date": txn.created_at.strftime('%Y-%m-%d') if txn.created_at else "",
+        "time": txn.created_at.strftime('%H:%M:%S') if txn.created_at else ""
+    }
 
 
 class DashboardService:
 
     @staticmethod
     def get_dashboard_stats(db: Session):
+        """Dashboard stats on one session: the four single-pass statements, one after another"""
         try:
-            # ============ USER STATS - NO JOINS ============
-            # Total users - excluding deleted (STRICT NULL CHECK)
-            total_users = db.query(User).filter(
-                User.IsDeleted.is_(False) | User.IsDeleted.is_(None)
-            ).count()
-            
-            # Debug print
-            print(f"🔍 Total Users Query Result: {total_users}")
-            
-            # New signups today
-            today = datetime.now().date()
-            new_signups_today = db.query(User).filter(
-                func.date(User.CreatedAt) == today,
-                or_(User.IsDeleted == False, User.IsDeleted == None)
-            ).count()
-            
-            # New signups in last 7 days
-            seven_days_ago = datetime.now() - timedelta(days=7)
-            new_signups_last_7_days = db.query(User).filter(
-                User.CreatedAt >= seven_days_ago,
-                or_(User.IsDeleted == False, User.IsDeleted == None)
-            ).count()
-            
-            # KYC verified users
-            kyc_verified_users = db.query(User).filter(
-                User.IsKYCCompleted == True,
-                or_(User.IsDeleted == False, User.IsDeleted == None)
-            ).count()
-            
-            # KYC verification percentage
-            kyc_verification_percentage = (
-                (kyc_verified_users / total_users * 100) if total_users > 0 else 0
-            )
-            
-            # Prime users
-            prime_users = db.query(User).filter(
-                User.prime_status == True,
-                or_(User.IsDeleted == False, User.IsDeleted == None)
-            ).count()
-            
-            # ============ INCOME STATS - COUNT FROM INCOME TABLES ============
-            # ============ LCR MONEY & REWARDS - DIRECTLY FROM TABLES ============
-            from models.models import DirectIncome, LevelIncome, LcrMoney, LcrRewards
-            
-            # Total LCR Money Distributed - DIRECT SUM from lcrmoney table
-            total_lcr_money = db.query(
-                func.coalesce(func.sum(LcrMoney.amount), 0)
-            ).filter(
-                LcrMoney.status == 1  # Active status only
-            ).scalar() or 0
-            total_lcr_money = float(total_lcr_money)
-            
-            # Total LCR Reward Distributed - DIRECT SUM from lcr_rewards table
-            total_lcr_reward_distributed = db.query(
-                func.coalesce(func.sum(LcrRewards.amount), 0)
-            ).filter(
-                LcrRewards.status == 1  # Active status only
-            ).scalar() or 0
-            total_lcr_reward_distributed = float(total_lcr_reward_distributed)
-            
-            # Count unique users who received direct income
-            direct_income_users = db.query(func.count(func.distinct(DirectIncome.receiver_member))).scalar() or 0
-            
-            # Count unique users who received level income
-            level_income_users = db.query(func.count(func.distinct(LevelIncome.receiver_member))).scalar() or 0
-            
-            # Total Distributor LCR Money = Users with any wallet balance
-            total_distributor_lcr_money = db.query(User).filter(
-                or_(User.INRWalletBalance > 0, User.RewardWalletBalance > 0),
-                or_(User.IsDeleted == False, User.IsDeleted == None)
-            ).count()
-            
-            # Total Distributor Prime Reward = Unique users from DirectIncome + LevelIncome
-            total_prime_reward = direct_income_users + level_income_users
-            
-            # ============ PAYMENT GATEWAY STATS - NO JOINS, DIRECT COUNT ============
-            # Mobile recharge count - ONLY from payment_gateway table, no joins
-            total_mobile_recharge = db.query(func.count(Payment_Gateway.id)).filter(
-                or_(
-                    Payment_Gateway.purpose.ilike('%mobile%'),
-                    Payment_Gateway.purpose.ilike('%recharge%')
-                ),
-                Payment_Gateway.status == 'SUCCESS'
-            ).scalar() or 0
-            
-            # DTH recharge count - ONLY from payment_gateway table, no joins
-            total_dth_recharge = db.query(func.count(Payment_Gateway.id)).filter(
-                Payment_Gateway.purpose.ilike('%dth%'),
-                Payment_Gateway.status == 'SUCCESS'
-            ).scalar() or 0
-            
-            # Total Payment Requests - ALL payment gateway records
-            total_payment_requests = db.query(func.count(Payment_Gateway.id)).scalar() or 0
-
-            # Calculate verified accounts (KYC completed users)
-            verified_accounts = kyc_verified_users
-
-            print(f"📊 Dashboard Stats Debug (DIRECT CALCULATION):")
-            print(f"   Total Users: {total_users}")
-            print(f"   New Signups Today: {new_signups_today}")
-            print(f"   New Signups Last 7 Days: {new_signups_last_7_days}")
-            print(f"   KYC Verified: {kyc_verified_users}")
-            print(f"   Prime Users: {prime_users}")
-            print(f"   Total LCR Money (DIRECT SUM from lcrmoney table, status=1): ₹{total_lcr_money}")
-            print(f"   Total LCR Reward Distributed (DIRECT SUM from lcr_rewards table, status=1): ₹{total_lcr_reward_distributed}")
-            print(f"   Total Payment Requests: {total_payment_requests}")
-            print(f"   Total Distributor LCR Money (users with any wallet balance): {total_distributor_lcr_money}")
-            print(f"   Total Distributor Prime Reward (DirectIncome + LevelIncome users): {total_prime_reward}")
-            print(f"   Mobile Recharge (payment_gateway count): {total_mobile_recharge}")
-            print(f"   DTH Recharge (payment_gateway count): {total_dth_recharge}")
-
-            return {
-                "total_users": total_users,
-                "new_signups_today": new_signups_today,
-                "new_signups_last_7_days": new_signups_last_7_days,
-                "kyc_verified_users": kyc_verified_users,
-                "verified_accounts": verified_accounts,
-                "kyc_verification_percentage": round(kyc_verification_percentage, 2),
-                "prime_users": prime_users,
-                "total_lcr_money": total_lcr_money,
-                "total_lcr_reward_distributed": total_lcr_reward_distributed,
-                "total_payment_requests": total_payment_requests,
-                "total_distributor_lcr_money": total_distributor_lcr_money,
-                "total_distributor_prime_reward": total_prime_reward,
-                "total_mobile_recharge": total_mobile_recharge,
-                "total_dth_recharge": total_dth_recharge
-            }
+            rows = [db.execute(query).one() for query in dashboard_stats_queries()]
+            return build_dashboard_stats(*rows)
         except Exception as e:
-            print(f"❌ Error fetching dashboard stats: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "total_users": 0,
-                "new_signups_today": 0,
-                "new_signups_last_7_days": 0,
-                "kyc_verified_users": 0,
-                "verified_accounts": 0,
-                "kyc_verification_percentage": 0.0,
-                "prime_users": 0,
-                "total_lcr_money": 0.0,
-                "total_lcr_reward_distributed": 0.0,
-                "total_payment_requests": 0,
-                "total_distributor_lcr_money": 0.0,
-                "total_distributor_prime_reward": 0.0,
-                "total_mobile_recharge": 0,
-                "total_dth_recharge": 0
-            }
+            logger.exception("Error fetching dashboard stats: %s", e)
+            return dict(EMPTY_DASHBOARD_STATS)
+
+    @staticmethod
+    async def fetch_dashboard_stats(session_factory: Callable[[], AsyncSession]):
+        """Dashboard stats with the four statements in flight at once, each on its own session/connection
+
+        Errors propagate (no zero fallback), so a failed computation is never cached as a snapshot.
+        """
+        async def run(query):
+            async with session_factory() as db:
+                return (await db.execute(query)).one()
+
+        rows = await asyncio.gather(*(run(query) for query in dashboard_stats_queries()))
+        return build_dashboard_stats(*rows)
+
+    @staticmethod
+    async def dashboard_stats_snapshot(fresh: bool = False) -> "Snapshot":
+        """Cached stats (see SnapshotCache); ``fresh`` bypasses the cache and reads the primary"""
+        async def compute():
+            return await DashboardService.fetch_dashboard_stats(lambda: AsyncReadSessionLocal(fresh=fresh))
+
+        if fresh:
+            return Snapshot(await compute(), time.time(), False)
+        return await dashboard_snapshots.get("stats", compute)
+
+    @staticmethod
+    async def chart_data_snapshot(days: int = 7, fresh: bool = False) -> "Snapshot":
+        """Cached chart data for one window (see SnapshotCache); ``fresh`` bypasses the cache and reads the primary"""
+        async def compute():
+            async with AsyncReadSessionLocal(fresh=fresh) as db:
+                return await db.run_sync(DashboardService.get_chart_data, days)
+
+        if fresh:
+            return Snapshot(await compute(), time.time(), False)
+        return await dashboard_snapshots.get(f"charts:{days}", compute)
 
     @staticmethod
     def get_recent_transactions(db: Session, limit: int = 50):
@@ -185,24 +280,9 @@ class DashboardService:
                 desc(Payment_Gateway.created_at)
             ).limit(limit).all()
             
-            print(f"📊 Payment_Gateway transactions found: {len(pg_txns)}")
-            
-            for txn in pg_txns:
-                result.append({
-                    "id": txn.client_txn_id or f"PG{txn.id}",
-                    "TransactionID": txn.client_txn_id or f"PG{txn.id}",
-                    "user": txn.payer_name or "Unknown User",
-                    "fullname": txn.payer_name or "Unknown User",
-                    "service": txn.purpose or "Service",
-                    "purpose": txn.purpose or "Service",
-                    "amount": float(txn.amount) if txn.amount else 0.0,
-                    "status": txn.status.capitalize() if txn.status else "Pending",
-                    "location": "India",
-                    "date": txn.created_at.strftime('%Y-%m-%d') if txn.created_at else "",
-                    "time": txn.created_at.strftime('%H:%M:%S') if txn.created_at else ""
-                })
+            result = [live_transaction(txn) for txn in pg_txns]
         except Exception as e:
-            print(f"Error fetching Payment_Gateway: {e}")
+            logger.warning("Error fetching Payment_Gateway: %s", e)
         
         # If no Payment_Gateway data, try Transactions table
         if not result:
@@ -213,8 +293,6 @@ class DashboardService:
                     desc(Transactions.CreatedAt)
                 ).limit(limit).all()
                 
-                print(f"📊 Transactions table records found: {len(transactions)}")
-                
                 for txn in transactions:
                     result.append({
                         "id": str(txn.TransactionID),
@@ -230,9 +308,9 @@ class DashboardService:
                         "time": txn.CreatedAt.strftime('%H:%M:%S') if txn.CreatedAt else ""
                     })
             except Exception as e:
-                print(f"Error fetching Transactions: {e}")
+                logger.warning("Error fetching Transactions: %s", e)
         
-        print(f"📊 Total transactions to return: {len(result)}")
+        logger.debug("Returning %d recent transactions", len(result))
         return result
 
     @staticmethod
@@ -262,60 +340,78 @@ class DashboardService:
         return result
 
     @staticmethod
-    def get_chart_data(db: Session):
-        from models.service_request import Service_Request
-        
-        last_7_days = [
-            datetime.now().date() - timedelta(days=i)
-            for i in range(6, -1, -1)
-        ]
+    def get_chart_data(db: Session, days: int = 7):
+        dialect = db.get_bind().dialect.name
+        granularity = CHART_GRANULARITY[days]
+        start, end, buckets = chart_buckets(days, granularity)
+
+        # One statement per source table over a sargable created_at range, bucketed in IST. Daily and weekly
+        # charts take closed days from the rollup tables and only the rest (normally today) from raw rows.
+        def volume(rollup, success, rollup_success):
+            model, table = rollup.source, rollup.table
+            in_window = (
+                model.created_at >= timeseries.column_bound(start, model.created_at, dialect),
+                model.created_at < timeseries.column_bound(end, model.created_at, dialect),
+            )
+            if granularity == "hour":
+                bucket = timeseries.bucket_expression(model.created_at, granularity, dialect)
+                query = select(bucket, func.count(), func.coalesce(func.sum(rollup.amount), 0)).where(
+                    *in_window, success
+                ).group_by(bucket)
+            else:
+                day = timeseries.bucket_expression(model.created_at, "day", dialect)
+                if dialect == "postgresql":
+                    day = cast(day, Date)
+                closed = select(table.day, func.sum(table.count), func.sum(table.amount_sum)).where(
+                    table.day >= start.date(), table.day < end.date(), rollup_success, closed_days(rollup)
+                ).group_by(table.day)
+                live = select(day, func.count(), func.coalesce(func.sum(rollup.amount), 0)).where(
+                    *in_window, success, live_rows(rollup)
+                ).group_by(day)
+                query = union_all(closed, live)
+
+            totals = {}
+            for value, count, amount in db.execute(query):
+                key = chart_bucket_key(value, granularity)
+                previous_count, previous_amount = totals.get(key, (0, 0.0))
+                totals[key] = (previous_count + count, previous_amount + float(amount or 0))
+            return totals
+
+        service_volume = volume(
+            SERVICE_ROLLUP,
+            Service_Request.status.in_(SERVICE_SUCCESS_STATUSES),
+            DailyServiceStats.status.in_(SERVICE_SUCCESS_STATUSES),
+        )
+        payment_volume = volume(
+            PAYMENT_ROLLUP,
+            Payment_Gateway.status == PAYMENT_SUCCESS_STATUS,
+            DailyPaymentStats.status == PAYMENT_SUCCESS_STATUS,
+        )
 
         daily_volume = []
-        for day in last_7_days:
-            # Get from Service_Request table (main source)
-            sr_count = db.query(Service_Request).filter(
-                func.date(Service_Request.created_at) == day,
-                Service_Request.status.in_(['completed', 'paid', 'success'])
-            ).count()
-            
-            sr_amount = db.query(
-                func.coalesce(func.sum(Service_Request.amount), 0)
-            ).filter(
-                func.date(Service_Request.created_at) == day,
-                Service_Request.status.in_(['completed', 'paid', 'success'])
-            ).scalar() or 0
-            
-            # Also check Payment_Gateway
-            pg_count = db.query(Payment_Gateway).filter(
-                func.date(Payment_Gateway.created_at) == day,
-                Payment_Gateway.status == 'SUCCESS'
-            ).count()
-            
-            pg_amount = db.query(
-                func.coalesce(func.sum(cast(Payment_Gateway.amount, Numeric)), 0)
-            ).filter(
-                func.date(Payment_Gateway.created_at) == day,
-                Payment_Gateway.status == 'SUCCESS'
-            ).scalar() or 0
-            
+        for key, label in buckets:
+            sr_count, sr_amount = service_volume.get(key, (0, 0))
+            pg_count, pg_amount = payment_volume.get(key, (0, 0))
             # Use whichever has more data
-            total_count = max(sr_count, pg_count)
-            total_amount = max(float(sr_amount), float(pg_amount))
-            
             daily_volume.append({
-                "name": day.strftime("%b %d"),
-                "transactions": total_count,
-                "amount": round(total_amount, 2)
+                "name": label,
+                "bucket": key,
+                "transactions": max(sr_count, pg_count),
+                "amount": round(max(float(sr_amount), float(pg_amount)), 2)
             })
-        
-        # Service distribution from Service_Request (PRIMARY SOURCE)
-        service_data = db.query(
-            Service_Request.service_type,
-            func.count(Service_Request.id).label('count')
-        ).filter(
+
+        # Service distribution from Service_Request (PRIMARY SOURCE): rolled-up days plus live rows
+        closed = select(DailyServiceStats.service_type, func.sum(DailyServiceStats.count)).where(
+            DailyServiceStats.service_type != '',
+            DailyServiceStats.status.in_(SERVICE_SUCCESS_STATUSES),
+            closed_days(SERVICE_ROLLUP)
+        ).group_by(DailyServiceStats.service_type)
+        live = select(Service_Request.service_type, func.count(Service_Request.id)).where(
             Service_Request.service_type.isnot(None),
-            Service_Request.status.in_(['completed', 'paid', 'success'])
-        ).group_by(Service_Request.service_type).all()
+            Service_Request.status.in_(SERVICE_SUCCESS_STATUSES),
+            live_rows(SERVICE_ROLLUP)
+        ).group_by(Service_Request.service_type)
+        service_data = db.execute(union_all(closed, live)).all()
         
         # Categorize services properly
         service_categories = {
@@ -365,14 +461,187 @@ class DashboardService:
         else:
             service_distribution = [{"name": "No Data", "value": 0, "color": "#9ca3af"}]
 
-        print(f"📈 Chart Data Debug:")
-        print(f"   Daily Volume Days: {len(daily_volume)}")
-        print(f"   Daily Volume Data: {daily_volume}")
-        print(f"   Service Categories: {service_categories}")
-        print(f"   Service Distribution: {len(service_distribution)} services")
-        print(f"   Service Distribution Data: {service_distribution}")
+        logger.debug(
+            "Chart data: %d volume days, %d services", len(daily_volume), len(service_distribution)
+        )
 
         return {
             "daily_volume": daily_volume,
-            "service_distribution": service_distribution
+            "service_distribution": service_distribution,
+            "days": days,
+            "granularity": granularity
         }
+
+
+class Snapshot(NamedTuple):
+    data: dict
+    computed_at: float
+    stale: bool
+
+    @property
+    def as_of(self) -> datetime:
+        return datetime.fromtimestamp(self.computed_at, IST)
+
+
+class SnapshotCache:
+    """
+    Dashboard payloads cached in the dashboard_snapshots table, shared by every worker
+
+    A snapshot younger than ``ttl`` is served as is. An older one is served with
+    ``stale=True`` while one background task refreshes it; the task first takes
+    the row's lease with a conditional UPDATE, so across the cluster only the
+    lease holder recomputes. With no snapshot yet, a request computes one
+    itself (or waits for the lease holder's result). Each worker also keeps the
+    last good snapshot in memory and serves it when the store or the database
+    is unreachable. Failed refreshes keep the lease until it expires, which
+    spaces out retries against a failing database.
+    """
+
+    def __init__(self, ttl: float, lease: float, store_url: str = ""):
+        self.ttl = ttl
+        self.lease = lease
+        self.store_url = store_url
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._engine = None
+        self._local: Dict[str, Tuple[dict, float]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._retry_at: Dict[str, float] = {}
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            if self.store_url:
+                self._engine = create_engine(self.store_url, pool_pre_ping=True)
+                DashboardSnapshot.__table__.create(self._engine, checkfirst=True)
+            else:
+                # The primary: the lease UPDATEs must not go to a read replica
+                self._engine = primary_engine
+        return self._engine
+
+    async def get(self, key: str, compute: Callable[[], Awaitable[dict]]) -> Snapshot:
+        if self.ttl <= 0:
+            return Snapshot(await compute(), time.time(), False)
+
+        local = self._local.get(key)
+        if local is not None and time.time() - local[1] < self.ttl:
+            return Snapshot(local[0], local[1], False)
+
+        try:
+            stored = await run_in_threadpool(self._load, key)
+        except Exception as e:
+            logger.warning("Dashboard snapshot store unavailable: %s", e)
+            if local is not None:
+                return Snapshot(local[0], local[1], True)
+            return Snapshot(await compute(), time.time(), False)
+
+        if stored is not None:
+            data, computed_at = stored
+            self._local[key] = stored
+            if time.time() - computed_at < self.ttl:
+                return Snapshot(data, computed_at, False)
+            self._refresh_in_background(key, compute)
+            return Snapshot(data, computed_at, True)
+
+        try:
+            return await self._first_snapshot(key, compute)
+        except Exception:
+            if local is not None:
+                logger.exception("Dashboard snapshot %s could not be computed; serving the last good one", key)
+                return Snapshot(local[0], local[1], True)
+            raise
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable[dict]]) -> None:
+        if key in self._tasks or time.time() < self._retry_at.get(key, 0):
+            return
+        task = asyncio.create_task(self._refresh(key, compute))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[dict]]) -> None:
+        try:
+            if not await run_in_threadpool(self._acquire, key):
+                return
+            data = await compute()
+            computed_at = time.time()
+            await run_in_threadpool(self._save, key, data, computed_at)
+            self._local[key] = (data, computed_at)
+        except Exception as e:
+            self._retry_at[key] = time.time() + self.lease
+            logger.warning("Dashboard snapshot %s refresh failed, serving the previous one: %s", key, e)
+
+    async def _first_snapshot(self, key: str, compute: Callable[[], Awaitable[dict]]) -> Snapshot:
+        # Coalesce concurrent cold requests in this worker onto one computation
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute_first(key, compute))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        data, computed_at = await asyncio.shield(task)
+        return Snapshot(data, computed_at, False)
+
+    async def _compute_first(self, key: str, compute: Callable[[], Awaitable[dict]]) -> Tuple[dict, float]:
+        if not await run_in_threadpool(self._acquire, key):
+            # Another worker is computing it; wait for its result, up to one lease
+            deadline = time.time() + self.lease
+            while time.time() < deadline:
+                await asyncio.sleep(0.2)
+                stored = await run_in_threadpool(self._load, key)
+                if stored is not None:
+                    self._local[key] = stored
+                    return stored
+        data = await compute()
+        computed_at = time.time()
+        self._local[key] = (data, computed_at)
+        try:
+            await run_in_threadpool(self._save, key, data, computed_at)
+        except Exception as e:
+            logger.warning("Could not store dashboard snapshot %s: %s", key, e)
+        return data, computed_at
+
+    # Blocking store access, run in the threadpool
+
+    def _load(self, key: str) -> Optional[Tuple[dict, float]]:
+        table = DashboardSnapshot.__table__
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.payload, table.c.computed_at).where(table.c.key == key)
+            ).first()
+        if row is None or row.payload is None:
+            return None
+        return json.loads(row.payload), row.computed_at
+
+    def _acquire(self, key: str) -> bool:
+        """Take the refresh lease; False while another worker holds an unexpired one"""
+        table = DashboardSnapshot.__table__
+        now = time.time()
+        with self.engine.begin() as conn:
+            taken = conn.execute(
+                update(table)
+                .where(table.c.key == key, or_(table.c.lease_until.is_(None), table.c.lease_until < now))
+                .values(lease_owner=self.owner, lease_until=now + self.lease)
+            ).rowcount
+            if taken or conn.execute(select(table.c.key).where(table.c.key == key)).first() is not None:
+                return bool(taken)
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(table).values(key=key, lease_owner=self.owner, lease_until=now + self.lease))
+            return True
+        except IntegrityError:
+            return False  # another worker created the row first, and holds its lease
+
+    def _save(self, key: str, data: dict, computed_at: float) -> None:
+        table = DashboardSnapshot.__table__
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(table).where(table.c.key == key).values(
+                    payload=json.dumps(data, default=str), computed_at=computed_at,
+                    lease_owner=None, lease_until=None
+                )
+            )
+
+
+dashboard_snapshots = SnapshotCache(
+    ttl=settings.DASHBOARD_SNAPSHOT_TTL,
+    lease=settings.DASHBOARD_SNAPSHOT_LEASE,
+    store_url=settings.DASHBOARD_SNAPSHOT_URL,
+)
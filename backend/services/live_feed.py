@@ -0,0 +1,248 @@
+"""
+Live payment_gateway feed pushed over /api/v1/ws/transactions
+
+One ``TransactionFeed`` per process polls the primary for rows whose
+``(updated_at, id)`` is past its high-water mark and broadcasts only those,
+as one JSON message serialized once, to every subscribed socket. The database
+cost is one indexed query per ``LIVE_FEED_POLL_INTERVAL`` however many tabs
+are open, and nothing at all while nobody is subscribed.
+
+Each poll re-reads the last ``OVERLAP`` of ``updated_at`` so rows committed
+late (``updated_at`` is set by the writer's clock before COMMIT) are not
+skipped; versions already sent in that window are remembered and not resent.
+
+On PostgreSQL a statement trigger on payment_gateway NOTIFYs
+``NOTIFY_CHANNEL`` and the feed LISTENs on it, so changes are picked up at
+once instead of at the next poll; the poll stays as the fallback.
+
+Each subscriber has a bounded queue (``LIVE_FEED_QUEUE_SIZE`` messages). A
+socket that cannot keep up is not allowed to hold back the others: when its
+queue is full the backlog is dropped and it is sent the current snapshot of
+the latest ``LIVE_FEED_LIMIT`` transactions instead.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+from core.database import AsyncSessionLocal, get_async_engine
+from core.instrumentation import METRICS, CounterMetric
+from models.payment_gateway import Payment_Gateway
+from services.dashboard_service import live_transaction
+
+logger = logging.getLogger(__name__)
+
+LIVE_FEED_MESSAGES = CounterMetric(
+    "live_feed_messages_total",
+    "Live transaction feed messages by result (queued, resync = dropped backlog of a slow client)",
+    labels=("result",),
+)
+METRICS.append(LIVE_FEED_MESSAGES)
+
+NOTIFY_CHANNEL = "payment_gateway_changes"
+# Rows updated this long before the high-water mark are looked at again
+OVERLAP = timedelta(seconds=30)
+# Rows read per query while catching up
+BATCH_SIZE = 500
+# Seconds between reconnect attempts of the LISTEN connection, and between retries after a failed poll
+RETRY_INTERVAL = 5.0
+
+# Queued in place of the backlog of a subscriber that fell behind
+RESYNC = object()
+
+
+def ensure_change_notifications(engine: Engine) -> bool:
+    """Install (idempotently) the NOTIFY trigger on payment_gateway; PostgreSQL only"""
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE OR REPLACE FUNCTION notify_payment_gateway_change() RETURNS trigger AS $$ "
+            f"BEGIN PERFORM pg_notify('{NOTIFY_CHANNEL}', ''); RETURN NULL; END $$ LANGUAGE plpgsql"
+        ))
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_trigger WHERE tgname = 'payment_gateway_notify' "
+            "AND tgrelid = 'payment_gateway'::regclass"
+        )).scalar()
+        if not exists:
+            conn.execute(text(
+                "CREATE TRIGGER payment_gateway_notify AFTER INSERT OR UPDATE ON payment_gateway "
+                "FOR EACH STATEMENT EXECUTE FUNCTION notify_payment_gateway_change()"
+            ))
+    return True
+
+
+class Subscriber:
+    """One socket's bounded queue of serialized messages"""
+
+    def __init__(self, size: int):
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=size)
+
+    def offer(self, message: str) -> None:
+        try:
+            self.queue.put_nowait(message)
+            LIVE_FEED_MESSAGES.inc(("queued",))
+        except asyncio.QueueFull:
+            # Too slow: replace the backlog with a single resync marker
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            LIVE_FEED_MESSAGES.inc(("resync",))
+
+
+class TransactionFeed:
+    """Per-process poller broadcasting new and changed payment_gateway rows to subscribers"""
+
+    def __init__(self, interval: float, queue_size: int, limit: int):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.limit = limit
+        self._subscribers: Set[Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # (updated_at, id) of the last row read; updated_at as the database returned it
+        self._high_water: Optional[Tuple[datetime, int]] = None
+        # id -> updated_at of the versions already sent within OVERLAP of the high-water mark
+        self._seen: Dict[int, datetime] = {}
+        # Latest `limit` rows, newest first: (created_at, id, serialized row)
+        self._latest: List[Tuple[datetime, int, dict]] = []
+
+    def snapshot(self) -> str:
+        return json.dumps({"type": "snapshot", "data": [row for _, _, row in self._latest]})
+
+    async def subscribe(self) -> Subscriber:
+        """Register a socket, priming the feed (latest rows + high-water mark) if it was idle"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._task is None:
+                await self._prime()
+                self._wakeup = asyncio.Event()
+                self._task = asyncio.create_task(self._run())
+                if get_async_engine().dialect.name == "postgresql":
+                    self._listener = asyncio.create_task(self._listen())
+            subscriber = Subscriber(self.queue_size)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    async def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        async with self._lock:
+            if not self._subscribers:
+                # Nobody watching: stop polling until the next subscriber primes the feed again
+                await self.stop()
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, self._listener) if task is not None]
+        self._task = self._listener = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _prime(self) -> None:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.scalars(
+                select(Payment_Gateway).order_by(Payment_Gateway.created_at.desc(), Payment_Gateway.id.desc())
+                .limit(self.limit)
+            )).all()
+            newest = await db.scalar(select(func.max(Payment_Gateway.updated_at)))
+            recent = [] if newest is None else (await db.execute(
+                select(Payment_Gateway.id, Payment_Gateway.updated_at)
+                .where(Payment_Gateway.updated_at >= newest - OVERLAP)
+            )).all()
+        self._latest = [(txn.created_at, txn.id, live_transaction(txn)) for txn in rows]
+        self._seen = dict(recent)
+        self._high_water = None if newest is None else (newest, max(self._seen.keys(), default=0))
+
+    async def _run(self) -> None:
+        while True:
+            # Cleared before reading, so a NOTIFY that arrives during the poll triggers another one
+            self._wakeup.clear()
+            try:
+                changed = await self._poll()
+                if changed:
+                    self._broadcast(changed)
+                delay = self.interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Live feed poll failed: %s", e)
+                delay = max(self.interval, RETRY_INTERVAL)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self) -> List[Payment_Gateway]:
+        """Rows past the high-water mark (minus OVERLAP) whose current version has not been sent yet"""
+        updated_at, pk = Payment_Gateway.updated_at, Payment_Gateway.id
+        changed = []
+        async with AsyncSessionLocal() as db:
+            query = select(Payment_Gateway).where(updated_at.isnot(None)).order_by(updated_at, pk).limit(BATCH_SIZE)
+            cursor = None if self._high_water is None else (self._high_water[0] - OVERLAP, 0)
+            while True:
+                page = query if cursor is None else query.where(tuple_(updated_at, pk) > tuple_(*cursor))
+                rows = (await db.scalars(page)).all()
+                for txn in rows:
+                    if self._seen.get(txn.id) != txn.updated_at:
+                        self._seen[txn.id] = txn.updated_at
+                        changed.append(txn)
+                if rows:
+                    cursor = (rows[-1].updated_at, rows[-1].id)
+                    if self._high_water is None or cursor > self._high_water:
+                        self._high_water = cursor
+                if len(rows) < BATCH_SIZE:
+                    break
+
+        if self._high_water is not None:
+            horizon = self._high_water[0] - OVERLAP
+            self._seen = {key: value for key, value in self._seen.items() if value >= horizon}
+        return changed
+
+    def _broadcast(self, changed: List[Payment_Gateway]) -> None:
+        rows = [live_transaction(txn) for txn in changed]
+        latest = {pk: (created_at, pk, row) for created_at, pk, row in self._latest}
+        for txn, row in zip(changed, rows):
+            latest[txn.id] = (txn.created_at, txn.id, row)
+        self._latest = sorted(latest.values(), key=lambda item: (item[0], item[1]), reverse=True)[:self.limit]
+
+        # Serialized once, whatever the number of subscribers
+        message = json.dumps({"type": "transactions", "data": rows})
+        for subscriber in list(self._subscribers):
+            subscriber.offer(message)
+
+    async def _listen(self) -> None:
+        """Wake the poller on NOTIFY; reconnects if the LISTEN connection drops"""
+        def notified(*args) -> None:
+            self._wakeup.set()
+
+        while True:
+            try:
+                async with get_async_engine().connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    await raw.add_listener(NOTIFY_CHANNEL, notified)
+                    try:
+                        while not raw.is_closed():
+                            await asyncio.sleep(RETRY_INTERVAL)
+                    finally:
+                        if not raw.is_closed():
+                            await raw.remove_listener(NOTIFY_CHANNEL, notified)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Live feed LISTEN connection failed, polling only: %s", e)
+            await asyncio.sleep(RETRY_INTERVAL)
+
+
+transaction_feed = TransactionFeed(
+    interval=settings.LIVE_FEED_POLL_INTERVAL,
+    queue_size=settings.LIVE_FEED_QUEUE_SIZE,
+    limit=settings.LIVE_FEED_LIMIT,
+)
@@ -0,0 +1,197 @@
+"""
+Maintenance of the referral_closure table (see models/referral_closure.py)
+
+Triggers on users keep the closure current for every writer of the table, not
+just this API: an INSERT adds the member's own row plus one row per ancestor
+of its introducer, and attaches the subtrees of members written earlier that
+already name it as their introducer; an UPDATE of ``introducer_id`` moves the
+member's whole subtree under the new introducer; both are refused if they
+would create a cycle. A DELETE drops every path through the member, leaving
+its downline as orphaned subtrees.
+Changing a ``member_id`` is not tracked; rebuild afterwards.
+
+``build`` recomputes the table from users in one transaction, one
+``INSERT ... SELECT`` per level, for the initial load or a repair. Concurrent
+user writes wait for it on PostgreSQL.
+
+Run from backend/:
+    python -m services.referral_closure build
+"""
+import argparse
+import logging
+from typing import List, Optional
+
+from sqlalchemy import Integer, delete, insert, literal_column, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from models.models import User
+from models.referral_closure import ReferralClosure
+
+logger = logging.getLogger(__name__)
+
+_POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION referral_closure_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        -- Every path through the member, so its downline is left as orphaned subtrees
+        DELETE FROM referral_closure
+        WHERE descendant IN (SELECT descendant FROM referral_closure WHERE ancestor = OLD.member_id)
+          AND ancestor IN (SELECT ancestor FROM referral_closure WHERE descendant = OLD.member_id);
+    ELSIF TG_OP = 'INSERT' THEN
+        IF NEW.member_id IS NOT NULL THEN
+            IF NEW.introducer_id = NEW.member_id OR EXISTS (
+                SELECT 1 FROM referral_closure down JOIN users child ON down.ancestor = child.member_id
+                WHERE child.introducer_id = NEW.member_id AND down.descendant = NEW.introducer_id
+            ) THEN
+                RAISE EXCEPTION 'referral cycle: % is in the downline of %', NEW.introducer_id, NEW.member_id;
+            END IF;
+            INSERT INTO referral_closure (ancestor, descendant, depth)
+            SELECT NEW.member_id, NEW.member_id, 0
+            UNION ALL
+            SELECT ancestor, NEW.member_id, depth + 1 FROM referral_closure WHERE descendant = NEW.introducer_id;
+            INSERT INTO referral_closure (ancestor, descendant, depth)
+            SELECT up.ancestor, down.descendant, up.depth + down.depth + 1
+            FROM referral_closure up, users child, referral_closure down
+            WHERE up.descendant = NEW.member_id AND child.introducer_id = NEW.member_id
+              AND child.member_id <> NEW.member_id AND down.ancestor = child.member_id;
+        END IF;
+    ELSIF NEW.member_id IS NOT NULL AND NEW.introducer_id IS DISTINCT FROM OLD.introducer_id THEN
+        IF EXISTS (SELECT 1 FROM referral_closure WHERE ancestor = NEW.member_id AND descendant = NEW.introducer_id) THEN
+            RAISE EXCEPTION 'referral cycle: % is in the downline of %', NEW.introducer_id, NEW.member_id;
+        END IF;
+        DELETE FROM referral_closure
+        WHERE descendant IN (SELECT descendant FROM referral_closure WHERE ancestor = NEW.member_id)
+          AND ancestor IN (SELECT ancestor FROM referral_closure WHERE descendant = NEW.member_id AND ancestor <> NEW.member_id);
+        INSERT INTO referral_closure (ancestor, descendant, depth)
+        SELECT up.ancestor, down.descendant, up.depth + down.depth + 1
+        FROM referral_closure up, referral_closure down
+        WHERE up.descendant = NEW.introducer_id AND down.ancestor = NEW.member_id;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql
+"""
+
+_SQLITE_TRIGGERS = {
+    "referral_closure_ai": """
+CREATE TRIGGER referral_closure_ai AFTER INSERT ON users WHEN new.member_id IS NOT NULL BEGIN
+    SELECT RAISE(ABORT, 'referral cycle')
+    WHERE new.introducer_id = new.member_id OR EXISTS (
+        SELECT 1 FROM referral_closure down JOIN users child ON down.ancestor = child.member_id
+        WHERE child.introducer_id = new.member_id AND down.descendant = new.introducer_id
+    );
+    INSERT INTO referral_closure (ancestor, descendant, depth)
+    SELECT new.member_id, new.member_id, 0
+    UNION ALL
+    SELECT ancestor, new.member_id, depth + 1 FROM referral_closure WHERE descendant = new.introducer_id;
+    INSERT INTO referral_closure (ancestor, descendant, depth)
+    SELECT up.ancestor, down.descendant, up.depth + down.depth + 1
+    FROM referral_closure up, users child, referral_closure down
+    WHERE up.descendant = new.member_id AND child.introducer_id = new.member_id
+      AND child.member_id <> new.member_id AND down.ancestor = child.member_id;
+END""",
+    "referral_closure_au": """
+CREATE TRIGGER referral_closure_au AFTER UPDATE OF introducer_id ON users
+WHEN new.member_id IS NOT NULL AND new.introducer_id IS NOT old.introducer_id BEGIN
+    SELECT RAISE(ABORT, 'referral cycle')
+    WHERE EXISTS (SELECT 1 FROM referral_closure WHERE ancestor = new.member_id AND descendant = new.introducer_id);
+    DELETE FROM referral_closure
+    WHERE descendant IN (SELECT descendant FROM referral_closure WHERE ancestor = new.member_id)
+      AND ancestor IN (SELECT ancestor FROM referral_closure WHERE descendant = new.member_id AND ancestor <> new.member_id);
+    INSERT INTO referral_closure (ancestor, descendant, depth)
+    SELECT up.ancestor, down.descendant, up.depth + down.depth + 1
+    FROM referral_closure up, referral_closure down
+    WHERE up.descendant = new.introducer_id AND down.ancestor = new.member_id;
+END""",
+    "referral_closure_ad": """
+CREATE TRIGGER referral_closure_ad AFTER DELETE ON users BEGIN
+    DELETE FROM referral_closure
+    WHERE descendant IN (SELECT descendant FROM referral_closure WHERE ancestor = old.member_id)
+      AND ancestor IN (SELECT ancestor FROM referral_closure WHERE descendant = old.member_id);
+END""",
+}
+
+
+def ensure_referral_closure_triggers(engine: Engine) -> bool:
+    """Create (idempotently) the triggers keeping referral_closure in step with users"""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text(_POSTGRES_FUNCTION))
+            exists = conn.execute(text(
+                "SELECT 1 FROM pg_trigger WHERE tgname = 'referral_closure_sync' AND tgrelid = 'users'::regclass"
+            )).scalar()
+            if not exists:
+                conn.execute(text(
+                    "CREATE TRIGGER referral_closure_sync AFTER INSERT OR DELETE OR UPDATE OF introducer_id "
+                    "ON users FOR EACH ROW EXECUTE FUNCTION referral_closure_sync()"
+                ))
+        elif dialect == "sqlite":
+            # Recreated every time so a changed definition takes effect
+            for name, sql in _SQLITE_TRIGGERS.items():
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                conn.execute(text(sql))
+        else:
+            return False
+    return True
+
+
+def closure_missing(conn: Connection) -> bool:
+    """True when users exist but the closure has never been built"""
+    has_users = conn.execute(select(User.UserID).where(User.member_id.isnot(None)).limit(1)).first()
+    has_closure = conn.execute(select(ReferralClosure.depth).limit(1)).first()
+    return has_users is not None and has_closure is None
+
+
+def build(engine: Engine) -> int:
+    """Recompute referral_closure from users; returns the number of rows written"""
+    columns = ["ancestor", "descendant", "depth"]
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # Trigger writes from concurrent user inserts/updates wait for the rebuild
+            conn.execute(text("LOCK TABLE referral_closure IN EXCLUSIVE MODE"))
+        conn.execute(delete(ReferralClosure))
+        total = conn.execute(insert(ReferralClosure).from_select(
+            columns,
+            select(User.member_id, User.member_id, literal_column("0", Integer)).where(User.member_id.isnot(None)),
+        )).rowcount
+
+        depth = 0
+        while True:
+            depth += 1
+            try:
+                added = conn.execute(insert(ReferralClosure).from_select(
+                    columns,
+                    select(ReferralClosure.ancestor, User.member_id, literal_column(str(depth), Integer))
+                    .join(User, User.introducer_id == ReferralClosure.descendant)
+                    .where(ReferralClosure.depth == depth - 1, User.member_id.isnot(None)),
+                )).rowcount
+            except IntegrityError as e:
+                # A pair reached twice means some member is its own ancestor
+                raise ValueError(f"users.introducer_id contains a cycle (found at depth {depth})") from e
+            if not added:
+                break
+            total += added
+            logger.info("Referral closure depth %d: %d rows", depth, added)
+
+    logger.info("Referral closure built: %d rows, deepest level %d", total, depth - 1)
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from core.database import engine
+    from core.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="install the triggers and rebuild referral_closure from users")
+    parser.parse_args(argv)
+
+    setup_logging()
+    ReferralClosure.__table__.create(engine, checkfirst=True)
+    ensure_referral_closure_triggers(engine)
+    build(engine)
+
+
+if __name__ == "__main__":
+    main()
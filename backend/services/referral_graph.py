@@ -0,0 +1,552 @@
+"""
+In-memory referral graph for network-wide analytics (/api/v1/users/network/*)
+
+Each process keeps the whole users.introducer_id -> users.member_id forest in
+parallel ``array`` columns indexed by node number, ``(UserID, introducer,
+prime_status)`` per node plus a CSR children index (``child_start`` /
+``children``). Depth, downline size and prime downline of every member, the
+per-level histograms, rankings and status counts are computed once per load,
+so the endpoints answer from memory without touching the database.
+
+Every ``NETWORK_GRAPH_REFRESH_INTERVAL`` seconds a daemon thread reads the
+users created since the ``CreatedAt`` watermark and the members prime-activated
+since the ``prime_activation_date`` watermark (both minus ``OVERLAP``, for rows
+committed late or a lagging replica), appends the new members and adds them to
+their ancestors' counts. Introducer changes, deletions and lost prime status
+are not visible that way; they are picked up by the full reload every
+``NETWORK_GRAPH_FULL_RELOAD`` seconds.
+
+A published graph is never modified: a refresh works on a copy and swaps it
+in, so readers need no lock. Deleted members are part of the graph, as they
+are of referral_closure. Downline counts cover every level, not the 10 levels
+of /referral-chain.
+"""
+import logging
+import threading
+from bisect import bisect_left
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from core.config import settings
+from core.database import ReadSessionLocal
+from models.models import User
+
+logger = logging.getLogger(__name__)
+
+# Rows created / prime-activated this long before a watermark are read again
+OVERLAP = timedelta(minutes=5)
+# Rows fetched per round trip during a full load
+LOAD_BATCH = 50000
+
+# The UI's member status (UserManagement): more than 50 referrals is Elite, more than 20 Advanced
+ELITE_MIN_DOWNLINE = 51
+ADVANCED_MIN_DOWNLINE = 21
+STATUSES = ("Elite", "Advanced", "Growing")
+
+
+def network_status(downline: int) -> str:
+    if downline >= ELITE_MIN_DOWNLINE:
+        return "Elite"
+    if downline >= ADVANCED_MIN_DOWNLINE:
+        return "Advanced"
+    return "Growing"
+
+
+def _later(current: Optional[datetime], value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or (current is not None and current >= value):
+        return current
+    return value
+
+
+def _iso(value) -> Optional[str]:
+    if isinstance(value, float):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    return value.isoformat() if value is not None else None
+
+
+class ReferralGraph:
+    """The referral forest as parallel arrays, one slot per member in load order"""
+
+    def __init__(self):
+        self.user_ids = array("q")
+        # Node of the introducer; -1 for members without one (roots) or whose introducer is unknown (orphans)
+        self.parent = array("i")
+        self.prime = bytearray()
+        # 0 for roots and orphans, -1 for members inside an introducer cycle
+        self.depth = array("i")
+        # Members at every level below the node, and how many of them are prime
+        self.downline = array("i")
+        self.downline_prime = array("i")
+        # UserID -> node without a dict per member: user_ids[:ordered] ascend (a full load reads by
+        # UserID) and are binary-searched; from the first user a refresh appends out of order until the
+        # next full load, appended users are looked up in `unordered`
+        self.ordered = 0
+        self.unordered: Dict[int, int] = {}
+        # Orphan node -> its introducer_id; linked up when that member is loaded
+        self.orphans: Dict[int, str] = {}
+        self.roots = 0
+        self.cyclic = 0
+        # Members and prime members per depth
+        self.level_members = array("q")
+        self.level_prime = array("q")
+
+        # Derived by warm()
+        self.child_start = array("i", [0])
+        self.children = array("i")
+        self.by_downline = array("i")
+        self.by_prime = array("i")
+        self.status_counts: Dict[str, int] = {}
+        self.prime_members = 0
+
+        self.created_watermark: Optional[datetime] = None
+        self.prime_watermark: Optional[datetime] = None
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def node_of(self, user_id: int) -> Optional[int]:
+        position = bisect_left(self.user_ids, user_id, 0, self.ordered)
+        if position < self.ordered and self.user_ids[position] == user_id:
+            return position
+        return self.unordered.get(user_id)
+
+    def copy(self) -> "ReferralGraph":
+        graph = ReferralGraph()
+        for name in ("user_ids", "parent", "depth", "downline", "downline_prime", "level_members", "level_prime",
+                     "child_start", "children", "by_downline", "by_prime"):
+            setattr(graph, name, array(getattr(self, name).typecode, getattr(self, name)))
+        graph.prime = bytearray(self.prime)
+        graph.unordered = dict(self.unordered)
+        graph.orphans = dict(self.orphans)
+        graph.status_counts = dict(self.status_counts)
+        for name in ("ordered", "roots", "cyclic", "prime_members", "created_watermark", "prime_watermark",
+                     "loaded_at", "refreshed_at"):
+            setattr(graph, name, getattr(self, name))
+        return graph
+
+    # ----------------------------------------------------------------- building
+
+    def add_rows(
+        self, rows: Iterable[Tuple[int, Optional[str], Optional[str], Optional[int], Optional[bool], Optional[datetime]]]
+    ) -> Tuple[List[int], int]:
+        """Append ``(UserID, member_id, introducer_id, introducer's UserID, prime_status, CreatedAt)`` rows
+
+        Users already loaded are skipped. Returns the new nodes, whose depths and counts are filled in
+        by ``attach`` or ``compute``, and how many earlier orphans found their introducer among them
+        (only ``compute`` can place those).
+        """
+        added = []
+        members: Dict[str, int] = {}
+        for user_id, member_id, introducer_id, introducer_user_id, prime, created_at in rows:
+            self.created_watermark = _later(self.created_watermark, created_at)
+            node = len(self.user_ids)
+            if self.ordered == node and (not node or user_id > self.user_ids[-1]):
+                self.ordered += 1
+            elif self.node_of(user_id) is not None:
+                continue
+            else:
+                self.unordered[user_id] = node
+            self.user_ids.append(user_id)
+            self.parent.append(-1)
+            self.prime.append(1 if prime else 0)
+            self.depth.append(-1)
+            self.downline.append(0)
+            self.downline_prime.append(0)
+            if member_id:
+                members[member_id] = node
+            added.append((node, introducer_id, introducer_user_id))
+
+        relinked = 0
+        for node, introducer_id in list(self.orphans.items()):
+            parent = members.get(introducer_id)
+            if parent is not None:
+                self.parent[node] = parent
+                del self.orphans[node]
+                relinked += 1
+
+        for node, introducer_id, introducer_user_id in added:
+            # Loaded in this batch (always, on a full load), else looked up by the introducer's UserID
+            parent = members.get(introducer_id) if introducer_id else None
+            if parent is None and introducer_user_id is not None:
+                parent = self.node_of(introducer_user_id)
+            if parent is None:
+                parent = -1
+                if introducer_id:
+                    self.orphans[node] = introducer_id
+            self.parent[node] = parent
+        return [node for node, _, _ in added], relinked
+
+    def compute(self) -> None:
+        """Depths, downline counts and level histograms of the whole forest, in two linear passes"""
+        n = len(self.user_ids)
+        parent, prime = self.parent, self.prime
+        self._build_children()
+        start, children = self.child_start, self.children
+
+        # Breadth-first from the roots: parents come before their children in `order`
+        depth = array("i", [-1]) * n
+        order = array("i", [node for node in range(n) if parent[node] < 0])
+        for node in order:
+            depth[node] = 0
+        head = 0
+        while head < len(order):
+            node = order[head]
+            head += 1
+            below = children[start[node]:start[node + 1]]
+            if below:
+                level = depth[node] + 1
+                for child in below:
+                    depth[child] = level
+                order.extend(below)
+
+        # Children before their parents: each node adds its finished subtree to its introducer
+        downline = array("i", [0]) * n
+        downline_prime = array("i", [0]) * n
+        for node in reversed(order):
+            p = parent[node]
+            if p >= 0:
+                downline[p] += downline[node] + 1
+                downline_prime[p] += downline_prime[node] + prime[node]
+
+        levels = max(depth, default=-1) + 1
+        level_members = array("q", [0]) * levels
+        level_prime = array("q", [0]) * levels
+        for node in order:
+            level_members[depth[node]] += 1
+            level_prime[depth[node]] += prime[node]
+
+        self.depth, self.downline, self.downline_prime = depth, downline, downline_prime
+        self.level_members, self.level_prime = level_members, level_prime
+        self.roots = sum(1 for node in range(n) if parent[node] < 0 and node not in self.orphans)
+        # Never reached from a root: every member of an introducer cycle and everything below it
+        self.cyclic = n - len(order)
+
+    def attach(self, added: List[int]) -> bool:
+        """Add new leaf nodes to their ancestors' counts; False when only ``compute`` can place them"""
+        pending = set(added)
+        for node in added:
+            pending.discard(node)
+            p = self.parent[node]
+            if p == node or p in pending:
+                return False
+            prime = self.prime[node]
+            if p < 0:
+                level = 0
+                if node not in self.orphans:
+                    self.roots += 1
+            elif self.depth[p] < 0:
+                self.cyclic += 1
+                continue
+            else:
+                level = self.depth[p] + 1
+                ancestor = p
+                while ancestor >= 0:
+                    self.downline[ancestor] += 1
+                    self.downline_prime[ancestor] += prime
+                    ancestor = self.parent[ancestor]
+            self.depth[node] = level
+            if level == len(self.level_members):
+                self.level_members.append(0)
+                self.level_prime.append(0)
+            self.level_members[level] += 1
+            self.level_prime[level] += prime
+        return True
+
+    def mark_prime(self, user_ids: Iterable[int]) -> int:
+        """Count members that became prime in their ancestors' prime downline; returns how many changed"""
+        changed = 0
+        for user_id in user_ids:
+            node = self.node_of(user_id)
+            if node is None or self.prime[node]:
+                continue
+            self.prime[node] = 1
+            changed += 1
+            if self.depth[node] < 0:
+                continue
+            self.level_prime[self.depth[node]] += 1
+            ancestor = self.parent[node]
+            while ancestor >= 0:
+                self.downline_prime[ancestor] += 1
+                ancestor = self.parent[ancestor]
+        return changed
+
+    def _build_children(self) -> None:
+        """CSR adjacency: the children of node i are children[child_start[i]:child_start[i + 1]], in load order"""
+        n = len(self.user_ids)
+        parent = self.parent
+        start = array("i", [0]) * (n + 1)
+        for p in parent:
+            if p >= 0:
+                start[p + 1] += 1
+        for node in range(n):
+            start[node + 1] += start[node]
+        children = array("i", [0]) * start[n]
+        fill = start[:n]
+        for node in range(n):
+            p = parent[node]
+            if p >= 0:
+                children[fill[p]] = node
+                fill[p] += 1
+        self.child_start, self.children = start, children
+
+    def warm(self, previous: Optional["ReferralGraph"] = None) -> None:
+        """Children index, rankings and status counts, so that no request has to scan the graph
+
+        The rankings of ``previous`` are re-sorted rather than built from scratch: after an incremental
+        refresh they are nearly in order, which the sort handles in close to linear time.
+        """
+        n = len(self.user_ids)
+        if len(self.child_start) != n + 1:
+            self._build_children()
+
+        def ranking(values: array, before: Optional[array]) -> array:
+            nodes = list(before) + list(range(len(before), n)) if before is not None else range(n)
+            return array("i", sorted(nodes, key=values.__getitem__, reverse=True))
+
+        self.by_downline = ranking(self.downline, previous.by_downline if previous is not None else None)
+        self.by_prime = ranking(self.downline_prime, previous.by_prime if previous is not None else None)
+
+        counts = dict.fromkeys(STATUSES, 0)
+        for node in self.by_downline:
+            size = self.downline[node]
+            if size < ADVANCED_MIN_DOWNLINE:
+                break
+            counts[network_status(size)] += 1
+        counts["Growing"] = n - counts["Elite"] - counts["Advanced"]
+        self.status_counts = counts
+        self.prime_members = self.prime.count(1)
+
+    # ------------------------------------------------------------------ queries
+
+    def member(self, node: int) -> Dict[str, Any]:
+        downline = self.downline[node]
+        return {
+            "UserID": self.user_ids[node],
+            "depth": self.depth[node],
+            "directReferrals": self.child_start[node + 1] - self.child_start[node],
+            "downline": downline,
+            "downlinePrime": self.downline_prime[node],
+            "status": network_status(downline),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "members": len(self.user_ids),
+            "prime": self.prime_members,
+            "roots": self.roots,
+            "orphans": len(self.orphans),
+            "inCycles": self.cyclic,
+            "maxDepth": len(self.level_members) - 1,
+            "status": self.status_counts,
+        }
+
+    def levels(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "level": level,
+                "members": members,
+                "prime": prime,
+                "primeDensity": round(prime / members, 4) if members else 0.0,
+            }
+            for level, (members, prime) in enumerate(zip(self.level_members, self.level_prime))
+        ]
+
+    def top(self, by: str, limit: int) -> List[Dict[str, Any]]:
+        ranking = self.by_prime if by == "prime" else self.by_downline
+        return [self.member(node) for node in ranking[:limit]]
+
+    def eligible(self, min_downline: int, min_prime: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Members with at least ``min_downline`` members and ``min_prime`` prime members below them
+
+        Walks the downline ranking only as far as ``min_downline`` reaches.
+        """
+        count = 0
+        members = []
+        for node in self.by_downline:
+            if self.downline[node] < min_downline:
+                break
+            if self.downline_prime[node] >= min_prime:
+                count += 1
+                if len(members) < limit:
+                    members.append(self.member(node))
+        return count, members
+
+    def downline_levels(self, node: int, max_depth: Optional[int] = None) -> List[Dict[str, int]]:
+        """Members and prime members per level below ``node`` (level 0 is the node itself)"""
+        start, children, prime = self.child_start, self.children, self.prime
+        levels = []
+        frontier = array("i", [node])
+        while frontier and (max_depth is None or len(levels) <= max_depth):
+            levels.append({
+                "level": len(levels),
+                "members": len(frontier),
+                "prime": sum(prime[member] for member in frontier),
+            })
+            below = array("i")
+            for member in frontier:
+                below.extend(children[start[member]:start[member + 1]])
+            frontier = below
+        return levels
+
+    def orphan_list(self, limit: int) -> List[Dict[str, Any]]:
+        orphans = []
+        for node, introducer_id in self.orphans.items():
+            if len(orphans) >= limit:
+                break
+            orphans.append({"UserID": self.user_ids[node], "introducer_id": introducer_id})
+        return orphans
+
+    def freshness(self) -> Dict[str, Any]:
+        return {
+            "loadedAt": _iso(self.loaded_at),
+            "refreshedAt": _iso(self.refreshed_at),
+            "createdWatermark": _iso(self.created_watermark),
+            "primeWatermark": _iso(self.prime_watermark),
+        }
+
+
+def _node_query():
+    """(UserID, member_id, introducer_id, introducer's UserID, prime_status, CreatedAt) of every user"""
+    introducer = aliased(User)
+    return select(
+        User.UserID, User.member_id, User.introducer_id, introducer.UserID, User.prime_status, User.CreatedAt
+    ).outerjoin(introducer, introducer.member_id == User.introducer_id)
+
+
+class ReferralGraphEngine:
+    """Per-process owner of the published ReferralGraph and the daemon thread refreshing it"""
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float, full_reload: float):
+        self._session_factory = session_factory
+        self.interval = interval
+        self.full_reload = full_reload
+        self.graph: Optional[ReferralGraph] = None
+        # One load or refresh at a time
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def current(self) -> ReferralGraph:
+        """The published graph; the first call in a process waits for the initial load"""
+        self.start()
+        graph = self.graph
+        if graph is None:
+            with self._lock:
+                if self.graph is None:
+                    self._reload()
+            graph = self.graph
+        return graph
+
+    def reload(self) -> None:
+        with self._lock:
+            self._reload()
+
+    def refresh(self) -> None:
+        with self._lock:
+            if self.graph is None:
+                self._reload()
+            else:
+                self._refresh()
+
+    def _reload(self) -> None:
+        started = time.monotonic()
+        graph = ReferralGraph()
+        with self._session_factory() as db:
+            graph.add_rows(db.execute(_node_query().order_by(User.UserID).execution_options(yield_per=LOAD_BATCH)))
+            graph.prime_watermark = db.scalar(
+                select(func.max(User.prime_activation_date)).where(User.prime_status == True)  # noqa: E712
+            )
+        graph.compute()
+        graph.warm()
+        graph.loaded_at = graph.refreshed_at = time.time()
+        self.graph = graph
+        logger.info(
+            "Referral graph loaded: %d members, depth %d, %.2fs",
+            len(graph), len(graph.level_members) - 1, time.monotonic() - started,
+        )
+
+    def _refresh(self) -> None:
+        graph = self.graph
+        started = time.monotonic()
+        created = User.CreatedAt
+        activated = User.prime_activation_date
+        with self._session_factory() as db:
+            query = _node_query().order_by(created, User.UserID)
+            if graph.created_watermark is not None:
+                query = query.where(created >= graph.created_watermark - OVERLAP)
+            else:
+                query = query.where(created.isnot(None))
+            rows = db.execute(query).all()
+
+            primes = select(User.UserID, activated).where(User.prime_status == True)  # noqa: E712
+            if graph.prime_watermark is not None:
+                primes = primes.where(activated >= graph.prime_watermark - OVERLAP)
+            else:
+                primes = primes.where(activated.isnot(None))
+            primes = db.execute(primes).all()
+
+        new_rows = [row for row in rows if graph.node_of(row[0]) is None]
+        new_primes = []
+        for user_id, _ in primes:
+            node = graph.node_of(user_id)
+            if node is not None and not graph.prime[node]:
+                new_primes.append(user_id)
+        if not new_rows and not new_primes:
+            graph.refreshed_at = time.time()
+            return
+
+        updated = graph.copy()
+        added, relinked = updated.add_rows(new_rows)
+        if relinked or not updated.attach(added):
+            updated.compute()
+        updated.mark_prime(new_primes)
+        for _, activated_at in primes:
+            updated.prime_watermark = _later(updated.prime_watermark, activated_at)
+        updated.warm(graph)
+        updated.refreshed_at = time.time()
+        self.graph = updated
+        logger.info(
+            "Referral graph refreshed: %d new members, %d newly prime, %.2fs",
+            len(added), len(new_primes), time.monotonic() - started,
+        )
+
+    def start(self) -> None:
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._stop.clear()
+                self._refresher = threading.Thread(target=self._run, name="referral-graph", daemon=True)
+                self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        refresher, self._refresher = self._refresher, None
+        if refresher is not None:
+            refresher.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                graph = self.graph
+                if graph is not None and time.time() - graph.loaded_at >= self.full_reload:
+                    self.reload()
+                else:
+                    self.refresh()
+            except Exception as e:
+                logger.warning("Could not refresh the referral graph: %s", e)
+
+
+# Replicas are fine: OVERLAP covers their lag
+referral_graph = ReferralGraphEngine(
+    ReadSessionLocal,
+    interval=settings.NETWORK_GRAPH_REFRESH_INTERVAL,
+    full_reload=settings.NETWORK_GRAPH_FULL_RELOAD,
+)
@@ -0,0 +1,197 @@
+"""
+Referral tree queries over the users.introducer_id -> users.member_id link
+
+``referral_tree_query`` fetches a user's downline with one ``WITH RECURSIVE``
+statement (PostgreSQL and SQLite alike): ``level`` is computed by the
+recursion, the tree size and depth by window functions over the same result,
+and each node's direct referral count by an indexed subquery. The walk stops
+at ``max_depth`` levels, which also bounds it if the data ever contains a
+cycle.
+
+The downline/upline queries read referral_closure instead (see
+services/referral_closure.py): one indexed query each, at any depth. Unlike
+the tree walk, they still count the downline of a deleted member.
+"""
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import Integer, and_, func, literal_column, or_, select
+from sqlalchemy.orm import aliased
+
+from models.models import User
+from models.referral_closure import ReferralClosure
+
+# Levels below the root that are walked (the root is level 0): levels 0-9, as before the recursive query
+MAX_TREE_DEPTH = 9
+
+NODE_COLUMNS = ("UserID", "fullname", "member_id", "MobileNumber", "Email", "prime_status")
+
+
+def _active(model):
+    # Same test as the old per-node queries: rows with IsDeleted NULL are left out too
+    return model.IsDeleted == False  # noqa: E712
+
+
+def referral_tree_cte(user_id: int, max_depth: int = MAX_TREE_DEPTH):
+    """The root user (level 0) and its active downline up to max_depth levels below it"""
+    columns = [getattr(User, name) for name in NODE_COLUMNS]
+    # Inline integer: a bound parameter would be typed text on PostgreSQL and clash with level + 1
+    tree = select(*columns, User.introducer_id, literal_column("0", Integer).label("level")).where(
+        User.UserID == user_id, _active(User)
+    ).cte("referral_tree", recursive=True)
+
+    child = aliased(User)
+    return tree.union_all(
+        select(
+            *[getattr(child, name) for name in NODE_COLUMNS], child.introducer_id, (tree.c.level + 1).label("level")
+        )
+        .join(tree, child.introducer_id == tree.c.member_id)
+        .where(_active(child), tree.c.level < max_depth)
+    )
+
+
+def referral_tree_query(
+    user_id: int,
+    max_depth: int = MAX_TREE_DEPTH,
+    depth: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
+):
+    """One statement returning tree rows with ``referred_count``, ``total_nodes`` and ``max_level``
+
+    With ``depth`` only the root and one page of that level (ordered by UserID, past ``after``)
+    are returned; the totals still cover the whole tree.
+    """
+    tree = referral_tree_cte(user_id, max_depth)
+    ranked = select(
+        tree,
+        func.count().over().label("total_nodes"),
+        func.max(tree.c.level).over().label("max_level"),
+    ).subquery()
+
+    referred = aliased(User)
+    referred_count = (
+        select(func.count()).select_from(referred)
+        .where(referred.introducer_id == ranked.c.member_id, _active(referred))
+        .scalar_subquery()
+    )
+    query = select(ranked, referred_count.label("referred_count"))
+    if depth is None:
+        return query.order_by(ranked.c.level, ranked.c.UserID)
+
+    page = ranked.c.level == depth
+    if after is not None:
+        page = and_(page, ranked.c.UserID > after)
+    query = query.where(or_(ranked.c.level == 0, page)).order_by(ranked.c.level, ranked.c.UserID)
+    # The root row, the page, and one more row telling whether another page follows
+    return query if limit is None else query.limit(limit + 2)
+
+
+def _node(row) -> Dict[str, Any]:
+    return {
+        "UserID": row.UserID,
+        "fullname": row.fullname or f"User {row.UserID}",
+        "member_id": row.member_id,
+        "MobileNumber": row.MobileNumber,
+        "Email": row.Email,
+        "prime_status": row.prime_status,
+        "referred_count": row.referred_count,
+        "level": row.level,
+    }
+
+
+def build_referral_tree(rows: Sequence) -> Dict[str, Any]:
+    """Nest the rows of referral_tree_query (ordered by level) under their introducers"""
+    nodes: Dict[tuple, Dict[str, Any]] = {}
+    root = None
+    for row in rows:
+        node = _node(row)
+        node["referred_users"] = []
+        nodes[(row.level, row.member_id)] = node
+        if row.level == 0:
+            root = node
+        else:
+            parent = nodes.get((row.level - 1, row.introducer_id))
+            if parent is not None:
+                parent["referred_users"].append(node)
+    return root
+
+
+def referral_level_page(rows: Sequence, limit: int) -> Dict[str, Any]:
+    """Flatten the rows of a paged referral_tree_query: one level's nodes and the cursor for the next page"""
+    nodes = [_node(row) for row in rows if row.level != 0]
+    has_more = len(nodes) > limit
+    nodes = nodes[:limit]
+    return {
+        "nodes": nodes,
+        "nextAfter": nodes[-1]["UserID"] if has_more else None,
+    }
+
+
+def tree_totals(rows: Sequence) -> Dict[str, int]:
+    first = rows[0]
+    return {"totalReferrals": first.total_nodes - 1, "maxDepth": first.max_level}
+
+
+# ============================= CLOSURE QUERIES =============================
+
+def _member_id(user_id: int):
+    return select(User.member_id).where(User.UserID == user_id).scalar_subquery()
+
+
+def downline_levels_query(user_id: int, max_depth: Optional[int] = None):
+    """Active members and prime members per level below the user; level 0 is the user itself"""
+    member = aliased(User)
+    query = (
+        select(
+            ReferralClosure.depth.label("level"),
+            func.count().label("members"),
+            func.count().filter(member.prime_status == True).label("prime"),  # noqa: E712
+        )
+        .join(member, member.member_id == ReferralClosure.descendant)
+        .where(ReferralClosure.ancestor == _member_id(user_id), _active(member))
+        .group_by(ReferralClosure.depth)
+        .order_by(ReferralClosure.depth)
+    )
+    if max_depth is not None:
+        query = query.where(ReferralClosure.depth <= max_depth)
+    return query
+
+
+def downline_prime_query(user_id: int, max_depth: Optional[int] = None):
+    """One row: the user (0 or 1), its active downline and how many of those are prime"""
+    member = aliased(User)
+    below = ReferralClosure.depth > 0
+    query = (
+        select(
+            func.count().filter(ReferralClosure.depth == 0).label("found"),
+            func.count().filter(below).label("members"),
+            func.count().filter(below, member.prime_status == True).label("prime"),  # noqa: E712
+        )
+        .select_from(ReferralClosure)
+        .join(member, member.member_id == ReferralClosure.descendant)
+        .where(ReferralClosure.ancestor == _member_id(user_id), _active(member))
+    )
+    if max_depth is not None:
+        query = query.where(ReferralClosure.depth <= max_depth)
+    return query
+
+
+def upline_query(user_id: int, max_levels: Optional[int] = None):
+    """The user (level 0) and its introducers up the chain, nearest first, as LevelIncome levels count them"""
+    ancestor = aliased(User)
+    query = (
+        select(
+            ReferralClosure.depth.label("level"),
+            ancestor.UserID,
+            ancestor.fullname,
+            ancestor.member_id,
+            ancestor.prime_status,
+            ancestor.IsDeleted,
+        )
+        .join(ancestor, ancestor.member_id == ReferralClosure.ancestor)
+        .where(ReferralClosure.descendant == _member_id(user_id))
+        .order_by(ReferralClosure.depth)
+    )
+    if max_levels is not None:
+        query = query.where(ReferralClosure.depth <= max_levels)
+    return query
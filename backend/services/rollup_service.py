@@ -0,0 +1,234 @@
+"""
+Daily rollups of service_request and payment_gateway volume
+
+``daily_service_stats`` and ``daily_payment_stats`` hold count, sum, min and max
+of ``amount`` per IST day x service_type/purpose x status. A day is always
+rebuilt whole from raw rows (delete + insert in one transaction), so reruns
+are idempotent and rows that moved between statuses are counted once.
+
+The incremental job finds the days touched since its watermark (source
+``updated_at`` greater than the last run's maximum, minus ``OVERLAP`` for
+transactions that committed late) and rebuilds only those. Hard-deleted raw
+rows are not seen by it; rebuild their days with ``backfill``.
+
+Readers use ``closed_days``/``live_rows``: rollup rows for days before the
+watermark's ``covered_before`` and raw rows from its ``raw_boundary`` on, both
+resolved inside the reader's own statement. Until the job has run, everything
+comes from raw rows.
+
+Run from backend/ (e.g. every few minutes from cron):
+    python -m services.rollup_service [run]
+    python -m services.rollup_service backfill --from 2025-01-01 --to 2025-12-31 [--chunk-days 7] [--table daily_payment_stats]
+"""
+import argparse
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from core import timeseries
+from core.base import IST, get_ist_time
+from models.payment_gateway import Payment_Gateway
+from models.rollups import DailyPaymentStats, DailyServiceStats, RollupWatermark
+from models.service_request import Service_Request
+
+logger = logging.getLogger(__name__)
+
+# Rows updated this long before the last run's high-water mark are looked at again
+OVERLAP = timedelta(minutes=10)
+DEFAULT_CHUNK_DAYS = 7
+
+# Lower bounds that every stored date/timestamp compares greater than
+EPOCH_DATE = date(1970, 1, 1)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class Rollup(NamedTuple):
+    """A rollup table and the raw table/columns it summarizes"""
+    table: type
+    source: type
+    dimension: str
+    amount: object
+
+    @property
+    def name(self) -> str:
+        return self.table.__tablename__
+
+
+SERVICE_ROLLUP = Rollup(DailyServiceStats, Service_Request, "service_type", Service_Request.amount)
+PAYMENT_ROLLUP = Rollup(DailyPaymentStats, Payment_Gateway, "purpose", Payment_Gateway.amount)
+ROLLUPS = {rollup.name: rollup for rollup in (SERVICE_ROLLUP, PAYMENT_ROLLUP)}
+
+
+def ist_midnight(day: date) -> datetime:
+    return IST.localize(datetime.combine(day, datetime.min.time()))
+
+
+def _day_expression(rollup: Rollup, dialect: str):
+    return timeseries.bucket_expression(rollup.source.created_at, "day", dialect)
+
+
+def _as_date(value) -> date:
+    return date.fromisoformat(timeseries.format_bucket(value, "day"))
+
+
+def _watermark(rollup: Rollup):
+    return select(RollupWatermark).where(RollupWatermark.name == rollup.name)
+
+
+def closed_days(rollup: Rollup):
+    """Condition on the rollup table: days the job has completed (none before its first run)"""
+    covered_before = (
+        select(RollupWatermark.covered_before).where(RollupWatermark.name == rollup.name).scalar_subquery()
+    )
+    return rollup.table.day < func.coalesce(covered_before, literal(EPOCH_DATE, Date))
+
+
+def live_rows(rollup: Rollup):
+    """Condition on the raw table: rows not yet in a closed rollup day (all of them before the first run)
+
+    A range on created_at against a one-row subquery, so the created_at index still applies.
+    """
+    raw_boundary = (
+        select(RollupWatermark.raw_boundary).where(RollupWatermark.name == rollup.name).scalar_subquery()
+    )
+    return rollup.source.created_at >= func.coalesce(raw_boundary, literal(EPOCH, DateTime(timezone=True)))
+
+
+def rebuild_days(db: Session, rollup: Rollup, first: date, last: date) -> int:
+    """Recompute the rollup for IST days first..last (inclusive) from raw rows; returns the rows written"""
+    dialect = db.get_bind().dialect.name
+    source = rollup.source
+    day = _day_expression(rollup, dialect)
+    dimension = func.coalesce(getattr(source, rollup.dimension), "")
+    status = func.coalesce(source.status, "")
+    created_at = source.created_at
+
+    rows = db.execute(
+        select(
+            day, dimension, status,
+            func.count(), func.coalesce(func.sum(rollup.amount), 0), func.min(rollup.amount), func.max(rollup.amount),
+        )
+        .where(
+            created_at >= timeseries.column_bound(ist_midnight(first), created_at, dialect),
+            created_at < timeseries.column_bound(ist_midnight(last + timedelta(days=1)), created_at, dialect),
+        )
+        .group_by(day, dimension, status)
+    ).all()
+
+    table = rollup.table
+    db.execute(delete(table).where(table.day >= first, table.day <= last))
+    if rows:
+        now = get_ist_time()
+        db.execute(insert(table), [
+            {
+                "day": _as_date(bucket),
+                rollup.dimension: key,
+                "status": row_status,
+                "count": count,
+                "amount_sum": total,
+                "amount_min": smallest,
+                "amount_max": largest,
+                "updated_at": now,
+            }
+            for bucket, key, row_status, count, total, smallest, largest in rows
+        ])
+    return len(rows)
+
+
+def _runs(days: Iterable[date], chunk_days: int) -> List[Tuple[date, date]]:
+    """Group days into contiguous (first, last) ranges of at most chunk_days"""
+    ranges: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if ranges and day == ranges[-1][1] + timedelta(days=1) and (day - ranges[-1][0]).days < chunk_days:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def run_incremental(db: Session, rollup: Rollup, chunk_days: int = DEFAULT_CHUNK_DAYS) -> int:
+    """Rebuild the days touched since the last run, then advance the watermark; returns the days rebuilt"""
+    dialect = db.get_bind().dialect.name
+    source = rollup.source
+    today = datetime.now(IST).date()
+    watermark = db.scalars(_watermark(rollup)).first()
+    high_water = db.scalar(select(func.max(source.updated_at)))
+
+    day = _day_expression(rollup, dialect)
+    if watermark is None or watermark.high_water is None:
+        first = db.scalar(select(func.min(day)))
+        days = [] if first is None else [
+            _as_date(first) + timedelta(days=i) for i in range((today - _as_date(first)).days + 1)
+        ]
+    else:
+        days = [
+            _as_date(value) for value in db.scalars(
+                select(day).where(source.updated_at > watermark.high_water - OVERLAP).group_by(day)
+            )
+            if value is not None
+        ]
+
+    for first, last in _runs(days, chunk_days):
+        rebuild_days(db, rollup, first, last)
+        db.commit()
+
+    if watermark is None:
+        watermark = RollupWatermark(name=rollup.name)
+        db.add(watermark)
+    if high_water is not None:
+        watermark.high_water = high_water
+    watermark.covered_before = today
+    watermark.raw_boundary = timeseries.column_bound(ist_midnight(today), source.created_at, dialect)
+    watermark.updated_at = get_ist_time()
+    db.commit()
+    logger.info("Rolled up %s: %d day(s) rebuilt, complete before %s", rollup.name, len(days), today)
+    return len(days)
+
+
+def backfill(db: Session, rollup: Rollup, first: date, last: date, chunk_days: int = DEFAULT_CHUNK_DAYS) -> int:
+    """Rebuild a date range in chunks of chunk_days, one transaction each; the watermark is left alone"""
+    rebuilt = 0
+    start = first
+    while start <= last:
+        end = min(start + timedelta(days=chunk_days - 1), last)
+        rows = rebuild_days(db, rollup, start, end)
+        db.commit()
+        rebuilt += (end - start).days + 1
+        logger.info("Backfilled %s %s..%s: %d rows", rollup.name, start, end, rows)
+        start = end + timedelta(days=1)
+    return rebuilt
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from core.database import SessionLocal
+    from core.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command")
+    run_parser = commands.add_parser("run", help="incremental update of the days touched since the last run (default)")
+    backfill_parser = commands.add_parser("backfill", help="rebuild a range of IST days")
+    backfill_parser.add_argument("--from", dest="first", type=date.fromisoformat, required=True, help="first day, YYYY-MM-DD")
+    backfill_parser.add_argument("--to", dest="last", type=date.fromisoformat, required=True, help="last day, YYYY-MM-DD (inclusive)")
+    for sub in (run_parser, backfill_parser):
+        sub.add_argument("--table", choices=sorted(ROLLUPS), action="append", help="rollup table(s) (default: all)")
+        sub.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS, help=f"days per transaction (default: {DEFAULT_CHUNK_DAYS})")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    rollups = [ROLLUPS[name] for name in (getattr(args, "table", None) or sorted(ROLLUPS))]
+    chunk_days = getattr(args, "chunk_days", DEFAULT_CHUNK_DAYS)
+    with SessionLocal() as db:
+        for rollup in rollups:
+            if args.command == "backfill":
+                if args.first > args.last:
+                    parser.error("--from must not be after --to")
+                backfill(db, rollup, args.first, args.last, chunk_days)
+            else:
+                run_incremental(db, rollup, chunk_days)
+
+
+if __name__ == "__main__":
+    main()